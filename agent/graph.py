@@ -1,171 +1,241 @@
-from langgraph.graph import StateGraph, END
+from __future__ import annotations
+
 from agent.state import AgentState
-from models.schema import FlightQuery, Flight, ComparisonResult
-from tools.llm_parser import parse_query_with_llama
+from models.schema import TRIP_FIELDS, FlightQuery, Flight, ScraperResult, ComparisonResult
+from tools.llm_parser import parse_query_with_llama_async
 from tools.scrapers import scrape_makemytrip, scrape_cleartrip, scrape_easemytrip
+from tools.scrapers import SessionWarmup, SESSION_OPENERS
+from tools.result_store import get_result_store
+from tools.fare_history import append_flights
+from tools.worker_pool import get_worker_pool
+from tools.coalesce import get_coalescer
+from tools.deadline import SearchBudget, run_within, CACHED, COMPLETE, FAILED, PARTIAL, TIMED_OUT
+from tools.checkpoint import get_checkpoint_store
+from tools.scheduler import INTERACTIVE, get_scheduler
 import asyncio
-from typing import Dict, Any
-from datetime import datetime
+import time
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    # LangGraph matches the "RunnableConfig" annotation by name, so the runtime import
+    # (langgraph pulls in langchain_core, ~1s) can wait until the graph is built
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph import StateGraph
 
 
 # ============= NODE FUNCTIONS =============
 
-def parse_intent_node(state: AgentState) -> Dict[str, Any]:
+def _get_warmup(config: RunnableConfig):
+    """SessionWarmup started by run_flight_search, if any (kept out of state: it holds live browsers)"""
+    return (config or {}).get("configurable", {}).get("warmup")
+
+
+async def parse_intent_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """
     Node 1: Parse user's natural language query using LLaMA
+    (async client, so other in-flight searches keep scraping meanwhile)
+    A search resumed from a checkpoint keeps the query it already parsed
     """
+    if state.get("parsed_query"):
+        print(f"\n[PARSE] Resumed: {state['parsed_query'].from_city} → {state['parsed_query'].to_city}")
+        return {}
+
     print(f"\n[PARSE] Processing query: {state['user_query']}")
     
-    parsed = parse_query_with_llama(state['user_query'])
+    errors = state.get("errors", [])
+    try:
+        # Under a latency budget the parse counts against it too
+        timeout = max(0.0, state["deadline"] - time.time()) if state.get("deadline") else None
+        parsed = await asyncio.wait_for(parse_query_with_llama_async(state['user_query']), timeout)
+    except asyncio.TimeoutError:
+        print("[PARSE] ⏱️ Deadline reached while parsing")
+        parsed, errors = None, errors + ["Deadline reached while parsing"]
     
     if not parsed:
+        # Nothing to search - drop the browsers that were warming up
+        warmup = _get_warmup(config)
+        if warmup:
+            await warmup.cancel()
         return {
             "parsed_query": None,
-            "errors": state.get("errors", []) + ["Failed to parse query"]
+            "errors": errors + ["Failed to parse query"]
         }
     
     print(f"[PARSE] Extracted: {parsed.from_city} → {parsed.to_city} on {parsed.departure_date}")
     
+    # Only the trip comes from the LLM; caller-supplied filters ride along on the query so
+    # every scraper can push them down
+    parsed = FlightQuery(**{name: getattr(parsed, name) for name in TRIP_FIELDS},
+                         raw_query=parsed.raw_query, **(state.get("filters") or {}))
+    if parsed.filters():
+        print(f"[PARSE] Filters: {parsed.filters()}")
+    
+    # Feeds the popular-route refresher
+    get_result_store().log_request(parsed)
+    
     return {
         "parsed_query": parsed,
         "errors": state.get("errors", [])
     }
 
 
-async def scrape_all_node(state: AgentState) -> Dict[str, Any]:
+# Per-source branch: state key for the result and log tag, in scrape order
+SOURCES = {
+    "makemytrip": ("mmt_result", "MMT"),
+    "cleartrip": ("cleartrip_result", "Cleartrip"),
+    "easemytrip": ("emt_result", "EMT"),
+}
+SCRAPERS = {
+    "makemytrip": scrape_makemytrip,
+    "cleartrip": scrape_cleartrip,
+    "easemytrip": scrape_easemytrip,
+}
+# Source statuses a resumed search keeps; failed and timed-out sources are scraped again
+FINISHED = (COMPLETE, PARTIAL, CACHED)
+
+
+def parse_failed_node(state: AgentState) -> Dict[str, Any]:
     """
-    Node 2: Scrape all three websites SEQUENTIALLY (one after another)
-    This is easier on system resources than parallel execution
+    Parse failure goes straight here: an error result, no scraping
     """
-    parsed_query = state["parsed_query"]
-    
-    # SAFETY CHECK: If parsing failed, skip scraping
-    if not parsed_query:
-        return {
-            "mmt_result": None,
-            "cleartrip_result": None,
-            "emt_result": None,
-            "errors": state.get("errors", []) + ["Skipping scrape: No parsed query"]
-        }
-    
-    print("\n[SCRAPE] Starting SEQUENTIAL scraping...")
-    print("[SCRAPE] This will run one scraper at a time to reduce system load")
-    
-    errors = state.get("errors", [])
-    
-    # ============= SCRAPE 1: MakeMyTrip =============
-    print("\n[SCRAPE] 1/3 - Starting MakeMyTrip...")
-    try:
-        mmt_result = await scrape_makemytrip(parsed_query)
-        
-        if mmt_result and mmt_result.success:
-            print(f"[SCRAPE] ✅ MMT: Found {len(mmt_result.flights)} flights")
-        elif mmt_result and not mmt_result.success:
-            print(f"[SCRAPE] ❌ MMT: {mmt_result.error}")
-            errors.append(f"MMT: {mmt_result.error}")
-        else:
-            print("[SCRAPE] ❌ MMT: No result returned")
-            mmt_result = None
-            errors.append("MMT: No result returned")
-    except Exception as e:
-        print(f"[SCRAPE] ❌ MMT Exception: {e}")
-        mmt_result = None
-        errors.append(f"MMT: {str(e)}")
-    
-    # ============= SCRAPE 2: Cleartrip =============
-    print("\n[SCRAPE] 2/3 - Starting Cleartrip...")
-    try:
-        cleartrip_result = await scrape_cleartrip(parsed_query)
-        
-        if cleartrip_result and cleartrip_result.success:
-            print(f"[SCRAPE] ✅ Cleartrip: Found {len(cleartrip_result.flights)} flights")
-        elif cleartrip_result and not cleartrip_result.success:
-            print(f"[SCRAPE] ❌ Cleartrip: {cleartrip_result.error}")
-            errors.append(f"Cleartrip: {cleartrip_result.error}")
-        else:
-            print("[SCRAPE] ❌ Cleartrip: No result returned")
-            cleartrip_result = None
-            errors.append("Cleartrip: No result returned")
-    except Exception as e:
-        print(f"[SCRAPE] ❌ Cleartrip Exception: {e}")
-        cleartrip_result = None
-        errors.append(f"Cleartrip: {str(e)}")
-    
-    # ============= SCRAPE 3: EaseMyTrip =============
-    print("\n[SCRAPE] 3/3 - Starting EaseMyTrip...")
-    try:
-        emt_result = await scrape_easemytrip(parsed_query)
-        
-        if emt_result and emt_result.success:
-            print(f"[SCRAPE] ✅ EMT: Found {len(emt_result.flights)} flights")
-        elif emt_result and not emt_result.success:
-            print(f"[SCRAPE] ❌ EMT: {emt_result.error}")
-            errors.append(f"EMT: {emt_result.error}")
-        else:
-            print("[SCRAPE] ❌ EMT: No result returned")
-            emt_result = None
-            errors.append("EMT: No result returned")
-    except Exception as e:
-        print(f"[SCRAPE] ❌ EMT Exception: {e}")
-        emt_result = None
-        errors.append(f"EMT: {str(e)}")
-    
-    print("\n[SCRAPE] Sequential scraping completed!")
-    
+    print("❌ Error: query parsing failed, nothing to search.")
+    error_result = ComparisonResult(
+        query=None,
+        all_flights=[],
+        cheapest_flight=None,
+        total_results=0,
+        sources_checked=[],
+        error="; ".join(state.get("errors", [])) or "LLM Parsing Failed"
+    )
     return {
-        "mmt_result": mmt_result,
-        "cleartrip_result": cleartrip_result,
-        "emt_result": emt_result,
-        "errors": errors
+        "all_flights": [],
+        "comparison_result": error_result
     }
 
 
-def compare_flights_node(state: AgentState) -> Dict[str, Any]:
+async def check_cache_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """
-    Node 3: Aggregate and compare all flights
+    Node 2: Serve every source with a fresh result in the result store (e.g. kept warm by
+    tools/refresher.py) and queue only the stale ones for scraping
+    A filtered search can be served by an unfiltered cached result (filtered here)
+    A resumed search keeps the sources it already finished
     """
-    print("\n[COMPARE] Aggregating results...")
+    parsed_query = state["parsed_query"]
+    store = get_result_store()
+    updates, source_status, pending = {}, dict(state.get("source_status") or {}), []
+
+    for source, (key, tag) in SOURCES.items():
+        if source_status.get(source) in FINISHED and state.get(key):
+            print(f"[SCRAPE] ⏩ {source}: {len(state[key].flights)} flights from checkpoint")
+            continue
+        cached = store.get(source, parsed_query)
+        if cached and parsed_query.filters():
+            matching = [f for f in cached.flights if parsed_query.matches(f)]
+            cached = ScraperResult.from_flights(source, matching) if matching else None
+        if cached:
+            print(f"[SCRAPE] ⚡ {source}: {len(cached.flights)} flights from result store")
+            updates[key] = cached
+            source_status[source] = CACHED
+        else:
+            pending.append(source)
+
+    # Fresh sources never need the browser that was warming up for them
+    warmup = _get_warmup(config)
+    if warmup:
+        await warmup.cancel([source for source in SOURCES if source not in pending])
+    if pending:
+        print(f"[SCRAPE] Stale sources, scraped one at a time: {', '.join(pending)}")
+
+    return {**updates, "source_status": source_status, "pending_sources": pending}
+
+
+async def _scrape_source(source: str, parsed_query: FlightQuery, warmup, timeout: Optional[float]):
+    """One source's scrape -> (result, status)"""
+    filtered = bool(parsed_query.filters())
+    workers = get_worker_pool()
+
+    async def fetch():
+        if workers:
+            result = await workers.scrape(source, parsed_query)
+        else:
+            session = await warmup.take(source) if warmup else None
+            result = await SCRAPERS[source](parsed_query, session)
+        # A filtered scrape is a subset of the route - never cache it under the route key
+        if not filtered:
+            get_result_store().put(source, parsed_query, result)
+        if result and result.success:
+            # Parquet write - off the event loop so other sources and deadline timers keep running
+            await asyncio.to_thread(append_flights, parsed_query, result.flights)
+        return result
+
+    # Identical searches running right now share one scrape
+    async def coalesced():
+        return await get_coalescer().run(source, parsed_query, fetch)
+
+    if timeout is None:
+        result = await coalesced()
+        return result, COMPLETE if result and result.success else FAILED
+    return await run_within(source, coalesced, timeout)
+
+
+def _make_scrape_node(source: str):
+    key, tag = SOURCES[source]
+
+    async def scrape_source_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """
+        Node 3 (per stale source): scrape one site
+        Sources run SEQUENTIALLY (one after another), which is easier on system resources
+        Pages warmed up during parsing are handed to the scrapers when available
+        With FLIGHT_WORKER_PROCESSES set, the scrape runs in a worker process instead
+        Query filters are pushed down into the scrapers
+        Under a latency budget each source gets a share of the time left and is cut off at its
+        deadline with whatever flights it had collected
+        """
+        pending = state["pending_sources"]
+        timeout = SearchBudget(state["deadline"], pending).share(source) if state.get("deadline") else None
+        errors = list(state.get("errors", []))
+
+        print(f"\n[SCRAPE] Starting {tag}...")
+        try:
+            result, status = await _scrape_source(source, state["parsed_query"], _get_warmup(config), timeout)
+            if result and result.success:
+                print(f"[SCRAPE] ✅ {tag}: Found {len(result.flights)} flights")
+            elif result:
+                print(f"[SCRAPE] ❌ {tag}: {result.error}")
+                errors.append(f"{tag}: {result.error}")
+            else:
+                print(f"[SCRAPE] ❌ {tag}: No result returned")
+                errors.append(f"{tag}: No result returned")
+        except Exception as e:
+            print(f"[SCRAPE] ❌ {tag} Exception: {e}")
+            result, status = None, FAILED
+            errors.append(f"{tag}: {str(e)}")
 
-    # SAFETY CHECK: If parsing failed, return error result
-    if not state.get("parsed_query"):
-        print("❌ Error: Cannot compare flights because query parsing failed.")
-        
-        # Create a dummy query object to satisfy Pydantic
-        dummy_query = FlightQuery(
-            from_city="ERROR", 
-            to_city="ERROR", 
-            departure_date=datetime.now().date(), 
-            raw_query=state["user_query"]
-        )
-        
-        error_result = ComparisonResult(
-            query=dummy_query,
-            all_flights=[],
-            cheapest_flight=None,
-            total_results=0,
-            sources_checked=[],
-            error="LLM Parsing Failed"
-        )
         return {
-            "all_flights": [],
-            "comparison_result": error_result
+            key: result,
+            "source_status": {**state.get("source_status", {}), source: status},
+            "pending_sources": [s for s in pending if s != source],
+            "errors": errors
         }
+
+    scrape_source_node.__name__ = f"scrape_{source}_node"
+    return scrape_source_node
+
+
+def compare_flights_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Node 4: Aggregate and compare all flights
+    """
+    print("\n[COMPARE] Aggregating results...")
     
     all_flights = []
     sources_checked = []
     
     # Aggregate flights from all sources
-    if state.get("mmt_result") and state["mmt_result"].success:
-        all_flights.extend(state["mmt_result"].flights)
-        sources_checked.append("makemytrip")
-    
-    if state.get("cleartrip_result") and state["cleartrip_result"].success:
-        all_flights.extend(state["cleartrip_result"].flights)
-        sources_checked.append("cleartrip")
-    
-    if state.get("emt_result") and state["emt_result"].success:
-        all_flights.extend(state["emt_result"].flights)
-        sources_checked.append("easemytrip")
+    for source, (key, tag) in SOURCES.items():
+        if state.get(key) and state[key].success:
+            all_flights.extend(state[key].flights)
+            sources_checked.append(source)
     
     # Find cheapest flight
     cheapest = None
@@ -175,14 +245,12 @@ def compare_flights_node(state: AgentState) -> Dict[str, Any]:
     else:
         print("❌ No flights found on any platform.")
     
-    # Build comparison result
-    comparison = ComparisonResult(
-        query=state["parsed_query"],
-        all_flights=all_flights,
-        cheapest_flight=cheapest,
-        total_results=len(all_flights),
-        sources_checked=sources_checked
-    )
+    # Build comparison result (flights were validated by the scrapers - no second pass)
+    source_status = {source: state.get("source_status", {}).get(source, FAILED) for source in SOURCES}
+    comparison = ComparisonResult.from_flights(state["parsed_query"], all_flights, sources_checked, source_status)
+    cut_off = {source: status for source, status in source_status.items() if status in (PARTIAL, TIMED_OUT)}
+    if cut_off:
+        print(f"[COMPARE] ⏱️ Deadline cut off: {cut_off}")
     
     return {
         "all_flights": all_flights,
@@ -190,38 +258,103 @@ def compare_flights_node(state: AgentState) -> Dict[str, Any]:
     }
 
 
+# ============= ROUTING =============
+
+def route_after_parse(state: AgentState) -> str:
+    return "check_cache" if state.get("parsed_query") else "parse_failed"
+
+
+def route_next_source(state: AgentState) -> str:
+    """Next stale source's scrape node, or compare once none is left"""
+    pending = state.get("pending_sources")
+    return f"scrape_{pending[0]}" if pending else "compare_flights"
+
+
 # ============= GRAPH CONSTRUCTION =============
 
 def create_flight_agent() -> StateGraph:
     """
     Build the LangGraph workflow
+
+        parse_intent ─┬─ (parse failed) ──> parse_failed ──> END
+                      └─> check_cache ──> scrape_<source> for each stale source ──> compare_flights ──> END
     """
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(AgentState)
     
     # Add nodes
     workflow.add_node("parse_intent", parse_intent_node)
-    workflow.add_node("scrape_all", scrape_all_node)
+    workflow.add_node("parse_failed", parse_failed_node)
+    workflow.add_node("check_cache", check_cache_node)
+    for source in SOURCES:
+        workflow.add_node(f"scrape_{source}", _make_scrape_node(source))
     workflow.add_node("compare_flights", compare_flights_node)
     
     # Define edges
     workflow.set_entry_point("parse_intent")
-    workflow.add_edge("parse_intent", "scrape_all")
-    workflow.add_edge("scrape_all", "compare_flights")
+    workflow.add_conditional_edges("parse_intent", route_after_parse, ["check_cache", "parse_failed"])
+    next_nodes = [f"scrape_{source}" for source in SOURCES] + ["compare_flights"]
+    workflow.add_conditional_edges("check_cache", route_next_source, next_nodes)
+    for source in SOURCES:
+        workflow.add_conditional_edges(f"scrape_{source}", route_next_source, next_nodes)
+    workflow.add_edge("parse_failed", END)
     workflow.add_edge("compare_flights", END)
     
     return workflow.compile()
 
 
+_AGENT = None
+
+
+def get_flight_agent():
+    """Compiled graph, built once per process"""
+    global _AGENT
+    if _AGENT is None:
+        _AGENT = create_flight_agent()
+    return _AGENT
+
+
 # ============= CONVENIENCE FUNCTION =============
 
-async def run_flight_search(user_query: str) -> ComparisonResult:
+async def run_flight_search(user_query: str, warm_up: bool = True,
+                            filters: Optional[Dict[str, Any]] = None,
+                            budget: Optional[float] = None,
+                            search_id: Optional[str] = None,
+                            tenant: str = "default",
+                            priority: str = INTERACTIVE) -> ComparisonResult:
     """
     Main entry point for running flight search
+
+    `filters` sets FlightQuery's optional filter fields (airlines, max_stops, depart_after,
+    depart_before, max_price) on the parsed query.
+
+    `budget` (seconds) bounds the whole search: sources still running at their share of the
+    deadline are cancelled and the comparison uses what had arrived by then; the result's
+    source_status records which sources were partial or timed out.
+
+    With warm_up=True the browsers are launched and each site's origin is
+    preloaded while the LLM parses the query, hiding browser startup time.
+
+    With a `search_id` the state is checkpointed after every node (tools/checkpoint.py), and a
+    search already checkpointed under that ID resumes from its last completed step: the parsed
+    query and finished sources are reused, only the rest is scraped. `user_query` and `filters`
+    are then taken from the checkpoint; `budget` applies to the resumed run.
+
+    Searches are admitted by the process's scheduler (tools/scheduler.py) under `tenant` and
+    `priority` (interactive / api / background); a search it turns away raises
+    AdmissionRejected. Time spent queued counts against `budget`.
     """
-    agent = create_flight_agent()
+    agent = get_flight_agent()
+    checkpoints = get_checkpoint_store() if search_id else None
+    resumed = checkpoints.load(search_id) if checkpoints else None
     
     initial_state = {
         "user_query": user_query,
+        "filters": filters or {},
+        "deadline": time.time() + budget if budget else None,
+        "source_status": {},
+        "pending_sources": [],
         "parsed_query": None,
         "mmt_result": None,
         "cleartrip_result": None,
@@ -230,7 +363,35 @@ async def run_flight_search(user_query: str) -> ComparisonResult:
         "comparison_result": None,
         "errors": []
     }
+    if resumed:
+        finished = [source for source, status in resumed["source_status"].items() if status in FINISHED]
+        print(f"[CHECKPOINT] ⏯️ Resuming {search_id}: {', '.join(finished) or 'no sources'} already done")
+        initial_state = {**resumed, "deadline": time.time() + budget if budget else None, "comparison_result": None,
+                         "errors": []}
     
-    final_state = await agent.ainvoke(initial_state)
+    # Warm sessions are live browsers in this process - no use to worker processes
+    warm_up = warm_up and not get_worker_pool()
+    # Browsers this search can hold at once: one per warm session, else one (sources run in turn)
+    slots = len(SESSION_OPENERS) if warm_up else 1
+    async with get_scheduler().admit(tenant, priority, slots, max_wait=budget):
+        warmup = SessionWarmup(SESSION_OPENERS) if warm_up else None
+        if warmup:
+            warmup.start()
+        
+        config = {"configurable": {"warmup": warmup}}
+        try:
+            if checkpoints:
+                # Node by node, so every completed step is saved before the next one starts
+                final_state = dict(initial_state)
+                async for step in agent.astream(initial_state, config=config, stream_mode="updates"):
+                    for node, update in step.items():
+                        final_state.update(update or {})
+                        checkpoints.save(search_id, final_state, node, done=node in ("compare_flights", "parse_failed"))
+            else:
+                final_state = await agent.ainvoke(initial_state, config=config)
+        finally:
+            # Close any warm session a scraper didn't pick up
+            if warmup:
+                await warmup.cancel()
     
     return final_state["comparison_result"]
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import List, Optional, TypedDict
+from typing import Any, Dict, List, Optional
+from typing_extensions import TypedDict
 from models.schema import FlightQuery, Flight, ScraperResult, ComparisonResult
 
 
@@ -10,6 +11,8 @@ class AgentState(TypedDict):
     """
     # Input
     user_query: str
+    filters: Dict[str, Any]
+    deadline: Optional[float]        # wall-clock deadline from the caller's latency budget
     
     # Parsed query
     parsed_query: Optional[FlightQuery]
@@ -19,6 +22,10 @@ class AgentState(TypedDict):
     cleartrip_result: Optional[ScraperResult]
     emt_result: Optional[ScraperResult]
     
+    # complete / partial / timed_out / failed / cached per source
+    source_status: Dict[str, str]
+    pending_sources: List[str]       # stale sources still to scrape, in order
+    
     # Aggregated flights
     all_flights: List[Flight]
     
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Ingestion throughput benchmark
+- Per-record path: one Flight(...) per card, then ScraperResult(...) and ComparisonResult(...)
+- Bulk path: Flight.from_cards per batch, then ScraperResult.from_flights / ComparisonResult.from_flights
+- Reports flights/sec for both, best of several runs
+
+Run: python benchmark_ingest.py [--cards 50000] [--json ingest_benchmark.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import ComparisonResult, Flight, FlightQuery, ScraperResult
+
+URL = "https://www.makemytrip.com/flight/search"
+QUERY = FlightQuery(from_city="DEL", to_city="MAA", departure_date=date(2026, 3, 12), raw_query="benchmark")
+
+
+def fake_cards(n: int) -> list:
+    """Card dicts shaped like the extraction scripts' output"""
+    return [{
+        "airline": "IndiGo", "flightCode": f"6E {1000 + i % 9000}", "price": 4000 + i % 5000,
+        "departureTime": "06:15", "arrivalTime": "08:45", "departureCity": "New Delhi",
+        "arrivalCity": "Chennai", "duration": "02 h 30 m", "stops": i % 2,
+    } for i in range(n)]
+
+
+def per_record(cards: list) -> ComparisonResult:
+    flights = []
+    for data in cards:
+        flights.append(Flight(
+            airline=data['airline'],
+            price=float(data['price']),
+            departure_time=data['departureTime'],
+            arrival_time=data['arrivalTime'],
+            duration=data['duration'],
+            stops=data['stops'],
+            source="makemytrip",
+            booking_url=URL
+        ))
+    result = ScraperResult(success=True, source="makemytrip", flights=flights)
+    return ComparisonResult(query=QUERY, all_flights=list(result.flights),
+                            cheapest_flight=min(result.flights, key=lambda f: f.price),
+                            total_results=len(result.flights), sources_checked=["makemytrip"])
+
+
+def bulk(cards: list) -> ComparisonResult:
+    result = ScraperResult.from_flights("makemytrip", Flight.from_cards(cards, "makemytrip", URL))
+    return ComparisonResult.from_flights(QUERY, list(result.flights), ["makemytrip"])
+
+
+def throughput(ingest, cards: list, runs: int) -> float:
+    """Best-of-`runs` flights/sec through the whole card -> ComparisonResult path"""
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        ingest(cards)
+        best = min(best, time.perf_counter() - started)
+    return len(cards) / best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Flight ingestion throughput benchmark")
+    parser.add_argument("--cards", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("INGESTION BENCHMARK")
+    print("=" * 80)
+
+    cards = fake_cards(args.cards)
+    # Both paths must produce the same flights
+    slow, fast = per_record(cards[:100]), bulk(cards[:100])
+    assert [f.model_dump(exclude={"scraped_at"}) for f in slow.all_flights] == \
+           [f.model_dump(exclude={"scraped_at"}) for f in fast.all_flights]
+
+    report = {
+        "cards": args.cards,
+        "per_record_per_sec": round(throughput(per_record, cards, args.runs)),
+        "bulk_per_sec": round(throughput(bulk, cards, args.runs)),
+    }
+    report["speedup"] = round(report["bulk_per_sec"] / report["per_record_per_sec"], 2)
+    print(f"\n{args.cards:,} cards -> ComparisonResult (best of {args.runs}):")
+    print(f"    per-record: {report['per_record_per_sec']:>12,} flights/sec")
+    print(f"    bulk:       {report['bulk_per_sec']:>12,} flights/sec")
+    print(f"    speedup:    {report['speedup']:>12.2f}x")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark
+- Import cost of each entry point, measured in a fresh interpreter with -X importtime
+- Per-import breakdown (the entry point's heaviest direct imports)
+- Checks the CLI entry point against a startup budget
+
+Run: python benchmark_startup.py [--budget-ms 300] [--json startup_benchmark.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# What a short-lived process pays before doing any work
+ENTRY_POINTS = ["main", "agent.graph", "tools.scrapers", "tools.llm_parser", "tools.result_store"]
+# Heavy dependencies that should only load once a code path needs them
+DEFERRED = ["langgraph.graph", "playwright.async_api", "ollama", "pyarrow.dataset"]
+
+STARTUP_BUDGET_MS = float(os.environ.get("FLIGHT_STARTUP_BUDGET_MS", "300"))
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(module: str) -> dict:
+    """Cumulative import time of `module` plus its direct imports, in ms"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"module": module, "error": proc.stderr.strip().splitlines()[-1]}
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append((len(match.group(3)) // 2, match.group(4), int(match.group(2)) / 1000))
+    # -X importtime prints children before their parent: the entry point is the last level-0 row
+    # and its direct imports are the level-1 rows between it and the previous level-0 row
+    end = max(i for i, (level, name, _) in enumerate(rows) if level == 0 and name == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    total = rows[end][2]
+    direct = sorted(((name, ms) for level, name, ms in rows[start:end] if level == 1), key=lambda r: -r[1])
+    loaded = {name for _, name, _ in rows}
+    return {
+        "module": module,
+        "total_ms": round(total, 1),
+        "breakdown": [{"import": name, "ms": round(ms, 1)} for name, ms in direct[:8]],
+        "deferred_loaded": [name for name in DEFERRED if name in loaded],
+    }
+
+
+def wall_time(argv: list, runs: int = 5) -> float:
+    """Median wall time of a full process run, in ms"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=ROOT, capture_output=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("STARTUP BENCHMARK")
+    print("=" * 80)
+
+    report = {"entry_points": [], "deferred": []}
+    for module in ENTRY_POINTS:
+        profile = import_profile(module)
+        report["entry_points"].append(profile)
+        if "error" in profile:
+            print(f"\n{module}: ❌ {profile['error']}")
+            continue
+        print(f"\n{module}: {profile['total_ms']:.1f} ms")
+        for row in profile["breakdown"]:
+            print(f"    {row['ms']:8.1f} ms  {row['import']}")
+        if profile["deferred_loaded"]:
+            print(f"    ⚠️ loads deferred dependencies: {', '.join(profile['deferred_loaded'])}")
+
+    print("\nDeferred dependencies (paid only by code paths that need them):")
+    for module in DEFERRED:
+        profile = import_profile(module)
+        report["deferred"].append(profile)
+        print(f"    {profile.get('total_ms', float('nan')):8.1f} ms  {module}")
+
+    report["cli_help_ms"] = wall_time(["main.py", "--help"])
+    report["budget_ms"] = args.budget_ms
+    main_ms = report["entry_points"][0].get("total_ms", float("inf"))
+    report["within_budget"] = main_ms <= args.budget_ms
+    print(f"\n`python main.py --help` wall time: {report['cli_help_ms']:.1f} ms")
+    print(f"Import budget for main: {main_ms:.1f} / {args.budget_ms:.0f} ms "
+          f"{'✓' if report['within_budget'] else '❌ OVER BUDGET'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to: {args.json}")
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,93 @@
+import argparse
 import asyncio
+import contextlib
+import re
 import sys
-from agent.graph import run_flight_search
-from models.schema import ComparisonResult
-import json
+from typing import TYPE_CHECKING
 
-async def main():
+if TYPE_CHECKING:
+    from models.schema import ComparisonResult
+
+
+def _hhmm(value: str) -> str:
+    if not re.match(r"^\d{2}:\d{2}$", value) or int(value[:2]) > 23 or int(value[3:]) > 59:
+        raise argparse.ArgumentTypeError(f"expected HH:MM (00:00-23:59), got '{value}'")
+    return value
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got '{value}'")
+    if not number > 0 or number == float("inf"):
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Flight price comparison agent")
+    parser.add_argument("query", nargs="*", help='e.g. "Flight from delhi to chennai on 12 March"')
+    parser.add_argument("--export", metavar="PATH",
+                        help="Stream all flights to PATH ('-' for stdout; the log then goes to stderr)")
+    parser.add_argument("--format", choices=["ndjson", "csv", "parquet"],
+                        help="Export format (default: from the file extension)")
+    parser.add_argument("--compress", choices=["gzip", "zstd", "snappy", "none"],
+                        help="gzip for ndjson/csv, a Parquet codec for parquet (default: .gz suffix / zstd)")
+    parser.add_argument("--budget", type=float, metavar="SECONDS",
+                        help="Latency budget: return the best results found within this many seconds")
+    parser.add_argument("--search-id", metavar="ID",
+                        help="Checkpoint the search under ID; rerunning with the same ID resumes it")
+    filters = parser.add_argument_group("filters (applied inside each scraper)")
+    filters.add_argument("--airline", dest="airlines", action="append", metavar="NAME",
+                         help="Only this airline (repeat for several)")
+    filters.add_argument("--max-stops", type=_non_negative_int, metavar="N")
+    filters.add_argument("--depart-after", type=_hhmm, metavar="HH:MM")
+    filters.add_argument("--depart-before", type=_hhmm, metavar="HH:MM")
+    filters.add_argument("--max-price", type=_positive_float, metavar="INR")
+    args = parser.parse_args(argv)
+    if args.export == "-" and not args.format:
+        parser.error("--export - needs --format")
+    if args.export:
+        # Checked before the search runs, not when its results are written
+        from tools.export import infer_format
+        try:
+            fmt = args.format or infer_format(args.export)
+        except ValueError:
+            parser.error(f"can't tell the export format from '{args.export}' - pass --format")
+        if fmt != "parquet" and args.compress in ("zstd", "snappy"):
+            parser.error(f"--compress {args.compress} is a Parquet codec; {fmt} takes gzip or none")
+    return args
+
+
+def export_results(result: "ComparisonResult", args: argparse.Namespace) -> None:
+    from tools.export import export_flights
+    # The log was moved to stderr for stdout exports - write the data to the real stdout
+    target = contextlib.redirect_stdout(sys.__stdout__) if args.export == "-" else contextlib.nullcontext()
+    with target:
+        count = export_flights(result.all_flights, args.export, fmt=args.format, compression=args.compress)
+    print(f"💾 Exported {count} flights to: {'stdout' if args.export == '-' else args.export}")
+
+
+async def main(args: argparse.Namespace):
     """
     Main entry point for flight search agent
     """
     print("DEBUG: main() function started")
     
     # Get query from command line or use default
-    if len(sys.argv) > 1:
-        user_query = " ".join(sys.argv[1:])
+    if args.query:
+        user_query = " ".join(args.query)
     else:
         user_query = "Flight from delhi to chennai on 12 March"
     
@@ -22,11 +97,21 @@ async def main():
     print(f"Query: {user_query}\n")
     
     try:
+        # Imported here so --help and argument errors don't load the agent stack
+        from agent.graph import run_flight_search
+        from models.schema import FILTER_FIELDS
+        
         print("DEBUG: About to call run_flight_search()")
         # Run the agent
-        result: ComparisonResult = await run_flight_search(user_query)
+        filters = {name: getattr(args, name) for name in FILTER_FIELDS if getattr(args, name) is not None}
+        result: ComparisonResult = await run_flight_search(user_query, filters=filters, budget=args.budget,
+                                                           search_id=args.search_id)
         print("DEBUG: run_flight_search() completed")
         
+        if result.query is None:
+            print(f"\n❌ Could not understand the query: {result.error}")
+            sys.exit(1)
+        
         # Display results
         print("\n" + "=" * 80)
         print("RESULTS")
@@ -38,6 +123,10 @@ async def main():
         print(f"  Year: {result.query.departure_date.year}")  # Show year explicitly
         
         print(f"\nSources Checked: {', '.join(result.sources_checked)}")
+        cut_off = [f"{source} ({status})" for source, status in result.source_status.items()
+                   if status in ("partial", "timed_out")]
+        if cut_off:
+            print(f"Cut Off by Budget: {', '.join(cut_off)}")
         print(f"Total Flights Found: {result.total_results}")
         
         if result.cheapest_flight:
@@ -69,24 +158,39 @@ async def main():
             for i, flight in enumerate(sorted_flights[:10], 1):  # Show top 10
                 print(f"{i}. {flight.airline:20} ₹{flight.price:8,.2f} ({flight.source})")
         
-        # Export to JSON
+        # Export to JSON (serialized straight from the model, no intermediate dict tree)
         output_file = "flight_results.json"
         with open(output_file, 'w') as f:
-            json.dump(result.model_dump(), f, indent=2, default=str)
+            f.write(result.model_dump_json(indent=2))
         print(f"\n💾 Full results saved to: {output_file}")
         
+        if args.export:
+            export_results(result, args)
+        
+        from tools.scrapers.browser_manager import REUSE_BROWSERS, get_browser_manager
+        if REUSE_BROWSERS:
+            await get_browser_manager().shutdown()
+        
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        from tools.llm_parser import close_async_client
+        await close_async_client()
 
 if __name__ == "__main__":
-    print("DEBUG: Script started, about to run asyncio.run(main())")
-    try:
-        asyncio.run(main())
-        print("DEBUG: asyncio.run(main()) completed successfully")
-    except Exception as e:
-        print(f"DEBUG: Exception in asyncio.run(): {e}")
-        import traceback
-        traceback.print_exc()
\ No newline at end of file
+    args = parse_args()
+    # Exporting to stdout: keep stdout clean for the data and send the log to stderr
+    with contextlib.redirect_stdout(sys.stderr) if args.export == "-" else contextlib.nullcontext():
+        from tools.llm_parser import start_preload
+        start_preload()   # the model loads while the agent stack is imported
+        print("DEBUG: Script started, about to run asyncio.run(main())")
+        try:
+            asyncio.run(main(args))
+            print("DEBUG: asyncio.run(main()) completed successfully")
+        except Exception as e:
+            print(f"DEBUG: Exception in asyncio.run(): {e}")
+            import traceback
+            traceback.print_exc()
\ No newline at end of file
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List
+import re
+from pydantic import BaseModel, Field, HttpUrl, TypeAdapter
+from typing import Any, Dict, Iterable, Optional, List
+from typing_extensions import Annotated, NotRequired, TypedDict
 from datetime import datetime, date
 
 
@@ -10,6 +12,37 @@ class FlightQuery(BaseModel):
     departure_date: date = Field(..., description="Date of travel in YYYY-MM-DD format")
     raw_query: str = Field(..., description="Original user query")
 
+    # Optional filters - pushed down into each scraper (see tools/scrapers/filters.py)
+    airlines: Optional[List[str]] = Field(None, description="Only these airlines (case-insensitive)")
+    max_stops: Optional[int] = Field(None, ge=0, description="At most this many stops")
+    depart_after: Optional[str] = Field(None, pattern=r"^\d{2}:\d{2}$", description="Earliest departure (HH:MM)")
+    depart_before: Optional[str] = Field(None, pattern=r"^\d{2}:\d{2}$", description="Latest departure (HH:MM)")
+    max_price: Optional[float] = Field(None, gt=0, description="Price ceiling in INR")
+
+    def filters(self) -> Dict[str, Any]:
+        """The filters that are set, keyed by field name (empty dict = unfiltered search)"""
+        return {name: getattr(self, name) for name in FILTER_FIELDS if getattr(self, name) is not None}
+
+    def matches(self, flight: "Flight") -> bool:
+        """Python twin of the in-page filter, for results that didn't go through a filtered scrape"""
+        if self.airlines and flight.airline.lower() not in {a.lower() for a in self.airlines}:
+            return False
+        if self.max_stops is not None and (flight.stops is None or flight.stops > self.max_stops):
+            return False
+        if self.depart_after or self.depart_before:
+            departs = flight.departure_time or ""
+            if not re.match(r"^\d{2}:\d{2}$", departs):
+                return False
+            if (self.depart_after and departs < self.depart_after) or \
+                    (self.depart_before and departs > self.depart_before):
+                return False
+        return self.max_price is None or flight.price <= self.max_price
+
+
+FILTER_FIELDS = ("airlines", "max_stops", "depart_after", "depart_before", "max_price")
+# What the LLM extracts from the query text; filters only ever come from the caller
+TRIP_FIELDS = ("from_city", "to_city", "departure_date")
+
 
 class Flight(BaseModel):
     """Normalized flight information from any scraper"""
@@ -28,6 +61,50 @@ class Flight(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+    @classmethod
+    def from_cards(cls, cards: Iterable[dict], source: str, booking_url: str,
+                   scraped_at: Optional[datetime] = None) -> List["Flight"]:
+        """
+        Bulk ingestion: validate a whole batch of raw card dicts in one pass
+
+        The batch goes through pydantic-core once (same coercion and errors as Flight(...)),
+        then each Flight is built from the validated values with model_construct, without
+        running validation again. Every flight in the batch shares one scraped_at.
+        """
+        scraped_at = scraped_at or datetime.now()
+        rows = _card_batch().validate_python(cards if isinstance(cards, list) else list(cards))
+        return [cls.model_construct(
+            airline=row["airline"],
+            price=row["price"],
+            departure_time=row.get("departure_time"),
+            arrival_time=row.get("arrival_time"),
+            duration=row.get("duration"),
+            stops=row.get("stops"),
+            booking_url=booking_url,
+            source=source,
+            scraped_at=scraped_at,
+        ) for row in rows]
+
+
+class FlightCard(TypedDict):
+    """A flight card as the scrapers' extraction scripts return it (camelCase keys, extras ignored)"""
+    airline: str
+    price: float
+    departure_time: NotRequired[Annotated[Optional[str], Field(validation_alias="departureTime")]]
+    arrival_time: NotRequired[Annotated[Optional[str], Field(validation_alias="arrivalTime")]]
+    duration: NotRequired[Optional[str]]
+    stops: NotRequired[Optional[int]]
+
+
+_CARD_BATCH: Optional[TypeAdapter] = None
+
+
+def _card_batch() -> TypeAdapter:
+    global _CARD_BATCH
+    if _CARD_BATCH is None:
+        _CARD_BATCH = TypeAdapter(List[FlightCard])
+    return _CARD_BATCH
+
 
 class ScraperResult(BaseModel):
     """Result from a single scraper"""
@@ -36,17 +113,34 @@ class ScraperResult(BaseModel):
     success: bool
     error: Optional[str] = None
 
+    @classmethod
+    def from_flights(cls, source: str, flights: List[Flight]) -> "ScraperResult":
+        """Successful result around flights that are already valid - no re-validation of the list"""
+        return cls.model_construct(source=source, flights=flights, success=True, error=None)
+
 
 class ComparisonResult(BaseModel):
     """Final comparison output"""
-    query: FlightQuery
+    query: Optional[FlightQuery]         # None when the query couldn't be parsed (see error)
     all_flights: List[Flight]
     cheapest_flight: Optional[Flight]
     total_results: int
     sources_checked: List[str]
     timestamp: datetime = Field(default_factory=datetime.now)
+    # complete / partial / timed_out / failed / cached per source (see tools/deadline.py)
+    source_status: Dict[str, str] = Field(default_factory=dict)
+    error: Optional[str] = None
 
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def from_flights(cls, query: FlightQuery, flights: List[Flight], sources_checked: List[str],
+                     source_status: Optional[Dict[str, str]] = None) -> "ComparisonResult":
+        """Comparison over flights that are already valid - no re-validation of the list"""
+        cheapest = min(flights, key=lambda f: f.price) if flights else None
+        return cls.model_construct(query=query, all_flights=flights, cheapest_flight=cheapest,
+                                   total_results=len(flights), sources_checked=sources_checked,
+                                   timestamp=datetime.now(), source_status=source_status or {})
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Offline test of the static asset cache (fake routes and origin server, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.scrapers.asset_cache import STATIC_ASSET_URL, AssetCache
+
+
+class _Request:
+    def __init__(self, url, resource_type="script", method="GET", headers=None):
+        self.url, self.resource_type, self.method = url, resource_type, method
+        self.headers = {"user-agent": "test", **(headers or {})}
+
+
+class _Response:
+    def __init__(self, status, headers, body=b""):
+        self.status, self.headers, self._body = status, headers, body
+
+    async def body(self):
+        return self._body
+
+
+class _Origin:
+    """Fake server: url -> (body, headers); answers conditional requests with 304"""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+
+    def fetch(self, url, headers):
+        self.requests.append(url)
+        body, response_headers = self.files[url]
+        if headers.get("if-none-match") and headers["if-none-match"] == response_headers.get("ETag"):
+            return _Response(304, response_headers)
+        return _Response(200, {**response_headers, "Content-Encoding": "gzip"}, body)
+
+
+class _Route:
+    def __init__(self, origin):
+        self.origin = origin
+        self.served = None
+
+    async def fetch(self, headers=None):
+        return self.origin.fetch(self.request.url, headers or {})
+
+    async def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.served = ("cache" if response is None else "network", body)
+
+    async def fallback(self):
+        self.served = ("browser", None)
+
+
+def _load(cache, origin, url, resource_type="script", headers=None):
+    route = _Route(origin)
+    route.request = _Request(url, resource_type, headers=headers)
+    asyncio.run(cache.handle(route, route.request))
+    return route.served
+
+
+def test_fresh_assets_served_locally():
+    """max-age assets come from the store; identical bodies are stored once"""
+    print("=" * 80)
+    print("TESTING STATIC ASSET CACHE")
+    print("=" * 80)
+
+    origin = _Origin()
+    bundle = b"console.log('app');" * 100
+    origin.files["https://cdn.example.com/app.js?v=1"] = (bundle, {"Cache-Control": "public, max-age=31536000, immutable"})
+    origin.files["https://static.example.com/app.js"] = (bundle, {"Cache-Control": "max-age=600"})
+    origin.files["https://www.example.com/flights"] = (b"<html>", {})
+    origin.files["https://cdn.example.com/user.js"] = (b"secret", {"Cache-Control": "private, max-age=600"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AssetCache(tmp)
+        assert _load(cache, origin, "https://cdn.example.com/app.js?v=1") == ("network", bundle)
+        # A new browser context (or another process) on the same store
+        second = AssetCache(tmp)
+        assert _load(second, origin, "https://cdn.example.com/app.js?v=1") == ("cache", bundle)
+        assert origin.requests.count("https://cdn.example.com/app.js?v=1") == 1
+        assert "content-encoding" not in second.lookup("https://cdn.example.com/app.js?v=1")["headers"]
+
+        _load(cache, origin, "https://static.example.com/app.js")
+        assert cache.size() == len(bundle)
+
+        assert _load(cache, origin, "https://www.example.com/flights", "document") == ("browser", None)
+        _load(cache, origin, "https://cdn.example.com/user.js")
+        _load(cache, origin, "https://cdn.example.com/user.js")
+        assert origin.requests.count("https://cdn.example.com/user.js") == 2
+        assert second.report()["hits"] == 1 and cache.report()["passed"] == 1
+        cache.close()
+        second.close()
+    print("  ✓ Fresh assets served from the shared store, identical bodies stored once")
+
+
+def test_stale_assets_revalidated():
+    """no-cache assets are revalidated with their ETag; a 304 reuses the stored body"""
+    origin = _Origin()
+    url = "https://www.example.com/styles.css"
+    origin.files[url] = (b"body{}", {"Cache-Control": "no-cache", "ETag": '"v1"'})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AssetCache(tmp)
+        _load(cache, origin, url, "stylesheet")
+        assert _load(cache, origin, url, "stylesheet") == ("cache", b"body{}")
+        assert cache.stats["revalidated"] == 1 and len(origin.requests) == 2
+
+        origin.files[url] = (b"body{color:red}", {"Cache-Control": "no-cache", "ETag": '"v2"'})
+        assert _load(cache, origin, url, "stylesheet") == ("network", b"body{color:red}")
+        assert cache.lookup(url)["etag"] == '"v2"'
+        cache.close()
+    print("  ✓ Stale assets revalidated, changed ones replaced")
+
+
+def test_lru_eviction_by_size():
+    """Past the size limit the least recently used bodies go first"""
+    origin = _Origin()
+    for name in "abc":
+        origin.files[f"https://cdn.example.com/{name}.woff2"] = (name.encode() * 400, {"Cache-Control": "max-age=600"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AssetCache(tmp, max_mb=1000 / 1024 / 1024)
+        _load(cache, origin, "https://cdn.example.com/a.woff2", "font")
+        _load(cache, origin, "https://cdn.example.com/b.woff2", "font")
+        _load(cache, origin, "https://cdn.example.com/a.woff2", "font")     # a is now more recent than b
+        _load(cache, origin, "https://cdn.example.com/c.woff2", "font")
+        assert cache.lookup("https://cdn.example.com/b.woff2") is None
+        assert cache.lookup("https://cdn.example.com/a.woff2") and cache.lookup("https://cdn.example.com/c.woff2")
+        assert cache.size() == 800 and cache.stats["evicted"] == 1
+        assert sum(len(files) for _, _, files in os.walk(os.path.join(tmp, "blobs"))) == 2
+        cache.close()
+    print("  ✓ Least recently used asset evicted once over the size limit")
+
+
+def test_vary_and_static_routes():
+    """Only static-asset URLs are routed; Vary'd request headers are part of the key"""
+    assert STATIC_ASSET_URL.search("https://cdn.example.com/app.js?v=3")
+    assert STATIC_ASSET_URL.search("https://cdn.example.com/fonts/inter.WOFF2")
+    for url in ("https://www.example.com/flights", "https://api.example.com/search?format=json",
+                "https://www.example.com/jsonp"):
+        assert not STATIC_ASSET_URL.search(url)
+
+    origin = _Origin()
+    url = "https://cdn.example.com/sprite.svg"
+    origin.files[url] = (b"<svg/>", {"Cache-Control": "max-age=600", "Vary": "Accept, Accept-Encoding"})
+    origin.files["https://cdn.example.com/any.png"] = (b"png", {"Cache-Control": "max-age=600", "Vary": "*"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AssetCache(tmp)
+        svg = {"accept": "image/svg+xml"}
+        assert _load(cache, origin, url, "image", svg)[0] == "network"
+        assert _load(cache, origin, url, "image", {**svg, "accept-encoding": "br"})[0] == "cache"
+        assert _load(cache, origin, url, "image", {"accept": "image/webp"})[0] == "network"
+        assert cache.lookup(url, svg) and cache.lookup(url, {"accept": "image/webp"}) and not cache.lookup(url)
+        _load(cache, origin, "https://cdn.example.com/any.png", "image")
+        assert _load(cache, origin, "https://cdn.example.com/any.png", "image")[0] == "network"
+        cache.close()
+    print("  ✓ Only asset URLs routed, responses keyed by their Vary headers")
+
+
+if __name__ == "__main__":
+    test_fresh_assets_served_locally()
+    test_stale_assets_revalidated()
+    test_lru_eviction_by_size()
+    test_vary_and_static_routes()
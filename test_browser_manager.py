@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline test of the browser lifecycle manager (fake browser objects, no Chromium needed)
+"""
+import asyncio
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.scrapers import processes, supervisor
+from tools.scrapers.browser_manager import BrowserManager
+from tools.scrapers.session import BrowserSession
+from tools.scrapers.supervisor import BrowserSupervisor
+
+
+class _FakePage:
+    def __init__(self):
+        self.main_frame = object()
+        self.closed = False
+        self._handlers = []
+
+    def on(self, event, handler):
+        self._handlers.append(handler)
+
+    async def goto(self, url):
+        for handler in self._handlers:
+            handler(self.main_frame)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.routes = []
+
+    async def new_page(self):
+        return _FakePage()
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_marked_process_tree():
+    """Marked processes are found, measured and killed"""
+    print("=" * 80)
+    print("TESTING BROWSER PROCESS INSPECTION")
+    print("=" * 80)
+
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", processes.marker_arg("test123")])
+    try:
+        time.sleep(0.2)
+        procs = processes.snapshot()
+        roots = processes.marked(procs, "test123")
+        assert roots == [proc.pid]
+        assert processes.tree_rss_mb(procs, roots) > 0
+        assert processes.kill_tree(procs, roots) == 1
+        proc.wait(timeout=5)
+    finally:
+        proc.kill()
+    assert processes._parse_etime("1-02:03:04") == 93784
+    print("  ✓ Marked browser found by its flag and killed")
+
+
+def test_recycle_after_navigations_drains_first():
+    """A browser over its navigation budget stops taking work but closes only after in-flight pages finish"""
+    print("=" * 80)
+    print("TESTING BROWSER RECYCLING")
+    print("=" * 80)
+
+    launches = []
+
+    async def launch(session):
+        session.context = _FakeContext()
+        launches.append(session)
+
+    async def scenario():
+        manager = BrowserManager(max_navigations=2, max_rss_mb=10_000)
+        template = BrowserSession("fake", "FAKE", "https://example.com")
+
+        first = await manager.borrow(template, launch)
+        second = await manager.borrow(template, launch)
+        assert first.context is second.context and len(launches) == 1
+
+        await first.page.goto("https://example.com/a")
+        await second.page.goto("https://example.com/b")   # hits the budget -> draining
+
+        third = await manager.borrow(template, launch)      # goes to a fresh browser
+        assert len(launches) == 2 and third.context is not first.context
+
+        await first.close()
+        assert not first.managed.closed   # second page still in flight
+        await second.close()
+        assert first.managed.closed and second.page.closed
+        await third.close()
+
+        # Supervisor found the current browser past its max age: retired, closed since it is idle
+        assert await manager.retire(third.browser_id, "max_age") and third.managed.closed
+        assert not await manager.retire("unknown", "max_age")
+        fourth = await manager.borrow(template, launch)
+        assert len(launches) == 3
+        await fourth.close()
+
+        stats = manager.stats()
+        await manager.shutdown()
+        return stats
+
+    saved = supervisor._SUPERVISOR
+    with tempfile.TemporaryDirectory() as tmp:
+        # Launches register with the supervisor: keep the fakes out of the project's registry
+        supervisor._SUPERVISOR = BrowserSupervisor(os.path.join(tmp, "browsers.db"))
+        try:
+            stats = asyncio.run(scenario())
+        finally:
+            supervisor._SUPERVISOR.close()
+            supervisor._SUPERVISOR = saved
+    print(f"  Stats: {stats}")
+    assert stats["launched"] == 3 and stats["recycled"] == {"navigations": 1, "max_age": 1}
+    assert len(stats["browsers"]) == 1 and not stats["browsers"][0]["draining"]
+    print("  ✓ Browser recycled after its navigation budget without dropping in-flight pages")
+
+
+if __name__ == "__main__":
+    test_marked_process_tree()
+    test_recycle_after_navigations_drains_first()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Offline test of bulk Flight ingestion (no browser needed)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import ValidationError
+
+from benchmark_ingest import QUERY, URL, fake_cards, per_record
+from models.schema import ComparisonResult, Flight, ScraperResult
+
+
+def test_bulk_matches_per_record():
+    """from_cards builds the same flights as Flight(...) per card, with one shared timestamp"""
+    print("=" * 80)
+    print("TESTING BULK INGESTION")
+    print("=" * 80)
+
+    cards = fake_cards(200)
+    flights = Flight.from_cards(cards, "makemytrip", URL)
+    expected = per_record(cards).all_flights
+    assert [f.model_dump(exclude={"scraped_at"}) for f in flights] == \
+           [f.model_dump(exclude={"scraped_at"}) for f in expected]
+    assert isinstance(flights[0].price, float) and len({f.scraped_at for f in flights}) == 1
+    assert Flight.model_validate_json(flights[0].model_dump_json()) == flights[0]
+    print("  ✓ Same flights as the per-record path, one scraped_at per batch")
+
+    bad = fake_cards(3)
+    bad[1]["price"] = "sold out"
+    try:
+        Flight.from_cards(bad, "makemytrip", URL)
+    except ValidationError as e:
+        assert e.errors()[0]["loc"] == (1, "price")
+    else:
+        raise AssertionError("invalid price accepted")
+    print("  ✓ Invalid cards fail validation with their batch index")
+
+
+def test_containers_skip_revalidation():
+    """ScraperResult/ComparisonResult built from valid flights keep the same objects"""
+    flights = Flight.from_cards(fake_cards(10), "makemytrip", URL)
+    result = ScraperResult.from_flights("makemytrip", flights)
+    comparison = ComparisonResult.from_flights(QUERY, result.flights, ["makemytrip"])
+    assert result.success and result.flights is flights
+    assert comparison.all_flights[0] is flights[0] and comparison.total_results == 10
+    assert comparison.cheapest_flight.price == 4000.0
+    assert ComparisonResult.model_validate_json(comparison.model_dump_json()).total_results == 10
+    assert ComparisonResult.from_flights(QUERY, [], []).cheapest_flight is None
+    print("  ✓ Containers wrap the validated flights without copying or re-validating")
+
+
+if __name__ == "__main__":
+    test_bulk_matches_per_record()
+    test_containers_skip_revalidation()
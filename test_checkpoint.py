@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline test of search checkpoints and resume (fake parser and scrapers, no browser or LLM needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agent.graph as graph
+from models.schema import ScraperResult
+from test_graph_routing import QUERY, fake_search
+from tools import checkpoint
+
+
+class _Crash(BaseException):
+    """Stands in for the process dying mid-search (not caught by the scrape nodes)"""
+
+
+def test_resume_skips_finished_steps():
+    """A search that died after two sources resumes with only the third one"""
+    print("=" * 80)
+    print("TESTING SEARCH CHECKPOINTS")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp, fake_search(tmp, QUERY) as scraped:
+        saved_store = checkpoint._STORE
+        checkpoint._STORE = checkpoint.CheckpointStore(os.path.join(tmp, "checkpoints.db"))
+        parses = []
+        parse = graph.parse_query_with_llama_async
+        graph.parse_query_with_llama_async = lambda user_query: parses.append(user_query) or parse(user_query)
+        emt = graph.SCRAPERS["easemytrip"]
+
+        async def crash(query, session=None):
+            raise _Crash()
+
+        try:
+            graph.SCRAPERS["easemytrip"] = crash
+            try:
+                asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False, search_id="sweep-1"))
+                raise AssertionError("expected the search to die")
+            except _Crash:
+                pass
+            info = checkpoint._STORE.info("sweep-1")
+            assert info["node"] == "scrape_cleartrip" and not info["done"]
+            assert [s["search_id"] for s in checkpoint._STORE.unfinished()] == ["sweep-1"]
+            assert scraped == ["makemytrip", "cleartrip"] and len(parses) == 1
+            print("  ✓ State checkpointed after each source until the crash")
+
+            graph.SCRAPERS["easemytrip"] = emt
+            result = asyncio.run(graph.run_flight_search("ignored", warm_up=False, search_id="sweep-1"))
+            assert scraped == ["makemytrip", "cleartrip", "easemytrip"] and len(parses) == 1
+            assert set(result.source_status.values()) == {"complete"} and result.total_results == 3
+            assert checkpoint._STORE.info("sweep-1")["done"] and checkpoint._STORE.unfinished() == []
+            print("  ✓ Resumed without re-parsing or re-scraping finished sources")
+        finally:
+            checkpoint._STORE.close()
+            checkpoint._STORE = saved_store
+
+
+def test_failed_sources_retried_on_resume():
+    """Failed sources are scraped again; a finished search resumes straight to compare"""
+    with tempfile.TemporaryDirectory() as tmp, fake_search(tmp, QUERY) as scraped:
+        saved_store = checkpoint._STORE
+        checkpoint._STORE = checkpoint.CheckpointStore(os.path.join(tmp, "checkpoints.db"))
+        mmt = graph.SCRAPERS["makemytrip"]
+
+        async def blocked(query, session=None):
+            scraped.append("blocked")
+            return ScraperResult(source="makemytrip", success=False, error="Blocked", flights=[])
+
+        try:
+            graph.SCRAPERS["makemytrip"] = blocked
+            first = asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False, search_id="job-7"))
+            assert first.source_status["makemytrip"] == "failed"
+
+            graph.SCRAPERS["makemytrip"] = mmt
+            second = asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False, search_id="job-7"))
+            assert scraped == ["blocked", "cleartrip", "easemytrip", "makemytrip"]
+            assert second.source_status["makemytrip"] == "complete" and second.total_results == 3
+            assert not any("Blocked" in e for e in checkpoint._STORE.load("job-7")["errors"])
+
+            asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False, search_id="job-7"))
+            assert len(scraped) == 4
+        finally:
+            checkpoint._STORE.close()
+            checkpoint._STORE = saved_store
+    print("  ✓ Failed source retried, finished search not scraped again")
+
+
+if __name__ == "__main__":
+    test_resume_skips_finished_steps()
+    test_failed_sources_retried_on_resume()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Offline test of in-flight search coalescing (fake scrape, no browser needed)
+"""
+import asyncio
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import FlightQuery, Flight, ScraperResult
+from tools.coalesce import SearchCoalescer
+from tools.rate_limit import BACKGROUND, INTERACTIVE, current_priority, priority
+
+
+def _query(from_city="DEL"):
+    return FlightQuery(
+        from_city=from_city,
+        to_city="BLR",
+        departure_date=date.today() + timedelta(days=3),
+        raw_query="test"
+    )
+
+
+def test_identical_searches_share_one_scrape():
+    """Concurrent callers share a scrape; it survives one caller cancelling, dies when all do"""
+    print("=" * 80)
+    print("TESTING SEARCH COALESCING")
+    print("=" * 80)
+
+    scrapes = []
+
+    async def scrape():
+        scrapes.append(1)
+        await asyncio.sleep(0.1)
+        return ScraperResult(
+            source="fake",
+            success=True,
+            flights=[Flight(airline="IndiGo", price=4500.0, booking_url="https://example.com", source="fake")]
+        )
+
+    async def scenario():
+        coalescer = SearchCoalescer()
+
+        # Same route (case/whitespace differences normalize away) -> one scrape
+        callers = [asyncio.create_task(coalescer.run("fake", _query(city), scrape))
+                   for city in ("DEL", "del", " DEL ", "DEL")]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()   # one client disconnects
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert all(r.success for r in results[1:])
+        assert len(scrapes) == 1 and coalescer.stats["joined"] == 3
+        assert coalescer.in_flight() == 0
+
+        # Every caller gone -> the shared scrape is cancelled too
+        callers = [asyncio.create_task(coalescer.run("fake", _query(), scrape)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert coalescer.stats["cancelled"] == 1 and coalescer.in_flight() == 0
+        return coalescer.stats
+
+    stats = asyncio.run(scenario())
+    print(f"  Stats: {stats}")
+    print("  ✓ One scrape served all identical searches, cancellation is ref-counted")
+
+
+def test_joiner_raises_priority():
+    """An interactive search joining a background scrape lifts it to interactive priority"""
+    levels = []
+
+    async def scrape():
+        levels.append(current_priority())
+        await asyncio.sleep(0.05)
+        levels.append(current_priority())
+        return ScraperResult(source="fake", success=True, flights=[])
+
+    async def background():
+        with priority(BACKGROUND):
+            return await coalescer.run("fake", _query(), scrape)
+
+    async def scenario():
+        owner = asyncio.create_task(background())
+        await asyncio.sleep(0.01)
+        await coalescer.run("fake", _query(), scrape)
+        await owner
+
+    coalescer = SearchCoalescer()
+    asyncio.run(scenario())
+    assert levels == [BACKGROUND, INTERACTIVE]
+    print("  ✓ Shared scrape navigates at the highest priority of its callers")
+
+
+if __name__ == "__main__":
+    test_identical_searches_share_one_scrape()
+    test_joiner_raises_priority()
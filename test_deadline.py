@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Offline test of deadline-aware scraping (fake scrapers, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight, FlightQuery, ScraperResult
+from tools.coalesce import SearchCoalescer
+from tools.deadline import COMPLETE, PARTIAL, TIMED_OUT, SearchBudget, publish_partial, run_within
+
+QUERY = FlightQuery(from_city="DEL", to_city="BOM", departure_date=date(2026, 3, 12), raw_query="test")
+
+
+def _flight(price):
+    return Flight(airline="IndiGo", price=price, booking_url="https://example.com", source="fake")
+
+
+def test_budget_shares_roll_over():
+    """Each source gets an equal split of what's left, so unused time carries forward"""
+    print("=" * 80)
+    print("TESTING DEADLINE-AWARE SEARCH")
+    print("=" * 80)
+
+    budget = SearchBudget(time.time() + 9.25, ["a", "b", "c"])
+    assert abs(budget.share("a") - 3.0) < 0.05
+    assert abs(budget.share("b") - 4.5) < 0.05   # "a" returned instantly - its time rolls over
+    assert abs(budget.share("c") - 9.0) < 0.05
+    print("  ✓ Shares split the remaining budget over the sources not yet run")
+
+
+def test_cut_off_sources_keep_partial_results():
+    """A slow scrape is cancelled at its deadline and contributes what it had published"""
+    cleaned_up = []
+
+    async def slow_scrape(cards):
+        try:
+            for price in cards:
+                publish_partial([_flight(price)])
+                await asyncio.sleep(0.05)
+            await asyncio.sleep(10)     # still scrolling when the deadline hits
+        finally:
+            cleaned_up.append(len(cards))
+
+    async def fast_scrape():
+        return ScraperResult.from_flights("fast", [_flight(3000)])
+
+    async def scenario():
+        partial = await run_within("partial", lambda: slow_scrape([4100, 3900]), 0.3)
+        timed_out = await run_within("timed_out", lambda: slow_scrape([]), 0.1)
+        complete = await run_within("fast", fast_scrape, 1.0)
+        await asyncio.sleep(0.05)       # let the cancelled stragglers unwind
+        return partial, timed_out, complete
+
+    (partial, partial_status), (timed_out, timed_out_status), (complete, complete_status) = asyncio.run(scenario())
+    assert partial_status == PARTIAL and [f.price for f in partial.flights] == [4100.0, 3900.0]
+    assert timed_out_status == TIMED_OUT and not timed_out.success
+    assert complete_status == COMPLETE and complete.flights[0].price == 3000.0
+    assert sorted(cleaned_up) == [0, 2]
+    publish_partial([_flight(1)])       # outside run_within: no sink, nothing happens
+    print("  ✓ Partial cards kept, stragglers cancelled and cleaned up")
+
+
+def test_coalesced_joiner_gets_shared_partial():
+    """A second, overlapping search that is cut off keeps what the shared scrape already published"""
+    scrapes = []
+
+    async def scrape():
+        scrapes.append(1)
+        for price in (4100, 3900):
+            publish_partial([_flight(price)])
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.3)
+        return ScraperResult.from_flights("shared", [_flight(4100), _flight(3900), _flight(3500)])
+
+    async def scenario():
+        coalescer = SearchCoalescer()
+        search = lambda: coalescer.run("shared", QUERY, scrape)
+        first = asyncio.create_task(run_within("shared", search, 2.0))
+        await asyncio.sleep(0.12)
+        second = await run_within("shared", search, 0.1)
+        return await first, second
+
+    (first, first_status), (second, second_status) = asyncio.run(scenario())
+    assert len(scrapes) == 1
+    assert second_status == PARTIAL and [f.price for f in second.flights] == [4100.0, 3900.0]
+    assert first_status == COMPLETE and len(first.flights) == 3
+    print("  ✓ Cut-off joiner of a coalesced scrape keeps the shared partial flights")
+
+
+if __name__ == "__main__":
+    test_budget_shares_roll_over()
+    test_cut_off_sources_keep_partial_results()
+    test_coalesced_joiner_gets_shared_partial()
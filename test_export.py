@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Offline test of the streaming export pipeline (no browser needed)
+"""
+import csv
+import gzip
+import json
+import subprocess
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight
+from tools.export import export_flights
+
+
+def _flights(n):
+    """Generator, so the exporter never sees a list"""
+    for i in range(n):
+        yield Flight(airline="IndiGo", price=4000.0 + i, departure_time="06:15", arrival_time="08:45",
+                     duration="2h 30m", stops=0, booking_url="https://example.com", source="fake")
+
+
+def test_export_formats_round_trip():
+    """NDJSON (gzip), CSV and Parquet exports read back with every row"""
+    print("=" * 80)
+    print("TESTING STREAMING EXPORT")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ndjson_path = os.path.join(tmp, "flights.ndjson.gz")
+        assert export_flights(_flights(2500), ndjson_path) == 2500
+        with gzip.open(ndjson_path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        assert len(rows) == 2500 and rows[-1]["price"] == 6499.0
+
+        csv_path = os.path.join(tmp, "flights.csv")
+        assert export_flights(_flights(10), csv_path) == 10
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 10 and rows[0]["airline"] == "IndiGo" and "T" in rows[0]["scraped_at"]
+
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("  (pyarrow not installed - skipping Parquet)")
+        else:
+            parquet_path = os.path.join(tmp, "flights.parquet")
+            assert export_flights(_flights(25_000), parquet_path) == 25_000
+            table = pq.read_table(parquet_path)
+            assert table.num_rows == 25_000 and pq.ParquetFile(parquet_path).metadata.num_row_groups >= 3
+    print("  ✓ All formats written row by row and read back")
+
+
+def test_export_to_stdout():
+    """'-' streams to stdout for piping"""
+    code = (
+        "from test_export import _flights; from tools.export import export_flights; "
+        "export_flights(_flights(3), '-', fmt='ndjson')"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    assert [json.loads(line)["price"] for line in out.splitlines()] == [4000.0, 4001.0, 4002.0]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("  (pyarrow not installed - skipping Parquet)")
+    else:
+        code = code.replace("fmt='ndjson'", "fmt='parquet'")
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        assert pq.read_table(pa.BufferReader(out)).num_rows == 3
+    print("  ✓ stdout export is valid NDJSON and Parquet")
+
+
+def _failing(n):
+    yield from _flights(n)
+    raise RuntimeError("scrape died mid-export")
+
+
+def test_failed_export_not_finalized():
+    """An export that fails part-way leaves a file that doesn't read back as complete"""
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_path = os.path.join(tmp, "flights.csv.gz")
+        try:
+            export_flights(_failing(500), gz_path)
+        except RuntimeError:
+            pass
+        try:
+            with gzip.open(gz_path, "rt", encoding="utf-8") as f:
+                f.read()
+        except EOFError:
+            pass   # no gzip trailer
+        else:
+            raise AssertionError("truncated gzip export read back as complete")
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("  (pyarrow not installed - skipping Parquet)")
+        else:
+            from tools.export import COLUMNS, _arrow_schema
+            assert _arrow_schema(pa).names == COLUMNS
+            parquet_path = os.path.join(tmp, "flights.parquet")
+            try:
+                export_flights(_failing(15_000), parquet_path)
+            except RuntimeError:
+                pass
+            try:
+                pq.read_table(parquet_path)
+            except pa.ArrowInvalid:
+                pass   # no footer
+            else:
+                raise AssertionError("truncated Parquet export read back as complete")
+    print("  ✓ Failed exports left unfinished, Parquet schema follows Flight's fields")
+
+
+if __name__ == "__main__":
+    test_export_formats_round_trip()
+    test_export_to_stdout()
+    test_failed_export_not_finalized()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Offline test of the Parquet fare history (needs pyarrow, skipped without it)
+"""
+import glob
+import sys
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight, FlightQuery
+from tools import fare_history
+
+
+def _query(from_city, to_city, day):
+    return FlightQuery(from_city=from_city, to_city=to_city, departure_date=day, raw_query="test")
+
+
+def _flights(source, *prices, scraped_at=None):
+    return Flight.from_cards([{"airline": "IndiGo" if i % 2 else "Vistara", "price": price, "stops": 0}
+                              for i, price in enumerate(prices)], source, "https://example.com", scraped_at)
+
+
+def test_append_query_compact():
+    """Appends land in route/month partitions, queries prune them, compact merges the files"""
+    print("=" * 80)
+    print("TESTING FARE HISTORY")
+    print("=" * 80)
+    if not fare_history._load_pyarrow():
+        print("  (pyarrow not installed - skipping)")
+        return
+
+    saved = fare_history.FARE_HISTORY_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        fare_history.FARE_HISTORY_DIR = tmp
+        try:
+            _check_history(tmp)
+        finally:
+            fare_history.FARE_HISTORY_DIR = saved
+
+
+def _check_history(tmp):
+    march, april = date(2026, 3, 12), date(2026, 4, 2)
+    week_ago = datetime.now() - timedelta(days=7)
+    for _ in range(3):
+        fare_history.append_flights(_query("del", "blr", march), _flights("makemytrip", 4200, 4500))
+    fare_history.append_flights(_query("DEL", "BLR", march), _flights("cleartrip", 3900, scraped_at=week_ago))
+    fare_history.append_flights(_query("DEL", "BLR", april), _flights("makemytrip", 5100))
+    fare_history.append_flights(_query("BOM", "GOI", march), _flights("makemytrip", 2500))
+    assert fare_history.append_flights(_query("DEL", "BLR", march), []) is None
+    assert sorted(os.listdir(tmp)) == ["route=BOM-GOI", "route=DEL-BLR"]
+
+    # Unreadable file in a partition the query never touches: pruning means it is never opened
+    with open(os.path.join(tmp, "route=BOM-GOI", "month=2026-03", "part-broken.parquet"), "wb") as f:
+        f.write(b"not parquet")
+
+    march_fares = fare_history.query_fares("DEL", "BLR", march, march)
+    assert march_fares.num_rows == 7
+    assert set(march_fares.column("departure_date").to_pylist()) == {march}
+    recent = fare_history.query_fares("DEL", "BLR", march, march, source="makemytrip",
+                                      scraped_since=datetime.now() - timedelta(days=1), columns=["price"])
+    assert recent.column_names == ["price"] and sorted(recent.column("price").to_pylist()) == [4200.0] * 3 + [4500.0] * 3
+    assert fare_history.query_fares("DEL", "BLR", march, april, airline="Vistara").num_rows == 5
+    print("  ✓ Rows partitioned by route/month, filters pushed down, other partitions pruned")
+
+    os.remove(os.path.join(tmp, "route=BOM-GOI", "month=2026-03", "part-broken.parquet"))
+    assert fare_history.compact(min_files=3) == 1
+    files = glob.glob(os.path.join(tmp, "route=DEL-BLR", "month=2026-03", "*.parquet"))
+    assert len(files) == 1 and os.path.basename(files[0]).startswith("compacted-")
+    assert len(glob.glob(os.path.join(tmp, "route=DEL-BLR", "month=2026-04", "*.parquet"))) == 1
+    scraped = fare_history.query_fares("DEL", "BLR", march, march).column("scraped_at").to_pylist()
+    assert len(scraped) == 7 and scraped == sorted(scraped)
+    print("  ✓ Small files compacted into one sorted file per partition")
+
+
+if __name__ == "__main__":
+    test_append_query_compact()
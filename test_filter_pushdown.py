@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Offline test of query filter pushdown (fake page, no browser needed)
+"""
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight, FlightQuery
+from tools.scrapers import filters as pushdown_filters
+from tools.scrapers.filters import CARD_FILTER_JS, extract_filtered, pushdown
+
+QUERY = dict(from_city="DEL", to_city="MAA", departure_date=date(2026, 3, 12), raw_query="test")
+
+CARDS = [
+    {"airline": "IndiGo", "flightCode": "6E-201", "price": 4200, "departureTime": "06:15", "stops": 0},
+    {"airline": "Air India Express", "flightCode": "IX-1463", "price": 4500, "departureTime": "07:00", "stops": 0},
+    {"airline": "IndiGo", "flightCode": "6E-305", "price": 5100, "departureTime": "10:30", "stops": 0},
+    {"airline": "IndiGo", "flightCode": "6E-411", "price": 5600, "departureTime": "08:05", "stops": 1},
+    {"airline": "IndiGo", "flightCode": "6E-502", "price": 5900, "departureTime": "08:40", "stops": 0},
+    {"airline": "IndiGo", "flightCode": "6E-613", "price": 6400, "departureTime": "06:50", "stops": 0},
+    {"airline": "IndiGo", "flightCode": "6E-720", "price": 7100, "departureTime": "07:20", "stops": 0},
+]
+
+
+class _FakeListing:
+    """Price-sorted listing that renders 3 more cards per scroll"""
+
+    def __init__(self, cards, query):
+        self.cards = cards
+        self.rendered = 3
+        self.query = query
+        self.scrolls = 0
+        self.serialized = 0
+
+    async def evaluate(self, script, *args):
+        self.scrolls += 1
+        self.rendered += 3
+
+    async def extract(self, skip, limit, filters):
+        flights, i, exhausted = [], skip, False
+        end = len(self.cards[:self.rendered]) if filters else min(skip + limit, self.rendered)
+        while i < end and len(flights) < limit and not exhausted:
+            card = self.cards[i]
+            i += 1
+            flight = Flight(airline=card["airline"], price=card["price"], departure_time=card["departureTime"],
+                            stops=card["stops"], booking_url="u", source="fake")
+            if not filters or self.query.matches(flight):
+                flights.append(card)
+            else:
+                exhausted = filters["price_sorted"] and card["price"] > filters.get("max_price", float("inf"))
+        self.serialized += len(flights)
+        return {"flights": flights, "examined": i, "exhausted": exhausted}
+
+
+def test_query_filters():
+    """Only set filters are pushed down; matches() applies them in Python"""
+    print("=" * 80)
+    print("TESTING FILTER PUSHDOWN")
+    print("=" * 80)
+
+    assert pushdown(FlightQuery(**QUERY)) is None
+    query = FlightQuery(**QUERY, airlines=["indigo"], max_stops=0, depart_before="09:00", max_price=6000)
+    assert pushdown(query, price_sorted=True) == {
+        "airlines": ["indigo"], "max_stops": 0, "depart_before": "09:00", "max_price": 6000.0, "price_sorted": True}
+    flight = Flight(airline="IndiGo", price=5900, departure_time="08:40", stops=0, booking_url="u", source="fake")
+    assert query.matches(flight)
+    assert not query.matches(flight.model_copy(update={"departure_time": "N/A"}))
+    assert not query.matches(flight.model_copy(update={"airline": "SpiceJet"}))
+    print("  ✓ Filters validated on the query and mirrored in Python")
+
+
+def test_llm_schema_has_no_filters():
+    """The constrained-decoding schema only asks the LLM for the trip; filters come from the caller"""
+    from models.schema import FILTER_FIELDS
+    from tools.llm_parser import _parse_structured_response, _structured_schema
+    schema = _structured_schema()
+    assert set(schema["properties"]) == {"from_city", "to_city", "departure_date"}
+    assert not set(schema.get("required", [])) & set(FILTER_FIELDS + ("raw_query",))
+    parsed = _parse_structured_response(json.dumps(
+        {"from_city": "Delhi", "to_city": "Chennai", "departure_date": "2026-03-12", "max_price": 100}), "test")
+    assert parsed.filters() == {}
+    print("  ✓ LLM schema and structured output carry no filter fields")
+
+
+def test_cli_rejects_bad_filters():
+    """Invalid filter/export arguments are argparse usage errors, not errors after the search"""
+    import contextlib
+    import io
+    from main import parse_args
+    for argv in (["--max-stops", "-1"], ["--depart-after", "25:00"], ["--depart-before", "9am"], ["--max-price", "0"],
+                 ["--export", "out.csv", "--compress", "zstd"], ["--export", "-", "--format", "ndjson", "--compress", "snappy"],
+                 ["--export", "out.txt"]):
+        with contextlib.redirect_stderr(io.StringIO()):
+            try:
+                parse_args(argv)
+            except SystemExit as e:
+                assert e.code == 2
+            else:
+                raise AssertionError(f"{argv} accepted")
+    args = parse_args(["--max-stops", "0", "--depart-after", "23:59", "--max-price", "4500"])
+    assert (args.max_stops, args.depart_after, args.max_price) == (0, "23:59", 4500.0)
+    assert parse_args(["--export", "out.parquet", "--compress", "snappy"]).compress == "snappy"
+    assert parse_args(["--export", "out.csv.gz", "--compress", "gzip"]).compress == "gzip"
+    print("  ✓ Bad filter and export arguments rejected with a usage error")
+
+
+def test_scroll_stops_when_exhausted():
+    """Filtered extraction scrolls for matches and stops at the first card over the price ceiling"""
+    pushdown_filters.FILTER_SCROLL_WAIT = 0
+    query = FlightQuery(**QUERY, airlines=["IndiGo"], max_stops=0, depart_before="09:00", max_price=6000)
+    page = _FakeListing(CARDS, query)
+    cards = asyncio.run(extract_filtered(page, page.extract, 5, pushdown(query, price_sorted=True), "TEST"))
+    assert [c["flightCode"] for c in cards] == ["6E-201", "6E-502"]
+    assert page.scrolls == 1 and page.serialized == 2
+
+    unfiltered = _FakeListing(CARDS, FlightQuery(**QUERY))
+    cards = asyncio.run(extract_filtered(unfiltered, unfiltered.extract, 5, None, "TEST"))
+    assert len(cards) == 3 and unfiltered.scrolls == 0
+    print("  ✓ Only matching cards serialized, scrolling stopped once no card could qualify")
+
+
+def test_page_filter_matches_python():
+    """CARD_FILTER_JS agrees with FlightQuery.matches (needs node)"""
+    if not shutil.which("node"):
+        print("  (node not installed - skipping in-page filter check)")
+        return
+    query = FlightQuery(**QUERY, airlines=["IndiGo", "Air India Express"], max_stops=0,
+                        depart_after="06:30", depart_before="09:00", max_price=6000)
+    filters = pushdown(query, price_sorted=True)
+    script = (f"const f = ({CARD_FILTER_JS})({json.dumps(filters)});"
+              f"console.log(JSON.stringify({json.dumps(CARDS)}.map(c => [f.accepts(c), f.exhausted(c)])));")
+    verdicts = json.loads(subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout)
+    expected = [query.matches(Flight(airline=c["airline"], price=c["price"], departure_time=c["departureTime"],
+                                     stops=c["stops"], booking_url="u", source="fake")) for c in CARDS]
+    assert [accepted for accepted, _ in verdicts] == expected
+    assert [exhausted for _, exhausted in verdicts] == [c["price"] > 6000 for c in CARDS]
+    print("  ✓ In-page filter and Python filter agree")
+
+
+if __name__ == "__main__":
+    test_query_filters()
+    test_llm_schema_has_no_filters()
+    test_cli_rejects_bad_filters()
+    test_scroll_stops_when_exhausted()
+    test_page_filter_matches_python()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Offline test of the graph's conditional routing (fake parser and scrapers, no browser or LLM needed)
+"""
+import asyncio
+import contextlib
+import sys
+import os
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agent.graph as graph
+from models.schema import Flight, FlightQuery, ScraperResult
+from tools import result_store
+
+QUERY = FlightQuery(from_city="DEL", to_city="MAA", departure_date=date(2026, 3, 12), raw_query="test")
+
+
+@contextlib.contextmanager
+def fake_search(tmp, parsed):
+    """Fake parser, scrapers and result store for the duration; yields the list of sources scraped"""
+    scraped = []
+
+    async def parse(user_query):
+        return parsed
+
+    def make(source):
+        async def scrape(query, session=None):
+            scraped.append(source)
+            return ScraperResult.from_flights(source, [
+                Flight(airline="IndiGo", price=4000.0 + len(scraped), booking_url="u", source=source)])
+        return scrape
+
+    saved = (graph.parse_query_with_llama_async, graph.append_flights, dict(graph.SCRAPERS), result_store._STORE)
+    graph.parse_query_with_llama_async = parse
+    graph.append_flights = lambda query, flights: None
+    graph.SCRAPERS.update({source: make(source) for source in graph.SOURCES})
+    result_store._STORE = result_store.ResultStore(os.path.join(tmp, "results.db"))
+    try:
+        yield scraped
+    finally:
+        result_store._STORE.close()
+        graph.parse_query_with_llama_async, graph.append_flights, scrapers, result_store._STORE = saved
+        graph.SCRAPERS.update(scrapers)
+
+
+def test_parse_failure_skips_scraping():
+    """A failed parse goes straight to the error result"""
+    print("=" * 80)
+    print("TESTING GRAPH ROUTING")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp, fake_search(tmp, None) as scraped:
+        result = asyncio.run(graph.run_flight_search("gibberish", warm_up=False))
+    assert scraped == [] and result.query is None and "Failed to parse query" in result.error
+    print("  ✓ Parse failure routed to the error result without scraping")
+
+
+def test_cached_sources_skip_their_scrape_nodes():
+    """Only sources without a fresh cached result are scraped"""
+    with tempfile.TemporaryDirectory() as tmp, fake_search(tmp, QUERY) as scraped:
+        cached = ScraperResult.from_flights("cleartrip", [
+            Flight(airline="Akasa Air", price=3500.0, booking_url="u", source="cleartrip")])
+        result_store._STORE.put("cleartrip", QUERY, cached)
+
+        first = asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False))
+        assert scraped == ["makemytrip", "easemytrip"]
+        assert first.source_status == {"makemytrip": "complete", "cleartrip": "cached", "easemytrip": "complete"}
+        assert first.cheapest_flight.price == 3500.0 and first.total_results == 3
+
+        # Everything is fresh now: straight from check_cache to compare
+        second = asyncio.run(graph.run_flight_search("delhi to chennai", warm_up=False))
+    assert scraped == ["makemytrip", "easemytrip"]
+    assert set(second.source_status.values()) == {"cached"}
+    print("  ✓ Fresh sources served from cache, only stale ones scraped")
+
+
+if __name__ == "__main__":
+    test_parse_failure_skips_scraping()
+    test_cached_sources_skip_their_scrape_nodes()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline test of the durable search job queue (fake handler, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools import job_queue
+from tools.job_queue import JobQueue, JobWorker
+from tools.scrapers import supervisor
+from tools.scrapers.supervisor import BrowserSupervisor
+
+
+def test_queue_lease_retry_dead_letter():
+    """Priorities, exclusive leases, expired leases, backoff and dead-lettering"""
+    print("=" * 80)
+    print("TESTING JOB QUEUE")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"), visibility_timeout=60)
+        low = queue.enqueue("delhi to mumbai tomorrow")
+        high = queue.enqueue("delhi to goa tomorrow", priority=5)
+
+        first = queue.lease("worker-a")
+        second = queue.lease("worker-b")
+        assert (first.id, second.id) == (high, low)
+        assert queue.lease("worker-c") is None
+
+        # Only the lease holder can complete
+        assert not queue.complete(replace(first, lease_owner="worker-b"))
+        assert queue.complete(first, '{"ok": true}')
+
+        # Failure -> backoff: not visible again until available_at
+        assert queue.fail(second, "timeout") == "queued"
+        assert queue.lease("worker-a") is None
+
+        # Expired lease is picked up by another worker
+        retry = queue.enqueue("bangalore to pune friday", max_attempts=2)
+        stuck = queue.lease("worker-dead", visibility_timeout=0.01)
+        time.sleep(0.05)
+        taken = queue.lease("worker-b")
+        assert taken.id == retry and taken.attempts == 2
+        assert queue.fail(taken, "bot trap") == "dead"
+        assert queue.dead_letters()[0]["id"] == retry
+        assert not queue.complete(stuck)
+
+        assert queue.requeue(retry)
+        print(f"  Stats: {queue.stats()}")
+        assert queue.stats() == {"queued": 2, "leased": 0, "done": 1, "dead": 0}
+        queue.close()
+    print("  ✓ Leases are exclusive, retries back off, dead letters can be requeued")
+
+
+def test_worker_drains_queue():
+    """Worker loop runs the handler per job, retrying failures"""
+    calls = []
+
+    async def handler(user_query, search_id):
+        calls.append(user_query)
+        if user_query == "flaky" and calls.count("flaky") == 1:
+            raise RuntimeError("first attempt fails")
+        return '{"ok": true}'
+
+    saved = job_queue.BACKOFF_BASE, supervisor._SUPERVISOR
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        for q in ("a", "b", "flaky", "c"):
+            queue.enqueue(q)
+        # The worker sweeps for leaked browsers as it goes: keep that off the project's registry
+        job_queue.BACKOFF_BASE = 0
+        supervisor._SUPERVISOR = BrowserSupervisor(os.path.join(tmp, "browsers.db"))
+        try:
+            stats = asyncio.run(JobWorker(queue, handler=handler, concurrency=3).run(stop_when_empty=True))
+        finally:
+            supervisor._SUPERVISOR.close()
+            job_queue.BACKOFF_BASE, supervisor._SUPERVISOR = saved
+        print(f"  Worker stats: {stats}")
+        assert stats["done"] == 4 and stats["retried"] == 1
+        assert queue.stats()["done"] == 4
+        assert sorted(calls) == ["a", "b", "c", "flaky", "flaky"]
+        queue.close()
+    print("  ✓ Worker drained the queue")
+
+
+if __name__ == "__main__":
+    test_queue_lease_retry_dead_letter()
+    test_worker_drains_queue()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Offline test of the LLM parser: structured output and client handling (fake Ollama, no model needed)
+"""
+import asyncio
+import json
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools import llm_parser
+
+
+class _FakeAsyncClient:
+    def __init__(self, timeout=None):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeOllama:
+    AsyncClient = _FakeAsyncClient
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def chat(self, **chat_args):
+        self.calls.append(chat_args)
+        return {"message": {"content": self.replies.pop(0)}}
+
+
+def _trip(**fields):
+    return json.dumps({"from_city": "Delhi", "to_city": "Chennai",
+                       "departure_date": (date.today() + timedelta(days=10)).isoformat(), **fields})
+
+
+def test_structured_response_parsing():
+    """Valid JSON becomes a FlightQuery; malformed or incomplete output is rejected, not raised"""
+    print("=" * 80)
+    print("TESTING STRUCTURED LLM OUTPUT")
+    print("=" * 80)
+
+    parsed = llm_parser._parse_structured_response(_trip(), "delhi to chennai")
+    assert (parsed.from_city, parsed.to_city, parsed.raw_query) == ("DEL", "MAA", "delhi to chennai")
+    assert parsed.departure_date == date.today() + timedelta(days=10)
+    # raw_query comes from the caller, whatever the model says
+    assert llm_parser._parse_structured_response(_trip(raw_query="x"), "q").raw_query == "q"
+
+    for bad in ("not json", "[1, 2]", json.dumps({"from_city": "Delhi"}),
+                _trip(departure_date="12 March"), _trip()[:-20]):
+        assert llm_parser._parse_structured_response(bad, "q") is None, bad
+    print("  ✓ Valid output parsed, malformed output rejected")
+
+
+def test_structured_output_token_cap():
+    """Output is capped at LLM_MAX_TOKENS; a reply cut off by the cap falls back to the free-text prompt"""
+    args = llm_parser._structured_chat_args("delhi to chennai")
+    assert args["options"]["num_predict"] == llm_parser.LLM_MAX_TOKENS
+    assert args["options"]["temperature"] == 0
+    assert set(args["format"]["properties"]) == {"from_city", "to_city", "departure_date"}
+
+    day = (date.today() + timedelta(days=10)).isoformat()
+    fake = _FakeOllama(_trip()[:30],   # truncated at the token cap
+                       f'origin_city: "Delhi"\ndestination_city: "Chennai"\ndate: "{day}"')
+    saved = llm_parser._ollama, llm_parser.LLM_STRUCTURED
+    llm_parser._ollama, llm_parser.LLM_STRUCTURED = (lambda: fake), True
+    try:
+        parsed = llm_parser.parse_query_with_llama("delhi to chennai")
+    finally:
+        llm_parser._ollama, llm_parser.LLM_STRUCTURED = saved
+    assert parsed and (parsed.from_city, parsed.to_city) == ("DEL", "MAA")
+    assert "format" in fake.calls[0] and "format" not in fake.calls[1]
+    print("  ✓ Capped, and a cut-off reply retried with the free-text prompt")
+
+
+def test_async_client_closed_on_new_loop():
+    """A client left over from an earlier event loop is closed when the next loop replaces it"""
+    print("=" * 80)
+    print("TESTING LLM CLIENT LIFECYCLE")
+    print("=" * 80)
+
+    saved = llm_parser._ollama
+    llm_parser._ollama = lambda: _FakeOllama()
+    try:
+        first = asyncio.run(llm_parser._get_async_client())
+        second = asyncio.run(llm_parser._get_async_client())
+        assert first is not second and first.closed and not second.closed
+
+        async def same_loop():
+            return await llm_parser._get_async_client() is await llm_parser._get_async_client()
+        assert asyncio.run(same_loop())
+
+        asyncio.run(llm_parser.close_async_client())
+        assert llm_parser._async_client is None
+    finally:
+        llm_parser._ollama = saved
+    print("  ✓ Stale client closed, one client per loop")
+
+
+if __name__ == "__main__":
+    test_structured_response_parsing()
+    test_structured_output_token_cap()
+    test_async_client_closed_on_new_loop()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Offline test of MakeMyTrip's batched card extraction: result mapping with a fake page,
+strategy fallbacks against a static HTML fixture (needs Playwright's Chromium, skipped
+without it; no network)
+"""
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight
+from tools.scrapers.mmt import MMT_EXTRACT_JS, _extract_mmt_cards, _mmt_card_key, _mmt_flight
+from tools.selector_registry import STRATEGY_RUNNER_JS
+
+URL = "https://www.makemytrip.com/flight/search?itinerary=DEL-BLR-12/03/2026"
+
+CARDS = [
+    {"index": 0, "airline": "IndiGo", "flightCode": "6E 2134", "departureTime": "06:15", "arrivalTime": "08:55",
+     "departureCity": "New Delhi", "arrivalCity": "Bengaluru", "duration": "2h 40m", "stops": 0, "price": 5432},
+    {"index": 2, "airline": "SpiceJet", "flightCode": "N/A", "departureTime": "10:05", "arrivalTime": "N/A",
+     "departureCity": "N/A", "arrivalCity": "N/A", "duration": "N/A", "stops": 1, "price": 4899},
+]
+
+# Card 0 has MMT's own classes; card 1 only a data-test airline and its fare in the text
+# (after a coupon too small to be a fare); card 2 names its airline only in the text; card 3 has no fare yet
+FIXTURE = """
+<div class="listingCard">
+  <p class="boldFont blackText airlineName">IndiGo</p> <p class="fliCode">6E 2134</p>
+  <p class="darkText">New Delhi</p> <p class="darkText">Bengaluru</p>
+  <p>06:15</p> <p>08:55</p> <p>2 h 40 m</p> <p>Non stop</p>
+  <span class="fontSize18 blackFont">₹ 5,432</span>
+</div>
+<div class="listingCard">
+  <div data-test="airline-name">SpiceJet</div>
+  <p>Departs at 10:05, arrives 12:40</p> <p>1 stop</p>
+  <p>Save ₹ 250 with code FLY</p> <p>₹ 4,899</p>
+</div>
+<div class="listingCard">
+  <div><span>Air India Express</span> <span>IX 1463</span></div>
+  <p>18:20</p> <p>21:00</p> <span class="fontSize18 blackFont">₹6,120</span>
+</div>
+<div class="listingCard"><p>Loading fares...</p></div>
+"""
+
+
+class _FakePage:
+    """Replays batches for __mmtExtract; the first call finds no init script, as on a page loaded before it"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.scripts = []
+        self.installed = False
+
+    async def evaluate(self, script, args=None):
+        if args is None:
+            self.scripts.append(script)
+            self.installed = self.installed or script == MMT_EXTRACT_JS
+            return None
+        if "window.__mmtExtract ?" in script and not self.installed:
+            return None
+        return self.batches.pop(0)
+
+
+def test_batch_maps_to_flights():
+    """One evaluate per batch; card dicts map onto Flight fields, keys tell cards apart"""
+    print("=" * 80)
+    print("TESTING MMT BATCHED EXTRACTION")
+    print("=" * 80)
+
+    page = _FakePage([{"flights": CARDS, "examined": 3, "exhausted": False}])
+    cards = asyncio.run(_extract_mmt_cards(page, limit=5, url=URL))
+    assert cards == CARDS and not page.batches
+    # The scripts were re-injected into the page that predates the init script
+    assert page.scripts == [STRATEGY_RUNNER_JS, MMT_EXTRACT_JS]
+
+    flights = Flight.from_cards(cards, "makemytrip", URL)
+    assert [(f.airline, f.price, f.departure_time, f.arrival_time, f.duration, f.stops) for f in flights] == [
+        ("IndiGo", 5432.0, "06:15", "08:55", "2h 40m", 0),
+        ("SpiceJet", 4899.0, "10:05", "N/A", "N/A", 1),
+    ]
+    assert all(f.source == "makemytrip" and f.booking_url == URL for f in flights)
+    assert flights[0].scraped_at == flights[1].scraped_at
+    # The streaming path maps cards one at a time, to the same flights
+    single = _mmt_flight(CARDS[0], URL)
+    assert single.model_dump(exclude={"scraped_at"}) == flights[0].model_dump(exclude={"scraped_at"})
+
+    assert _mmt_card_key(CARDS[0]) == "6E 2134-5432-06:15"
+    assert _mmt_card_key(CARDS[1]) != _mmt_card_key({**CARDS[1], "price": 4999})
+    print("  ✓ Batch mapped to flights, card keys distinct")
+
+
+def test_filtered_batches_scroll_for_matches():
+    """With filters, later batches are requested from where the last one stopped"""
+    batches = [{"flights": [CARDS[0]], "examined": 4, "exhausted": False},
+               {"flights": [CARDS[0], CARDS[1]], "examined": 9, "exhausted": True}]
+    page = _FakePage(batches)
+    page.installed = True
+    cards = asyncio.run(_extract_mmt_cards(page, limit=5, filters={"max_stops": 1}, url=URL))
+    # The card seen in both batches is kept once
+    assert cards == CARDS and not page.batches
+    print("  ✓ Filtered extraction deduplicated across scrolls")
+
+
+async def _extract_fixture():
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch()
+        except Exception as e:
+            print(f"  (Chromium not available - skipping: {str(e).splitlines()[0]})")
+            return None, None
+        try:
+            page = await browser.new_page()
+            await page.set_content(FIXTURE)
+            await page.evaluate(STRATEGY_RUNNER_JS)
+            await page.evaluate(MMT_EXTRACT_JS)
+            batch = await page.evaluate("() => window.__mmtExtract(0, 10, null)")
+            return batch, await page.evaluate("() => window.__strategyStats")
+        finally:
+            await browser.close()
+
+
+def test_strategy_fallbacks():
+    """Cards without MMT's classes fall through __tryStrategies to the data-test and card-text strategies"""
+    batch, stats = asyncio.run(_extract_fixture())
+    if batch is None:
+        return
+    cards = [(c["airline"], c["flightCode"], c["departureTime"], c["arrivalTime"], c["stops"], c["price"])
+             for c in batch["flights"]]
+    assert cards == [
+        ("IndiGo", "6E 2134", "06:15", "08:55", 0, 5432),
+        ("SpiceJet", "N/A", "10:05", "12:40", 1, 4899),
+        ("Air India Express", "N/A", "18:20", "21:00", 0, 6120),
+    ], cards
+    assert batch["examined"] == 4 and not batch["exhausted"]
+    assert batch["flights"][0]["departureCity"] == "New Delhi" and batch["flights"][0]["duration"] == "2h 40m"
+
+    airline, price = stats["airline"], stats["price"]
+    assert (airline["airlineName"]["hits"], airline["dataTest"]["hits"], airline["cardText"]["hits"]) == (1, 1, 1)
+    assert (price["priceSpan"]["hits"], price["cardText"]["hits"]) == (2, 1)
+    # The card with no fare yet missed every strategy for both fields
+    assert airline["__allMissed"] == 1 and price["__allMissed"] == 1
+    print("  ✓ Fallback strategies extracted the unstyled cards")
+
+
+if __name__ == "__main__":
+    test_batch_maps_to_flights()
+    test_filtered_batches_scroll_for_matches()
+    test_strategy_fallbacks()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Offline test of the cloned-profile pool (temp directories, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools import profile_pool
+from tools.profile_pool import ProfilePool
+
+
+def test_cancelled_lease_waits_for_clone():
+    """A lease cancelled mid-clone keeps its lock until the copy is done"""
+    print("=" * 80)
+    print("TESTING PROFILE POOL")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = profile_pool.POOL_ROOT
+        profile_pool.POOL_ROOT = os.path.join(tmp, "pool")
+        try:
+            pool = ProfilePool("fake", os.path.join(tmp, "golden"), size=1)
+            events = []
+
+            def slow_prepare(index):
+                events.append("copy started")
+                time.sleep(0.3)
+                events.append("copy done")
+
+            pool._prepare = slow_prepare
+
+            async def use():
+                async with pool.lease():
+                    events.append("leased")
+
+            async def scenario():
+                task = asyncio.create_task(use())
+                await asyncio.sleep(0.1)
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    events.append("cancelled")
+                # The lock was held until the copy finished, and is free again now
+                fd = pool._try_acquire(0)
+                assert fd is not None
+                pool._release(0, fd)
+
+            asyncio.run(scenario())
+        finally:
+            profile_pool.POOL_ROOT = saved
+    assert events == ["copy started", "copy done", "cancelled"]
+    print("  ✓ Cancelled lease released its clone only after the copy finished")
+
+
+if __name__ == "__main__":
+    test_cancelled_lease_waits_for_clone()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Offline test of the shared per-domain rate limiter (no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.rate_limit import BACKGROUND, INTERACTIVE, RateLimiter, _parse_limits, domain_of, priority
+
+
+def test_bucket_shared_between_processes():
+    """Two limiters on one file (two processes) draw from the same bucket"""
+    print("=" * 80)
+    print("TESTING RATE LIMITER")
+    print("=" * 80)
+
+    assert domain_of("https://www.makemytrip.com/flight/search?x=1") == "makemytrip.com"
+    assert domain_of("https://flight.easemytrip.com/FlightList/Index") == domain_of("https://www.easemytrip.com/")
+    assert domain_of("https://www.example.co.in/") == "example.co.in"
+    assert domain_of("https://api.b.example.com/", ["b.example.com"]) == "b.example.com"
+    for bad in ("example.com=5:0", "example.com=0:1"):
+        try:
+            _parse_limits(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad} accepted")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate.db")
+        limits = {"example.com": (2, 10.0)}
+        first, second = RateLimiter(path, limits), RateLimiter(path, limits)
+
+        async def scenario():
+            started = time.monotonic()
+            await first.acquire("https://example.com/a")
+            await first.acquire("https://www.example.com/b")
+            burst = time.monotonic() - started
+            await second.acquire("https://example.com/c")     # bucket empty: waits for the refill
+            return burst, time.monotonic() - started
+
+        burst, total = asyncio.run(scenario())
+        assert burst < 0.05 and 0.07 < total < 0.5
+        stats = {row["priority"]: row for row in first.stats()}
+        assert stats[INTERACTIVE]["acquired"] == 3 and stats[INTERACTIVE]["max_wait"] > 0.07
+        first.close()
+        second.close()
+    print("  ✓ Burst served at once, then paced by the refill across limiters")
+
+
+def test_interactive_goes_before_background():
+    """A queued interactive navigation overtakes background work waiting for the same domain"""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimiter(os.path.join(tmp, "rate.db"), {"example.com": (1, 5.0)})
+        order = []
+
+        async def navigate(name):
+            await limiter.acquire("https://example.com/")
+            order.append(name)
+
+        async def refresher():
+            with priority(BACKGROUND):
+                await navigate("background")
+
+        async def scenario():
+            await limiter.acquire("https://example.com/")   # empty the bucket
+            background = asyncio.create_task(refresher())
+            await asyncio.sleep(0.02)
+            interactive = asyncio.create_task(navigate("interactive"))
+            await asyncio.gather(background, interactive)
+
+        asyncio.run(scenario())
+        assert order == ["interactive", "background"]
+        assert {row["priority"] for row in limiter.stats()} == {INTERACTIVE, BACKGROUND}
+        assert limiter._conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0] == 0
+        limiter.close()
+    print("  ✓ Interactive searches served first, queue left empty")
+
+
+def test_cancelled_waiter_leaves_queue():
+    """A waiter cut off by a deadline doesn't block the domain's queue"""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimiter(os.path.join(tmp, "rate.db"), {"example.com": (1, 0.5)})
+
+        async def scenario():
+            await limiter.acquire("https://example.com/")
+            try:
+                await asyncio.wait_for(limiter.acquire("https://example.com/"), 0.1)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(scenario())
+        assert limiter._conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0] == 0
+        limiter.close()
+    print("  ✓ Cancelled waiter removed from the queue")
+
+
+def test_wait_log_pruned():
+    """Waits older than the stats window are deleted as new ones are logged"""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimiter(os.path.join(tmp, "rate.db"), {"example.com": (5, 1.0)})
+        old = time.time() - 2 * 86400
+        limiter._conn.execute("INSERT INTO waits VALUES ('example.com', ?, 0.5, ?)", (INTERACTIVE, old))
+        asyncio.run(limiter.acquire("https://example.com/"))
+        asyncio.run(limiter.acquire("https://example.com/"))
+        assert limiter._conn.execute("SELECT COUNT(*) FROM waits").fetchone()[0] == 2
+        limiter.close()
+    print("  ✓ Old waits pruned")
+
+
+if __name__ == "__main__":
+    test_bucket_shared_between_processes()
+    test_interactive_goes_before_background()
+    test_cancelled_waiter_leaves_queue()
+    test_wait_log_pruned()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Offline test of the result store and popular-route refresher (no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import FlightQuery, Flight, ScraperResult
+from tools.result_store import ResultStore
+from tools import fare_history, refresher
+
+
+def _query(to_city="BLR"):
+    return FlightQuery(
+        from_city="DEL",
+        to_city=to_city,
+        departure_date=date.today() + timedelta(days=3),
+        raw_query="test"
+    )
+
+
+async def _fake_scraper(query):
+    return ScraperResult(
+        source="fake",
+        success=True,
+        flights=[Flight(airline="IndiGo", price=4500.0, booking_url="https://example.com", source="fake")]
+    )
+
+
+def test_refresher_fills_store():
+    """Hot routes get scraped into the store and served as refresh hits"""
+    print("=" * 80)
+    print("TESTING RESULT STORE + REFRESHER")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(os.path.join(tmp, "results.db"))
+        for _ in range(3):
+            store.log_request(_query())
+        assert store.hottest_routes() == [("DEL", "BLR", _query().departure_date)]
+
+        history_dir = fare_history.FARE_HISTORY_DIR
+        fare_history.FARE_HISTORY_DIR = os.path.join(tmp, "fare_history")
+        refresher.RATE_BUDGET_PER_HOUR["fake"] = 3600
+        try:
+            route_refresher = refresher.RouteRefresher(store=store, scrapers={"fake": _fake_scraper})
+            asyncio.run(route_refresher.run_cycle())
+        finally:
+            fare_history.FARE_HISTORY_DIR = history_dir
+            del refresher.RATE_BUDGET_PER_HOUR["fake"]
+
+        cached = store.get("fake", _query())
+        assert cached and cached.flights[0].price == 4500.0
+        assert store.get("fake", _query(to_city="BOM")) is None
+
+        stats = store.lookup_stats()
+        print(f"  Lookup stats: {stats}")
+        assert stats["refresh_hits"] == 1 and stats["lookups"] == 2
+        store.close()
+    print("  ✓ Refresher wrote fresh data and hit rate is reported")
+
+
+def test_prune_bounds_logs():
+    """Old request/lookup rows and results for past dates are pruned, recent ones kept"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(os.path.join(tmp, "results.db"))
+        store.log_request(_query())
+        store.get("fake", _query())
+        old = time.time() - 40 * 86400
+        store._conn.execute("INSERT INTO requests VALUES ('DEL', 'BOM', ?, ?)", (_query().departure_date.isoformat(), old))
+        store._conn.execute("INSERT INTO lookups VALUES ('fake', 0, NULL, ?)", (old,))
+        store._conn.execute("INSERT INTO results VALUES ('fake', 'DEL', 'BLR', '2020-01-01', '{}', ?, 'refresh')", (old,))
+        assert store.prune(30 * 86400) == {"requests": 1, "lookups": 1, "results": 1}
+        assert store.hottest_routes() == [("DEL", "BLR", _query().departure_date)]
+        assert store.lookup_stats(window_seconds=50 * 86400)["lookups"] == 1
+        store.close()
+    print("  ✓ Logs pruned by age, past-date results dropped")
+
+
+def test_refresher_schedule():
+    """Each source keeps only what its budget covers, stalest first, and the hot list updates mid-pass"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(os.path.join(tmp, "results.db"))
+        routes = ["BLR", "BOM", "MAA", "CCU"]
+        for hits, to_city in enumerate(routes):
+            for _ in range(len(routes) - hits):
+                store.log_request(_query(to_city))
+        store.put("slow", _query("BLR"), ScraperResult(source="slow", success=True, flights=[]))
+        store._conn.execute("UPDATE results SET scraped_at=?", (time.time() - 3600,))
+
+        refresher.RATE_BUDGET_PER_HOUR["slow"] = 18   # 3 keys per 10-minute refresh window
+        try:
+            route_refresher = refresher.RouteRefresher(store=store, scrapers={"slow": _fake_scraper})
+            hot = route_refresher.update_hot()
+            assert route_refresher.capacity("slow") == 3
+            # BLR has (old) data, BOM and MAA have none; CCU is beyond the budget
+            assert [key[1] for key in route_refresher.due("slow", hot)] == ["BOM", "MAA", "BLR"]
+
+            async def scenario():
+                scraped = []
+
+                async def scraper(query):
+                    scraped.append(query.to_city)
+                    return await _fake_scraper(query)
+
+                route_refresher.scrapers = {"slow": scraper}
+                cycle_seconds = refresher.CYCLE_SECONDS
+                refresher.CYCLE_SECONDS = 0.05
+                refresher.RATE_BUDGET_PER_HOUR["slow"] = 3600 / 0.2   # one scrape every 0.2s
+                runner = asyncio.create_task(route_refresher.run_forever())
+                try:
+                    await asyncio.sleep(0.3)
+                    for _ in range(10):
+                        store.log_request(_query("GOI"))
+                    await asyncio.sleep(1.0)
+                finally:
+                    runner.cancel()
+                    refresher.CYCLE_SECONDS = cycle_seconds
+                    await asyncio.gather(runner, return_exceptions=True)
+                return scraped
+
+            history_dir = fare_history.FARE_HISTORY_DIR
+            fare_history.FARE_HISTORY_DIR = os.path.join(tmp, "fare_history")
+            try:
+                scraped = asyncio.run(scenario())
+            finally:
+                fare_history.FARE_HISTORY_DIR = history_dir
+        finally:
+            del refresher.RATE_BUDGET_PER_HOUR["slow"]
+        # The new hottest route was picked up without waiting for the pass to finish
+        assert "GOI" in scraped and scraped.index("GOI") < len(routes), scraped
+        store.close()
+    print("  ✓ Refresh limited to the budget, stalest first, hot list refreshed mid-pass")
+
+
+if __name__ == "__main__":
+    test_refresher_fills_store()
+    test_prune_bounds_logs()
+    test_refresher_schedule()
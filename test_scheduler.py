@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Offline test of search admission control (fake workloads, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agent.graph as graph
+from test_graph_routing import QUERY, fake_search
+from tools import scheduler
+from tools.scheduler import API, BACKGROUND, INTERACTIVE, AdmissionRejected, SearchScheduler
+
+
+def test_priority_and_tenant_fairness():
+    """Interactive before background; within a class the tenant holding fewer slots goes first"""
+    print("=" * 80)
+    print("TESTING ADMISSION CONTROL")
+    print("=" * 80)
+
+    order = []
+
+    async def search(sched, name, tenant, priority, slots=1, hold=0.02):
+        async with sched.admit(tenant, priority, slots):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        sched = SearchScheduler(slots=2)
+        spike = asyncio.create_task(search(sched, "spike", "a", INTERACTIVE, slots=2, hold=0.05))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(search(sched, "a-refresh", "a", BACKGROUND)),
+            asyncio.create_task(search(sched, "a-api", "a", API)),
+            asyncio.create_task(search(sched, "a-1", "a", INTERACTIVE)),
+            asyncio.create_task(search(sched, "a-2", "a", INTERACTIVE)),
+            asyncio.create_task(search(sched, "b-1", "b", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        depth = sched.stats()["classes"][INTERACTIVE]["queued"]
+        await asyncio.gather(spike, *queued)
+        return sched, depth
+
+    sched, depth = asyncio.run(scenario())
+    assert depth == 3
+    assert order == ["spike", "a-1", "b-1", "a-2", "a-api", "a-refresh"]
+    stats = sched.stats()
+    assert stats["in_use"] == 0 and stats["tenants"] == {}
+    assert stats["classes"][BACKGROUND]["max_wait"] > stats["classes"][INTERACTIVE]["avg_wait"]
+    print("  ✓ Classes served in priority order, tenants interleaved within a class")
+
+
+def test_queue_limits_reject():
+    """Requests time out in the queue, and are turned away at once when the wait is predictable"""
+    async def attempt(sched, priority, outcomes):
+        started = time.monotonic()
+        try:
+            async with sched.admit("t", priority):
+                outcomes.append((priority, "admitted", time.monotonic() - started))
+        except AdmissionRejected as e:
+            outcomes.append((priority, e.reason, time.monotonic() - started))
+
+    async def scenario():
+        sched = SearchScheduler(slots=1, queue_limits={INTERACTIVE: 0.1, API: 0.05}, max_queue=1)
+        outcomes = []
+        async with sched.admit("t", INTERACTIVE):
+            await attempt(sched, INTERACTIVE, outcomes)      # waits out its 0.1s limit
+        async with sched.admit("t", INTERACTIVE):
+            await attempt(sched, API, outcomes)              # expected ~0.1s > 0.05s limit: instant
+
+        # No finished search yet, so no estimate: only the queue depth limits
+        fresh = SearchScheduler(slots=1, max_queue=1)
+        async with fresh.admit("t", INTERACTIVE):
+            waiting = asyncio.create_task(attempt(fresh, INTERACTIVE, outcomes))
+            await asyncio.sleep(0)
+            await attempt(fresh, INTERACTIVE, outcomes)      # class queue full: instant
+        await waiting
+        return sched, fresh, outcomes
+
+    sched, fresh, outcomes = asyncio.run(scenario())
+    timed_out, expected, full, admitted = outcomes
+    assert timed_out[1].startswith("no slot") and timed_out[2] >= 0.1
+    assert expected[0] == API and expected[1].startswith("expected wait") and expected[2] < 0.02
+    assert full[1] == "queue full" and full[2] < 0.02
+    assert admitted[1] == "admitted"
+    assert sched.counts[f"{INTERACTIVE}:rejected:timed_out"] == 1 and sched.counts[f"{API}:rejected:expected_wait"] == 1
+    assert fresh.stats()["classes"][INTERACTIVE]["rejected"] == 1 and sched.in_use == fresh.in_use == 0
+    print("  ✓ Queue-time limits enforced, predictable overloads rejected fast")
+
+
+def test_searches_admitted_by_scheduler():
+    """run_flight_search holds a slot for the whole search"""
+    with tempfile.TemporaryDirectory() as tmp, fake_search(tmp, QUERY):
+        saved, scheduler._SCHEDULER = scheduler._SCHEDULER, SearchScheduler(slots=1)
+        try:
+            async def spike():
+                return await asyncio.gather(*(
+                    graph.run_flight_search("delhi to chennai", warm_up=False, tenant=f"key-{i}", priority=API)
+                    for i in range(3)))
+
+            results = asyncio.run(spike())
+            stats = scheduler._SCHEDULER.stats()
+        finally:
+            scheduler._SCHEDULER = saved
+    assert all(result.total_results == 3 for result in results)
+    assert stats["classes"][API]["admitted"] == 3 and stats["in_use"] == 0
+    print("  ✓ Concurrent searches admitted one at a time under a one-slot budget")
+
+
+if __name__ == "__main__":
+    test_priority_and_tenant_fairness()
+    test_queue_limits_reject()
+    test_searches_admitted_by_scheduler()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Offline test of the self-tuning selector registry (no browser needed)
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.selector_registry import FLAG_AFTER_RUNS, SelectorRegistry
+
+
+def _stats(**strategies):
+    """Page-side stats for one field: name=(hits, misses)"""
+    field = {name: {"hits": h, "misses": m, "ms": 1.0} for name, (h, m) in strategies.items()}
+    field["__allMissed"] = 0 if any(h for h, _ in strategies.values()) else 1
+    return field
+
+
+def test_registry_learns_order_and_flags_misses():
+    """The strategy that keeps hitting moves to the front; a field where everything misses gets flagged"""
+    print("=" * 80)
+    print("TESTING SELECTOR REGISTRY")
+    print("=" * 80)
+
+    defaults = {"airline": ["airlineName", "dataTest", "cardText"]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "registry.json")
+        registry = SelectorRegistry(path)
+        assert registry.order("makemytrip", defaults) == defaults
+
+        # Markup changed: the class selector misses, the text fallback carries every card
+        for _ in range(3):
+            registry.record("makemytrip", {"airline": _stats(airlineName=(0, 5), dataTest=(0, 5), cardText=(5, 0))})
+        order = registry.order("makemytrip", defaults)["airline"]
+        print(f"  Learned order: {order}")
+        assert order[0] == "cardText" and order[-1] in ("airlineName", "dataTest")
+
+        # Persisted across processes
+        assert SelectorRegistry(path).order("makemytrip", defaults)["airline"] == order
+
+        flagged = []
+        for _ in range(FLAG_AFTER_RUNS):
+            flagged = registry.record("makemytrip", {"airline": _stats(airlineName=(0, 5), cardText=(0, 5))})
+        assert flagged == ["airline"]
+
+        # One good run clears the flag
+        assert registry.record("makemytrip", {"airline": _stats(cardText=(5, 0))}) == []
+    print("  ✓ Best strategy is tried first and dead fields are flagged")
+
+
+if __name__ == "__main__":
+    test_registry_learns_order_and_flags_misses()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline test of speculative session warm-up (fake sessions, no browser needed)
+"""
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.scrapers.session import BrowserSession, SessionWarmup
+
+
+class _FakeSession(BrowserSession):
+    def __init__(self, source, fail_warm=False):
+        super().__init__(source, source.upper(), f"https://{source}.example.com/")
+        self.fail_warm = fail_warm
+        self.closed = False
+
+    async def warm(self):
+        if self.fail_warm:
+            raise RuntimeError("warm-up blew up")
+        self.warmed = True
+
+    async def close(self):
+        self.closed = True
+
+
+def _openers(opened, slow=(), broken=(), cold=()):
+    """Openers that record every session they open; `slow` ones never finish, `broken` ones raise"""
+    def opener(source):
+        async def open_():
+            if source in slow:
+                await asyncio.sleep(60)
+            if source in broken:
+                raise RuntimeError("launch failed")
+            session = _FakeSession(source, fail_warm=source in cold)
+            opened[source] = session
+            return session
+        return open_
+    return {source: opener(source) for source in ("mmt", "ixigo", "cleartrip", "emt")}
+
+
+def test_take_hands_over_warm_sessions():
+    """take() returns each source's warmed session once; failed warm-ups leave the scraper to launch its own"""
+    print("=" * 80)
+    print("TESTING SESSION WARM-UP")
+    print("=" * 80)
+
+    opened = {}
+
+    async def scenario():
+        warmup = SessionWarmup(_openers(opened, broken={"ixigo"}, cold={"emt"}))
+        warmup.start()
+        warmup.start()      # idempotent: no second browser per source
+        mmt = await warmup.take("mmt")
+        results = (mmt, await warmup.take("mmt"), await warmup.take("ixigo"),
+                   await warmup.take("emt"), await warmup.take("unknown"))
+        await warmup.cancel()
+        return results
+
+    mmt, again, broken, cold, unknown = asyncio.run(scenario())
+    assert mmt is opened["mmt"] and mmt.warmed and not mmt.closed
+    assert again is None and broken is None and unknown is None
+    # A session whose warm-up raised is closed, not handed over half-open
+    assert cold is None and opened["emt"].closed
+    # Nobody took Cleartrip's session, so cancel() closed it
+    assert opened["cleartrip"].closed
+    print("  ✓ Warm sessions taken once, failures fall back to the scraper")
+
+
+def test_cancel_closes_untaken_sessions():
+    """cancel(sources) stops pending warm-ups and closes finished ones, leaving other sources alone"""
+    opened = {}
+
+    async def scenario():
+        warmup = SessionWarmup(_openers(opened, slow={"ixigo"}))
+        warmup.start()
+        await asyncio.sleep(0.05)       # everything but ixigo has finished warming
+        await asyncio.wait_for(warmup.cancel(["ixigo", "cleartrip"]), 1.0)
+        taken = await warmup.take("mmt"), await warmup.take("ixigo"), await warmup.take("cleartrip")
+        await warmup.cancel()
+        return taken
+
+    mmt, ixigo, cleartrip = asyncio.run(scenario())
+    assert mmt is opened["mmt"] and not mmt.closed
+    assert ixigo is None and "ixigo" not in opened     # cancelled before its browser existed
+    assert cleartrip is None and opened["cleartrip"].closed
+    assert opened["emt"].closed
+    print("  ✓ Cancelled warm-ups closed, selected sources only")
+
+
+if __name__ == "__main__":
+    test_take_hands_over_warm_sessions()
+    test_cancel_closes_untaken_sessions()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline test of streaming card extraction (fake page, no browser needed)
+"""
+import asyncio
+import contextvars
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import Flight
+from tools.deadline import PARTIAL, run_within
+from tools.scrapers.streaming import BINDING_NAME, CardStream
+
+
+class _FakePage:
+    def __init__(self):
+        self.bindings = {}
+        self.scripts = []
+        self.evaluated = []
+
+    async def expose_function(self, name, fn):
+        self.bindings[name] = fn
+
+    async def add_init_script(self, script):
+        self.scripts.append(script)
+
+    async def evaluate(self, script):
+        self.evaluated.append(script)
+
+
+def _flight(data):
+    return Flight(airline=data["airline"], price=data["price"], booking_url="u", source="fake")
+
+
+def test_stream_stops_observer():
+    """The binding tells the page to stop once the stream is full, and wait() disconnects the observer"""
+    print("=" * 80)
+    print("TESTING STREAMING CARD EXTRACTION")
+    print("=" * 80)
+
+    async def scenario():
+        page = _FakePage()
+        stream = CardStream("TEST", to_flight=_flight, key=lambda d: d["code"], max_cards=2)
+        await stream.attach(page, ".card", "(card) => null")
+        push = page.bindings[BINDING_NAME]
+        assert push({"code": "a", "airline": "IndiGo", "price": 4200}) is True
+        assert push({"code": "a", "airline": "IndiGo", "price": 4200}) is True    # duplicate, still streaming
+        assert push({"code": "b", "airline": "Vistara", "price": "n/a"}) is True  # invalid, dropped
+        assert push({"code": "c", "airline": "Vistara", "price": 3900}) is False  # full: stop the observer
+        assert push({"code": "d", "airline": "Akasa", "price": 3100}) is False
+        cards = await stream.wait(timeout=1.0)
+        return page, stream, cards
+
+    page, stream, cards = asyncio.run(scenario())
+    assert [card["code"] for card in cards] == ["a", "c"] and len(stream.flights) == 2
+    assert "__flightCardStream.stop()" in page.evaluated[-1]
+    assert "observer.disconnect()" in page.scripts[0]
+    print("  ✓ Finished stream stops its in-page observer")
+
+
+def test_stream_publishes_to_scrape_deadline():
+    """Cards pushed from Playwright's binding task (launch-time context) reach the scrape's deadline sink"""
+    async def scenario():
+        page = _FakePage()
+        # Playwright's connection task was created before any deadline, e.g. by a warm-up
+        launch_context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+
+        async def scrape():
+            stream = CardStream("TEST", to_flight=_flight, key=lambda d: d["code"])
+            await stream.attach(page, ".card", "(card) => null")
+            push = page.bindings[BINDING_NAME]
+            binding = loop.create_task(_call(push, {"code": "a", "airline": "IndiGo", "price": 4200}),
+                                       context=launch_context)
+            await binding
+            await asyncio.sleep(10)
+
+        return await run_within("fake", scrape, timeout=0.2)
+
+    async def _call(push, data):
+        return push(data)
+
+    result, status = asyncio.run(scenario())
+    assert status == PARTIAL and [f.price for f in result.flights] == [4200]
+    print("  ✓ Streamed cards from another context land in the scrape's partial result")
+
+
+if __name__ == "__main__":
+    test_stream_stops_observer()
+    test_stream_publishes_to_scrape_deadline()
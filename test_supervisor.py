@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Offline test of the browser process supervisor (marked stand-in processes, no Chromium needed)
+"""
+import asyncio
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.scrapers import processes, supervisor
+from tools.scrapers.supervisor import BrowserSupervisor
+
+
+class _Lease:
+    def __init__(self, path):
+        self.path = path
+
+
+class _Session:
+    def __init__(self, browser_id, profile):
+        self.browser_id = browser_id
+        self.source = "fake"
+        self.lease = _Lease(profile)
+
+
+def _launch(tmp, browser_id):
+    """A marked stand-in browser plus a profile holding Chromium's lock files"""
+    profile = os.path.join(tmp, browser_id)
+    os.makedirs(profile)
+    for name in ("SingletonLock", "SingletonSocket"):
+        open(os.path.join(profile, name), "w").close()
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", processes.marker_arg(browser_id)])
+    return proc, _Session(browser_id, profile)
+
+
+def test_leaked_browsers_reaped():
+    """Browsers outliving their close or their owner are killed; healthy ones are left alone"""
+    print("=" * 80)
+    print("TESTING BROWSER SUPERVISOR")
+    print("=" * 80)
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = os.path.join(tmp, "browsers.db")
+        sup = BrowserSupervisor(registry)
+        launched = {name: _launch(tmp, name) for name in ("orphan", "unclosed", "healthy", "exited")}
+        procs = list(proc for proc, _ in launched.values())
+        try:
+            time.sleep(0.3)
+            for _, session in launched.values():
+                asyncio.run(sup.register(session))
+            assert sup.report()["tracked"] == 4
+
+            # Owner crashed: its pid is gone
+            sup._conn.execute("UPDATE browsers SET owner_pid=? WHERE browser_id='orphan'", (dead.pid,))
+            # close() gave up and Chromium kept running past the grace period
+            sup.closed("unclosed")
+            sup._conn.execute("UPDATE browsers SET closed_at=closed_at - 60 WHERE browser_id='unclosed'")
+            # Closed and actually exited
+            launched["exited"][0].kill()
+            launched["exited"][0].wait()
+            sup.closed("exited")
+
+            assert sup.sweep() == {"owner_gone": 1, "outlived_close": 1}
+            for name in ("orphan", "unclosed"):
+                assert launched[name][0].wait(timeout=5) != 0
+                assert not os.listdir(launched[name][1].lease.path)      # lock files removed
+            assert launched["healthy"][0].poll() is None
+            assert os.listdir(launched["healthy"][1].lease.path)
+            assert sup.report()["tracked"] == 1                          # exited row forgotten
+            print("  ✓ Orphaned and unclosed browsers reaped, healthy one untouched")
+
+            time.sleep(1.1)
+            assert BrowserSupervisor(registry, max_age=0.5).sweep() == {"max_age": 1}
+            assert launched["healthy"][0].wait(timeout=5) != 0
+            report = sup.report()
+            assert report["leaks"] == {"owner_gone": 1, "outlived_close": 1, "max_age": 1}
+            assert report["killed_processes"] == 3 and report["lock_files_removed"] == 6
+            assert report["tracked"] == 0
+            print("  ✓ Browser past its max age reaped, leaks reported by reason")
+        finally:
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+            sup.close()
+
+
+def test_recorded_tree_catches_reparented_children():
+    """Children whose root already exited are found through the recorded process tree"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sup = BrowserSupervisor(os.path.join(tmp, "browsers.db"))
+        # The stand-in "renderer" has no marker; it is only known from the registry
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)  # chromium renderer"])
+        try:
+            time.sleep(0.2)
+            asyncio.run(sup.register(_Session("gone-root", None)))
+            sup.closed("gone-root")
+            sup._conn.execute("UPDATE browsers SET pids_json=?, closed_at=closed_at - 60 WHERE browser_id='gone-root'",
+                              (f"[{child.pid}]",))
+            assert sup.sweep() == {"outlived_close": 1}
+            assert child.wait(timeout=5) != 0
+        finally:
+            if child.poll() is None:
+                child.kill()
+                child.wait()
+            sup.close()
+    print("  ✓ Reparented children reaped from the recorded tree")
+
+
+def test_foreign_and_managed_browsers_spared():
+    """Unregistered browsers under a live Python process and managed browsers past max age aren't killed"""
+    procs = {
+        1: processes.ProcInfo(1, 0, 0, 900, "/sbin/init"),
+        10: processes.ProcInfo(10, 1, 0, 90, "/usr/bin/python3 main.py"),
+        11: processes.ProcInfo(11, 10, 0, 90, "node cli.js run-driver"),
+        12: processes.ProcInfo(12, 11, 0, 90, "chrome --flight-browser-id=a"),
+        20: processes.ProcInfo(20, 1, 0, 90, "chrome --flight-browser-id=b"),
+    }
+    assert supervisor._python_owned(procs, 12) and not supervisor._python_owned(procs, 20)
+
+    class _Manager:
+        retired = []
+
+        async def retire(self, browser_id, reason):
+            self.retired.append((browser_id, reason))
+            return True
+
+    from tools.scrapers import browser_manager
+    saved = supervisor.UNREGISTERED_GRACE, browser_manager._MANAGER
+    with tempfile.TemporaryDirectory() as tmp:
+        sup = BrowserSupervisor(os.path.join(tmp, "browsers.db"), max_age=0.5)
+        # Child of this (Python) process: launched by an agent using another registry
+        foreign, _ = _launch(tmp, "foreign")
+        managed, session = _launch(tmp, "managed")
+        try:
+            supervisor.UNREGISTERED_GRACE = 0
+            browser_manager._MANAGER = _Manager()
+            time.sleep(0.2)
+            asyncio.run(sup.register(session))
+            sup.managed("managed")
+            time.sleep(1.1)
+            assert sup.sweep() == {}
+            assert foreign.poll() is None and managed.poll() is None
+            assert sup.retire_due == ["managed"]
+            assert asyncio.run(sup.retire_old()) == 1
+            assert _Manager.retired == [("managed", "max_age")] and sup.retire_due == []
+        finally:
+            supervisor.UNREGISTERED_GRACE, browser_manager._MANAGER = saved
+            for proc in (foreign, managed):
+                proc.kill()
+                proc.wait()
+            sup.close()
+    print("  ✓ Foreign browsers left alone, managed browser past max age retired by its manager")
+
+
+if __name__ == "__main__":
+    test_leaked_browsers_reaped()
+    test_recorded_tree_catches_reparented_children()
+    test_foreign_and_managed_browsers_spared()
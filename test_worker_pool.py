@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Offline test of the multi-process scrape workers (fake scrapers, no browser needed)
+"""
+import asyncio
+import sys
+import os
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.schema import FlightQuery, Flight, ScraperResult
+from tools.deadline import PARTIAL, publish_partial, run_within
+from tools.worker_pool import ScrapeWorkerPool
+
+
+async def _fake_scraper(query):
+    return ScraperResult(
+        source="fake",
+        success=True,
+        flights=[Flight(airline="IndiGo", price=4500.0, booking_url="https://example.com",
+                        source=f"fake-{os.getpid()}")]
+    )
+
+
+async def _crashing_scraper(query):
+    os._exit(1)
+
+
+async def _slow_scraper(query):
+    """Publishes one card, then would take a minute for the rest"""
+    publish_partial([Flight(airline="Akasa", price=3900.0, booking_url="https://example.com", source="slow")])
+    await asyncio.sleep(60)
+
+
+FAKE_SCRAPERS = {"fake": _fake_scraper, "crash": _crashing_scraper, "slow": _slow_scraper}
+
+
+def _query(to_city="BLR"):
+    return FlightQuery(
+        from_city="DEL",
+        to_city=to_city,
+        departure_date=date.today() + timedelta(days=3),
+        raw_query="test"
+    )
+
+
+def test_workers_scrape_and_survive_crash():
+    """Jobs run in worker processes; a crashing worker fails only its own job"""
+    print("=" * 80)
+    print("TESTING SCRAPE WORKER POOL")
+    print("=" * 80)
+
+    pool = ScrapeWorkerPool(processes=2, scrapers_ref="test_worker_pool:FAKE_SCRAPERS")
+    try:
+        jobs = [("fake", _query(city)) for city in ("BLR", "BOM", "MAA", "HYD")]
+        results = asyncio.run(pool.scrape_many(jobs))
+        assert all(r.success and r.flights[0].price == 4500.0 for r in results)
+        worker_pids = {r.flights[0].source for r in results}
+        assert f"fake-{os.getpid()}" not in worker_pids
+        print(f"  Ran {len(results)} jobs in workers: {sorted(worker_pids)}")
+
+        crashed = asyncio.run(pool.scrape("crash", _query()))
+        assert not crashed.success and "crashed" in crashed.error
+        assert pool.stats["crashes"] == 1
+
+        # The crashed shard comes back on the next job
+        again = asyncio.run(pool.scrape_many([("fake", _query(city)) for city in ("BLR", "BOM", "MAA", "HYD")]))
+        assert all(r.success for r in again)
+    finally:
+        pool.close()
+    print("  ✓ Worker crash isolated and shard restarted")
+
+
+def test_deadline_cancels_worker_scrape():
+    """A pooled scrape cut off at its deadline returns the worker's partials and frees its shard"""
+    pool = ScrapeWorkerPool(processes=1, scrapers_ref="test_worker_pool:FAKE_SCRAPERS")
+    try:
+        # Start the worker first so the deadline isn't spent spawning it
+        assert asyncio.run(pool.scrape("fake", _query())).success
+
+        async def scenario():
+            result, status = await run_within("slow", lambda: pool.scrape("slow", _query()), timeout=2.0)
+            started = time.monotonic()
+            after = await pool.scrape("fake", _query())
+            return result, status, after, time.monotonic() - started
+
+        result, status, after, waited = asyncio.run(scenario())
+        assert status == PARTIAL and [f.price for f in result.flights] == [3900.0]
+        # The single worker is free again, not still sleeping in the slow scrape
+        assert after.success and waited < 10, waited
+        assert pool.stats["cancelled"] == 1
+    finally:
+        pool.close()
+    print("  ✓ Deadline cancelled the worker's scrape and returned its partial flights")
+
+
+if __name__ == "__main__":
+    test_workers_scrape_and_survive_crash()
+    test_deadline_cancels_worker_scrape()
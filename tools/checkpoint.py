@@ -0,0 +1,129 @@
+"""
+Search Checkpoints
+- SQLite (WAL) copy of a search's AgentState, saved after every graph node - so after each
+  source's scrape - and keyed by a caller-chosen search ID
+- Running a search again under the same ID resumes it: the parse is skipped once the query was
+  parsed, and sources that already finished (complete, partial or cached) are not scraped again
+- Failed and timed-out sources are retried on resume; everything else comes from the checkpoint
+
+Job queue workers checkpoint each job as "job-<id>", so a job whose worker died or restarted
+picks up where it stopped instead of redoing finished browser work:
+    python main.py --search-id sweep-42 "Flight from delhi to chennai on 12 March"
+    python -m tools.checkpoint list
+    python -m tools.checkpoint prune --days 7
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from agent.state import AgentState
+
+CHECKPOINT_PATH = os.environ.get("FLIGHT_CHECKPOINTS", "./flight_checkpoints.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    search_id TEXT PRIMARY KEY,
+    user_query TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    state_json TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_open ON checkpoints (done, updated_at);
+"""
+
+_STATE = TypeAdapter(AgentState)
+
+
+class CheckpointStore:
+    """Latest state per search ID (WAL mode, safe across processes)"""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def save(self, search_id: str, state: AgentState, node: str, done: bool = False) -> None:
+        """Replace the search's checkpoint with the state after `node`"""
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO checkpoints (search_id, user_query, step, node, state_json, done, created_at, updated_at) "
+            "VALUES (?, ?, 1, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (search_id) DO UPDATE SET user_query=excluded.user_query, step=step + 1, "
+            "node=excluded.node, state_json=excluded.state_json, done=excluded.done, updated_at=excluded.updated_at",
+            (search_id, state["user_query"], node, _STATE.dump_json(state).decode(), int(done), now, now)
+        )
+
+    def load(self, search_id: str) -> Optional[AgentState]:
+        """State of the last completed step, or None for a new search ID"""
+        row = self._conn.execute(
+            "SELECT state_json FROM checkpoints WHERE search_id=?", (search_id,)
+        ).fetchone()
+        return _STATE.validate_json(row[0]) if row else None
+
+    def info(self, search_id: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT search_id, user_query, step, node, done, created_at, updated_at FROM checkpoints "
+            "WHERE search_id=?", (search_id,)
+        ).fetchone()
+        return dict(zip(("search_id", "user_query", "step", "node", "done", "created_at", "updated_at"), row)) if row else None
+
+    def unfinished(self, limit: int = 50) -> List[Dict]:
+        """Searches that stopped before reaching the end of the graph, most recent first"""
+        rows = self._conn.execute(
+            "SELECT search_id, user_query, step, node, updated_at FROM checkpoints "
+            "WHERE done=0 ORDER BY updated_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(zip(("search_id", "user_query", "step", "node", "updated_at"), row)) for row in rows]
+
+    def delete(self, search_id: str) -> bool:
+        return self._conn.execute("DELETE FROM checkpoints WHERE search_id=?", (search_id,)).rowcount > 0
+
+    def prune(self, max_age: float) -> int:
+        """Drop checkpoints not updated for `max_age` seconds; returns how many"""
+        return self._conn.execute(
+            "DELETE FROM checkpoints WHERE updated_at < ?", (time.time() - max_age,)
+        ).rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_STORE: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Process-wide store, opened on first use"""
+    global _STORE
+    if _STORE is None:
+        _STORE = CheckpointStore()
+    return _STORE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search checkpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Searches that stopped part-way")
+    prune = sub.add_parser("prune", help="Drop old checkpoints")
+    prune.add_argument("--days", type=float, default=7)
+    args = parser.parse_args()
+
+    store = CheckpointStore()
+    if args.command == "list":
+        for search in store.unfinished():
+            print(f"[CHECKPOINT] ⏸️ {search['search_id']}: after {search['node']} (step {search['step']}) - {search['user_query']}")
+    elif args.command == "prune":
+        print(f"[CHECKPOINT] 🧹 Dropped {store.prune(args.days * 86400)} checkpoints")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+In-Flight Search Coalescing
+- Concurrent scrapes for the same normalized (source, from, to, date) and filters share one browser run
+- The first caller starts the scrape, later callers await the same task
+- Cancellation is reference-counted: the shared scrape is only cancelled once every caller has gone
+- The shared scrape navigates at the highest rate-limit priority of its callers, so an interactive
+  search joining a background scrape isn't throttled as background work
+- Flights the scrape publishes go to a buffer on the entry; every caller cut off by its own
+  deadline gets them as its partial result
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models.schema import Flight, FlightQuery, ScraperResult
+from tools.deadline import collect_partial, follow_partial
+from tools.rate_limit import SharedPriority, current_priority, shared_priority
+from tools.result_store import route_key
+
+
+class _InFlight:
+    def __init__(self, level: str):
+        self.task: Optional[asyncio.Task] = None
+        self.refs = 0
+        self.priority = SharedPriority(level)
+        self.partial: List[Flight] = []   # published so far by the shared scrape
+
+
+class SearchCoalescer:
+    """Shares in-flight scrapes between callers on the same event loop"""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple, _InFlight] = {}
+        self.stats = {"started": 0, "joined": 0, "cancelled": 0}
+
+    async def run(self, source: str, query: FlightQuery,
+                  scrape: Callable[[], Awaitable[ScraperResult]]) -> ScraperResult:
+        # Filtered scrapes return a subset, so they only join scrapes with the same filters
+        key = (source,) + route_key(query) + (json.dumps(query.filters(), sort_keys=True),)
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = _InFlight(current_priority())
+            entry.task = asyncio.ensure_future(self._shared(entry, scrape))
+            self._inflight[key] = entry
+            entry.task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+            self.stats["started"] += 1
+        else:
+            self.stats["joined"] += 1
+            entry.priority.raise_to(current_priority())
+            print(f"[COALESCE] 🔗 {source}: joining in-flight scrape for {key[1]} → {key[2]} on {key[3]}")
+
+        follow_partial(entry.partial)
+        entry.refs += 1
+        try:
+            # shield: one caller being cancelled must not cancel the shared task
+            return await asyncio.shield(entry.task)
+        finally:
+            entry.refs -= 1
+            if entry.refs == 0 and not entry.task.done():
+                # Last interested caller left - nobody is waiting for this scrape any more
+                self.stats["cancelled"] += 1
+                entry.task.cancel()
+
+    @staticmethod
+    async def _shared(entry: _InFlight, scrape: Callable[[], Awaitable[ScraperResult]]) -> ScraperResult:
+        # Runs in the first caller's context copy - rebind what must follow every caller, not just it
+        with shared_priority(entry.priority), collect_partial(entry.partial):
+            return await scrape()
+
+    def _forget(self, key: Tuple, entry: _InFlight) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+_COALESCER: Optional[SearchCoalescer] = None
+
+
+def get_coalescer() -> SearchCoalescer:
+    global _COALESCER
+    if _COALESCER is None:
+        _COALESCER = SearchCoalescer()
+    return _COALESCER
@@ -0,0 +1,151 @@
+"""
+Deadline-Aware Search
+- A caller-specified latency budget for the whole search ("best answer in 15 seconds")
+- Each source gets a share of what is left of the budget when its turn comes, so time a fast
+  source doesn't use rolls over to the next one
+- Scrapers publish flights as they collect them (publish_partial), so a source that is cut off
+  at its deadline still contributes the cards it already had
+- Cut-off scrapes are cancelled; their sessions close through the scrapers' normal cleanup
+
+    budget = SearchBudget(time.time() + 15, ["makemytrip", "cleartrip", "easemytrip"])
+    result, status = await run_within("makemytrip", lambda: scrape(...), budget.share("makemytrip"))
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from models.schema import Flight, ScraperResult
+
+COMPARE_RESERVE = 0.25   # seconds kept back for aggregation after the last source
+
+# Per-source status recorded on ComparisonResult.source_status
+COMPLETE, PARTIAL, TIMED_OUT, FAILED, CACHED = "complete", "partial", "timed_out", "failed", "cached"
+
+
+class _Sink:
+    def __init__(self, flights: Optional[List[Flight]] = None):
+        self.flights = [] if flights is None else flights
+
+    def publish(self, flights: Iterable[Flight]) -> None:
+        self.flights.extend(flights)
+
+
+class _Forward(_Sink):
+    def __init__(self, forward: Callable[[List[Flight]], None]):
+        super().__init__()
+        self._forward = forward
+
+    def publish(self, flights: Iterable[Flight]) -> None:
+        flights = list(flights)
+        self.flights.extend(flights)
+        self._forward(flights)
+
+
+# Flights collected so far by the scrape running in this context (None outside run_within)
+_PARTIAL: ContextVar[Optional[_Sink]] = ContextVar("flight_partial", default=None)
+
+
+def publish_partial(flights: Iterable[Flight]) -> None:
+    """Called by scrapers as cards arrive; a no-op unless the scrape runs under a deadline"""
+    sink = _PARTIAL.get()
+    if sink is not None:
+        sink.publish(flights)
+
+
+def partial_publisher() -> Callable[[Iterable[Flight]], None]:
+    """
+    publish_partial bound to this context's sink, for callbacks that run in another context
+
+    Playwright runs exposed bindings in tasks spawned from its connection task, which carries the
+    context the browser was launched in - not the scrape's - so capture the sink up front.
+    """
+    sink = _PARTIAL.get()
+    return sink.publish if sink is not None else _discard
+
+
+def _discard(flights: Iterable[Flight]) -> None:
+    pass
+
+
+@contextmanager
+def collect_partial(flights: List[Flight]) -> Iterator[None]:
+    """Flights published inside this block go to `flights` (a buffer shared by several callers)"""
+    token = _PARTIAL.set(_Sink(flights))
+    try:
+        yield
+    finally:
+        _PARTIAL.reset(token)
+
+
+@contextmanager
+def forward_partial(publish: Callable[[List[Flight]], None]) -> Iterator[None]:
+    """Flights published inside this block are handed to `publish` (a worker sends them to its coordinator)"""
+    token = _PARTIAL.set(_Forward(publish))
+    try:
+        yield
+    finally:
+        _PARTIAL.reset(token)
+
+
+def follow_partial(flights: List[Flight]) -> None:
+    """If this context runs under a deadline, its partial result is whatever lands in `flights`"""
+    sink = _PARTIAL.get()
+    if sink is not None:
+        sink.flights = flights
+
+
+class SearchBudget:
+    """Splits a wall-clock deadline between the sources still to be scraped"""
+
+    def __init__(self, deadline: float, sources: List[str]):
+        self.deadline = deadline   # wall clock (time.time()), so it can travel in graph state
+        self._pending = list(sources)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.time())
+
+    def share(self, source: str) -> float:
+        """Seconds `source` may take: an equal split of what's left over the sources not yet run"""
+        pending = max(1, len(self._pending))
+        if source in self._pending:
+            self._pending.remove(source)
+        return max(0.0, self.remaining() - COMPARE_RESERVE) / pending
+
+
+async def run_within(source: str, scrape: Callable[[], Awaitable[ScraperResult]],
+                     timeout: Optional[float]) -> Tuple[Optional[ScraperResult], str]:
+    """
+    Run one source's scrape with a timeout; returns (result, status)
+
+    On timeout the scrape is cancelled and whatever it published becomes a partial result.
+    """
+    sink = _Sink()
+    token = _PARTIAL.set(sink)
+    try:
+        # The task copies the current context, so the scraper publishes into `sink`
+        # (or points it at a shared buffer, see follow_partial)
+        task = asyncio.ensure_future(scrape())
+    finally:
+        _PARTIAL.reset(token)
+
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if task in done:
+        result = task.result()
+        return result, COMPLETE if result and result.success else FAILED
+
+    # Cancel without waiting: browser teardown must not eat into the next source's share
+    task.cancel()
+    task.add_done_callback(_drain)
+    if sink.flights:
+        print(f"[DEADLINE] ⏱️ {source}: cut off after {timeout:.1f}s with {len(sink.flights)} flights so far")
+        return ScraperResult.from_flights(source, list(sink.flights)), PARTIAL
+    print(f"[DEADLINE] ⏱️ {source}: cut off after {timeout:.1f}s with no flights")
+    return ScraperResult(source=source, success=False, error="Deadline reached", flights=[]), TIMED_OUT
+
+
+def _drain(task: asyncio.Task) -> None:
+    # Retrieve the outcome so a cancelled straggler's late error isn't reported as never retrieved
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,183 @@
+"""
+Streaming Result Export
+- Writes flights row by row as NDJSON, CSV or Parquet, so memory stays flat for any result size
+- Optional compression: gzip for NDJSON/CSV, any Parquet codec (zstd by default) for Parquet
+- "-" as the path streams to stdout for piping
+
+    export_flights(result.all_flights, "flights.ndjson.gz")
+    export_flights(flights_iter, "-", fmt="csv")
+"""
+import csv
+import gzip
+import io
+import os
+import sys
+import typing
+from datetime import datetime
+from typing import IO, Iterable, Iterator, Optional
+
+from models.schema import Flight
+
+FORMATS = ("ndjson", "csv", "parquet")
+PARQUET_BATCH_ROWS = 10_000
+
+COLUMNS = list(Flight.model_fields)
+
+
+def infer_format(path: str) -> str:
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for fmt, extensions in (("ndjson", (".ndjson", ".jsonl")), ("csv", (".csv",)), ("parquet", (".parquet",))):
+        if name.endswith(extensions):
+            return fmt
+    raise ValueError(f"Can't tell the export format from '{path}' - pass fmt= ({', '.join(FORMATS)})")
+
+
+def _row(flight: Flight) -> dict:
+    row = flight.model_dump()
+    row["scraped_at"] = flight.scraped_at.isoformat()
+    return row
+
+
+def _open_binary(path: str) -> IO[bytes]:
+    return sys.stdout.buffer if path == "-" else open(path, "wb")
+
+
+def _open_text(path: str, compression: Optional[str]) -> IO[str]:
+    raw = _open_binary(path)
+    if compression == "gzip":
+        raw = gzip.GzipFile(fileobj=raw, mode="wb")
+    elif compression:
+        raise ValueError(f"Unsupported compression for text formats: {compression} (use gzip)")
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+
+def _write_ndjson(flights: Iterator[Flight], path: str, compression: Optional[str]) -> int:
+    out = _open_text(path, compression)
+    count = 0
+    try:
+        for flight in flights:
+            out.write(flight.model_dump_json())
+            out.write("\n")
+            count += 1
+    except BaseException:
+        _abort_text(path, out)
+        raise
+    _finish_text(path, out)
+    return count
+
+
+def _write_csv(flights: Iterator[Flight], path: str, compression: Optional[str]) -> int:
+    out = _open_text(path, compression)
+    count = 0
+    try:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        writer.writeheader()
+        for flight in flights:
+            writer.writerow(_row(flight))
+            count += 1
+    except BaseException:
+        _abort_text(path, out)
+        raise
+    _finish_text(path, out)
+    return count
+
+
+def _finish_text(path: str, out: io.TextIOWrapper) -> None:
+    out.flush()
+    raw = out.detach()
+    if isinstance(raw, gzip.GzipFile):
+        inner = raw.fileobj
+        raw.close()          # writes the gzip trailer, leaves fileobj open
+        raw = inner
+    raw.flush()
+    if path != "-":
+        raw.close()
+
+
+def _abort_text(path: str, out: io.TextIOWrapper) -> None:
+    """Close after a failure without finishing: no gzip trailer, so the cut-off file fails integrity checks"""
+    raw = out.detach()
+    if isinstance(raw, gzip.GzipFile):
+        inner = raw.fileobj
+        raw.fileobj = None   # closing (or collecting) the GzipFile now writes nothing
+        raw = inner
+    if path != "-":
+        raw.close()
+
+
+def _arrow_schema(pa):
+    """Arrow schema for COLUMNS, from Flight's field annotations - a new field can't be dropped silently"""
+    types = {str: pa.string(), float: pa.float64(), int: pa.int64(), bool: pa.bool_(),
+             datetime: pa.timestamp("ms")}
+    fields = []
+    for name in COLUMNS:
+        annotation = Flight.model_fields[name].annotation
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+            annotation = args[0]   # Optional[X] -> nullable X
+        if annotation not in types:
+            raise TypeError(f"No Parquet type for Flight.{name} ({annotation}) - add it to the export type map")
+        fields.append((name, types[annotation]))
+    return pa.schema(fields)
+
+
+def _write_parquet(flights: Iterator[Flight], path: str, compression: Optional[str]) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = _arrow_schema(pa)
+    if path == "-":
+        # A second handle on fd 1 that can be closed without closing stdout (see the abort below)
+        sys.stdout.flush()
+        raw = os.fdopen(sys.stdout.fileno(), "wb", closefd=False)
+    else:
+        raw = open(path, "wb")
+    sink = pa.PythonFile(raw, mode="w")
+    count = 0
+    # Parquet is written sequentially (footer last), so a pipe works as well as a file
+    writer = pq.ParquetWriter(sink, schema, compression=compression or "zstd")
+    try:
+        batch = {name: [] for name in schema.names}
+        for flight in flights:
+            for name in schema.names:
+                batch[name].append(getattr(flight, name))
+            count += 1
+            if len(batch["price"]) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                batch = {name: [] for name in schema.names}
+        if batch["price"] or count == 0:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+    except BaseException:
+        # No footer: a cut-off export must not read back as a complete (shorter) file. pyarrow
+        # writes the footer when the writer is collected, so close the sink first to stop it
+        writer.is_open = False
+        sink.close()
+        raise
+    writer.close()
+    sink.close()
+    return count
+
+
+_WRITERS = {"ndjson": _write_ndjson, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_flights(flights: Iterable[Flight], path: str, fmt: Optional[str] = None,
+                   compression: Optional[str] = None) -> int:
+    """
+    Stream flights to `path` ("-" = stdout); returns the number of rows written
+
+    fmt defaults to the file extension; a trailing .gz on an NDJSON/CSV path turns on gzip.
+    """
+    fmt = fmt or infer_format(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}' (choose from {', '.join(FORMATS)})")
+    if compression is None and fmt != "parquet" and path.lower().endswith(".gz"):
+        compression = "gzip"
+    if compression == "none":
+        compression = None if fmt != "parquet" else "none"
+    return _WRITERS[fmt](iter(flights), path, compression)
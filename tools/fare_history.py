@@ -0,0 +1,203 @@
+"""
+Fare History Store
+- Appends every scraped Flight to zstd-compressed Parquet files
+- Hive-partitioned by route and departure month: fare_history/route=DEL-BLR/month=2026-03/
+- Queries push route/month down to partition pruning and the rest down to row-group statistics
+- compact() merges the many small per-scrape files into one file per partition
+
+Requires pyarrow (optional): pip install pyarrow
+"""
+import glob
+import os
+import time
+import uuid
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from models.schema import Flight, FlightQuery
+
+# pyarrow is loaded on first use (see _load_pyarrow) - it is slow to import and optional
+pa = ds = pq = None
+
+FARE_HISTORY_DIR = os.path.abspath(os.environ.get("FLIGHT_FARE_HISTORY_DIR", "./fare_history"))
+COMPRESSION = "zstd"
+
+_warned_missing = False
+_pyarrow_checked = False
+
+
+def _load_pyarrow() -> bool:
+    """Import pyarrow once; False when it isn't installed (history is optional - scraping works without it)"""
+    global pa, ds, pq, _pyarrow_checked
+    if not _pyarrow_checked:
+        _pyarrow_checked = True
+        try:
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+            import pyarrow.parquet as pq
+        except ImportError:
+            pass
+    return pa is not None
+
+
+def _schema():
+    return pa.schema([
+        ("from_city", pa.string()),
+        ("to_city", pa.string()),
+        ("departure_date", pa.date32()),
+        ("airline", pa.string()),
+        ("price", pa.float64()),
+        ("departure_time", pa.string()),
+        ("arrival_time", pa.string()),
+        ("duration", pa.string()),
+        ("stops", pa.int8()),
+        ("source", pa.string()),
+        ("scraped_at", pa.timestamp("ms")),
+    ])
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("route", pa.string()), ("month", pa.string())]), flavor="hive")
+
+
+def _partition_dir(from_city: str, to_city: str, day: date) -> str:
+    return os.path.join(FARE_HISTORY_DIR, f"route={from_city}-{to_city}", f"month={day:%Y-%m}")
+
+
+def _require_pyarrow() -> None:
+    if not _load_pyarrow():
+        raise ImportError("Fare history needs pyarrow: pip install pyarrow")
+
+
+# ============= WRITE =============
+
+def append_flights(query: FlightQuery, flights: List[Flight]) -> Optional[str]:
+    """Append one scrape's flights as a new file in the route/month partition"""
+    global _warned_missing
+    if not flights:
+        return None
+    if not _load_pyarrow():
+        if not _warned_missing:
+            print("[HISTORY] ⚠️ pyarrow not installed - fare history disabled")
+            _warned_missing = True
+        return None
+
+    from_city, to_city = query.from_city.upper(), query.to_city.upper()
+    rows = {
+        "from_city": [from_city] * len(flights),
+        "to_city": [to_city] * len(flights),
+        "departure_date": [query.departure_date] * len(flights),
+        "airline": [f.airline for f in flights],
+        "price": [f.price for f in flights],
+        "departure_time": [f.departure_time for f in flights],
+        "arrival_time": [f.arrival_time for f in flights],
+        "duration": [f.duration for f in flights],
+        "stops": [f.stops for f in flights],
+        "source": [f.source for f in flights],
+        "scraped_at": [f.scraped_at for f in flights],
+    }
+    table = pa.Table.from_pydict(rows, schema=_schema())
+
+    partition = _partition_dir(from_city, to_city, query.departure_date)
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet")
+    _write_atomic(table, path)
+    return path
+
+
+def _write_atomic(table, path: str, **kwargs) -> None:
+    """Write under a dot-prefixed temp name (ignored by dataset discovery) and rename into place"""
+    tmp = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    pq.write_table(table, tmp, compression=COMPRESSION, **kwargs)
+    os.replace(tmp, path)
+
+
+# ============= READ =============
+
+def _months(start: date, end: date) -> List[str]:
+    months, y, m = [], start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def query_fares(
+    from_city: Optional[str] = None,
+    to_city: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    airline: Optional[str] = None,
+    source: Optional[str] = None,
+    scraped_since: Optional[datetime] = None,
+    columns: Optional[Iterable[str]] = None,
+):
+    """
+    Fare rows matching every given filter, as a pyarrow Table
+
+    e.g. how DEL→BLR fares for 12 March moved over the last week:
+        query_fares("DEL", "BLR", date(2026, 3, 12), date(2026, 3, 12),
+                    scraped_since=datetime.now() - timedelta(days=7)).to_pandas()
+    """
+    _require_pyarrow()
+    if not os.path.isdir(FARE_HISTORY_DIR):
+        return _schema().empty_table()
+
+    dataset = ds.dataset(FARE_HISTORY_DIR, format="parquet", partitioning=_partitioning())
+
+    conditions = []
+    # Partition columns - these prune whole directories before any file is opened
+    if from_city and to_city:
+        conditions.append(ds.field("route") == f"{from_city.upper()}-{to_city.upper()}")
+    if start_date and end_date:
+        conditions.append(ds.field("month").isin(_months(start_date, end_date)))
+    # Data columns - pushed down to Parquet row-group statistics
+    if from_city:
+        conditions.append(ds.field("from_city") == from_city.upper())
+    if to_city:
+        conditions.append(ds.field("to_city") == to_city.upper())
+    if start_date:
+        conditions.append(ds.field("departure_date") >= start_date)
+    if end_date:
+        conditions.append(ds.field("departure_date") <= end_date)
+    if airline:
+        conditions.append(ds.field("airline") == airline)
+    if source:
+        conditions.append(ds.field("source") == source)
+    if scraped_since:
+        conditions.append(ds.field("scraped_at") >= pa.scalar(scraped_since, type=pa.timestamp("ms")))
+
+    expr = None
+    for cond in conditions:
+        expr = cond if expr is None else expr & cond
+
+    return dataset.to_table(filter=expr, columns=list(columns) if columns else None)
+
+
+# ============= MAINTENANCE =============
+
+def compact(min_files: int = 8) -> int:
+    """Merge partitions holding at least `min_files` files into a single sorted file; returns partitions compacted"""
+    _require_pyarrow()
+    compacted = 0
+    for partition in sorted(glob.glob(os.path.join(FARE_HISTORY_DIR, "route=*", "month=*"))):
+        files = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+        if len(files) < min_files:
+            continue
+
+        table = pa.concat_tables([pq.read_table(f, schema=_schema()) for f in files])
+        # Sorted data gives tight min/max stats, which is what makes pushdown effective
+        table = table.sort_by([("departure_date", "ascending"), ("scraped_at", "ascending")])
+
+        path = os.path.join(partition, f"compacted-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet")
+        _write_atomic(table, path, row_group_size=64 * 1024)
+        # Only remove what we merged - files appended meanwhile are left alone
+        for f in files:
+            os.remove(f)
+        compacted += 1
+        print(f"[HISTORY] 🗜️ Compacted {len(files)} files in {os.path.relpath(partition, FARE_HISTORY_DIR)}")
+    return compacted
+
+
+if __name__ == "__main__":
+    compact()
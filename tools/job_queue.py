@@ -0,0 +1,291 @@
+"""
+Durable Search Job Queue
+- SQLite (WAL) queue of search jobs that survives restarts
+- Leases with a visibility timeout: a job whose worker dies becomes visible again
+- Failed jobs retry with exponential backoff, then move to the dead-letter state
+- Higher priority first, then oldest first
+- Worker loop runs the existing graph (run_flight_search) per job, checkpointed as "job-<id>"
+  so a retried or re-leased job resumes instead of scraping finished sources again
+- Jobs navigate at background priority at the shared per-domain rate limiter
+
+Several worker processes on one host can drain the same queue file:
+    python -m tools.job_queue enqueue "Flight from delhi to chennai on 12 March" --priority 5
+    python -m tools.job_queue worker --concurrency 2
+    python -m tools.job_queue stats
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from tools.rate_limit import BACKGROUND, priority
+
+JOB_QUEUE_PATH = os.environ.get("FLIGHT_JOB_QUEUE", "./flight_jobs.db")
+VISIBILITY_TIMEOUT = 5 * 60   # seconds a lease lasts without a heartbeat
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 30             # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 30 * 60
+IDLE_POLL = 1.0               # seconds a worker sleeps when the queue is empty
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_query TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result_json TEXT,
+    last_error TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (state, priority DESC, available_at, id);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    user_query: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    lease_owner: str
+
+
+def backoff(attempts: int) -> float:
+    """Delay before retry number `attempts`, with jitter so failed jobs don't retry in lockstep"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobQueue:
+    """Search jobs in SQLite; every state change is a single atomic statement, safe across processes"""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, visibility_timeout: float = VISIBILITY_TIMEOUT):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, user_query: str, priority: int = 0, max_attempts: int = MAX_ATTEMPTS,
+                delay: float = 0.0) -> int:
+        now = time.time()
+        cur = self._conn.execute(
+            "INSERT INTO jobs (user_query, priority, max_attempts, available_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+            (user_query, priority, max_attempts, now + delay, now)
+        )
+        return cur.lastrowid
+
+    def lease(self, owner: str, visibility_timeout: Optional[float] = None) -> Optional[Job]:
+        """
+        Claim the best ready job: queued and due, or leased by a worker whose lease ran out.
+        One UPDATE ... RETURNING, so two workers can never claim the same job.
+        """
+        now = time.time()
+        self._dead_letter_expired(now)
+        row = self._conn.execute(
+            "UPDATE jobs SET state='leased', attempts=attempts + 1, lease_owner=?, lease_expires=? "
+            "WHERE id = ("
+            "  SELECT id FROM jobs"
+            "  WHERE (state='queued' AND available_at <= ?) OR (state='leased' AND lease_expires < ?)"
+            "  ORDER BY priority DESC, available_at, id LIMIT 1"
+            ") RETURNING id, user_query, priority, attempts, max_attempts",
+            (owner, now + (visibility_timeout or self.visibility_timeout), now, now)
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(id=row[0], user_query=row[1], priority=row[2], attempts=row[3],
+                   max_attempts=row[4], lease_owner=owner)
+
+    def _dead_letter_expired(self, now: float) -> None:
+        """Leases that expired on their last attempt (worker died every time) go straight to dead"""
+        self._conn.execute(
+            "UPDATE jobs SET state='dead', last_error=COALESCE(last_error, 'lease expired'), finished_at=? "
+            "WHERE state='leased' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now)
+        )
+
+    def heartbeat(self, job: Job, visibility_timeout: Optional[float] = None) -> bool:
+        """Extend the lease; False if it was lost (expired and taken by another worker)"""
+        cur = self._conn.execute(
+            "UPDATE jobs SET lease_expires=? WHERE id=? AND state='leased' AND lease_owner=?",
+            (time.time() + (visibility_timeout or self.visibility_timeout), job.id, job.lease_owner)
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job: Job, result_json: Optional[str] = None) -> bool:
+        """Mark done; ignored (False) if this worker no longer holds the lease"""
+        cur = self._conn.execute(
+            "UPDATE jobs SET state='done', result_json=?, finished_at=?, lease_owner=NULL, lease_expires=NULL "
+            "WHERE id=? AND state='leased' AND lease_owner=?",
+            (result_json, time.time(), job.id, job.lease_owner)
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job: Job, error: str) -> str:
+        """Schedule a retry with backoff, or dead-letter once attempts are used up; returns the new state"""
+        if job.attempts >= job.max_attempts:
+            state, available_at, finished_at = "dead", time.time(), time.time()
+        else:
+            state, available_at, finished_at = "queued", time.time() + backoff(job.attempts), None
+        cur = self._conn.execute(
+            "UPDATE jobs SET state=?, available_at=?, finished_at=?, last_error=?, lease_owner=NULL, lease_expires=NULL "
+            "WHERE id=? AND state='leased' AND lease_owner=?",
+            (state, available_at, finished_at, error, job.id, job.lease_owner)
+        )
+        return state if cur.rowcount == 1 else "lost"
+
+    # ============= INSPECTION =============
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        cur = self._conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,))
+        row = cur.fetchone()
+        return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def dead_letters(self, limit: int = 50) -> List[Dict]:
+        cur = self._conn.execute(
+            "SELECT id, user_query, attempts, last_error, finished_at FROM jobs WHERE state='dead' "
+            "ORDER BY finished_at DESC LIMIT ?", (limit,)
+        )
+        return [dict(zip([c[0] for c in cur.description], row)) for row in cur.fetchall()]
+
+    def requeue(self, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts"""
+        cur = self._conn.execute(
+            "UPDATE jobs SET state='queued', attempts=0, available_at=?, finished_at=NULL WHERE id=? AND state='dead'",
+            (time.time(), job_id)
+        )
+        return cur.rowcount == 1
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in ("queued", "leased", "done", "dead")}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ============= WORKER =============
+
+async def _run_search(user_query: str, search_id: str) -> str:
+    from agent.graph import run_flight_search
+    from tools.scheduler import API
+    result = await run_flight_search(user_query, search_id=search_id, tenant="job-queue", priority=API)
+    # Parse failure, every source failed or turned away by the scheduler (raises) - worth another attempt later
+    if not result.sources_checked:
+        raise RuntimeError(result.error or "No source returned results")
+    return result.model_dump_json()
+
+
+class JobWorker:
+    """Leases jobs and runs them through the graph; `concurrency` searches at a time per process"""
+
+    def __init__(self, queue: JobQueue, handler: Callable[[str, str], Awaitable[str]] = _run_search,
+                 concurrency: int = 1, owner: Optional[str] = None):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stats = {"done": 0, "retried": 0, "dead": 0, "lost": 0}
+
+    async def _keep_leased(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            if not self.queue.heartbeat(job):
+                print(f"[QUEUE] ⚠️ Lost lease on job {job.id}")
+                return
+
+    async def run_one(self, job: Job) -> None:
+        print(f"[QUEUE] ▶️ Job {job.id} (attempt {job.attempts}/{job.max_attempts}, priority {job.priority}): {job.user_query}")
+        heartbeat = asyncio.create_task(self._keep_leased(job))
+        try:
+            with priority(BACKGROUND):
+                result_json = await self.handler(job.user_query, f"job-{job.id}")
+        except Exception as e:
+            state = self.queue.fail(job, str(e))
+            self.stats["dead" if state == "dead" else "lost" if state == "lost" else "retried"] += 1
+            print(f"[QUEUE] ❌ Job {job.id} failed ({state}): {e}")
+        else:
+            if self.queue.complete(job, result_json):
+                self.stats["done"] += 1
+                print(f"[QUEUE] ✅ Job {job.id} done")
+            else:
+                self.stats["lost"] += 1
+        finally:
+            heartbeat.cancel()
+
+    async def _slot(self, stop_when_empty: bool) -> None:
+        while True:
+            job = self.queue.lease(self.owner)
+            if job is None:
+                if stop_when_empty:
+                    return
+                await asyncio.sleep(IDLE_POLL)
+                continue
+            await self.run_one(job)
+
+    async def run(self, stop_when_empty: bool = False) -> Dict[str, int]:
+        from tools.scrapers.supervisor import get_supervisor
+        # Long batch runs are where leaked browsers pile up - reap them as we go
+        supervisor = asyncio.create_task(get_supervisor().run_forever())
+        try:
+            await asyncio.gather(*(self._slot(stop_when_empty) for _ in range(self.concurrency)))
+        finally:
+            supervisor.cancel()
+            from tools.llm_parser import close_async_client
+            await close_async_client()
+            print(f"[QUEUE] 🧟 Browser leaks: {get_supervisor().report()}")
+            from tools.scheduler import get_scheduler
+            print(f"[QUEUE] 🚦 Scheduler stats: {get_scheduler().stats()}")
+            from tools.scrapers.browser_manager import REUSE_BROWSERS, get_browser_manager
+            if REUSE_BROWSERS:
+                print(f"[QUEUE] 🌐 Browser stats: {get_browser_manager().stats()}")
+                await get_browser_manager().shutdown()
+        return self.stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Durable flight search job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="Add a search job")
+    enqueue.add_argument("query")
+    enqueue.add_argument("--priority", type=int, default=0)
+    worker = sub.add_parser("worker", help="Drain the queue")
+    worker.add_argument("--concurrency", type=int, default=1)
+    worker.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    sub.add_parser("stats", help="Job counts per state and dead letters")
+    requeue = sub.add_parser("requeue", help="Retry a dead-lettered job")
+    requeue.add_argument("job_id", type=int)
+    args = parser.parse_args()
+
+    queue = JobQueue()
+    if args.command == "enqueue":
+        print(f"[QUEUE] 📥 Enqueued job {queue.enqueue(args.query, priority=args.priority)}")
+    elif args.command == "worker":
+        from tools.llm_parser import start_preload
+        start_preload()
+        asyncio.run(JobWorker(queue, concurrency=args.concurrency).run(stop_when_empty=args.drain))
+    elif args.command == "stats":
+        print(f"[QUEUE] 📈 {queue.stats()}")
+        for dead in queue.dead_letters(10):
+            print(f"[QUEUE] 💀 {dead['id']}: {dead['user_query']} - {dead['last_error']}")
+    elif args.command == "requeue":
+        print(f"[QUEUE] {'🔁 Requeued' if queue.requeue(args.job_id) else '⚠️ Not dead-lettered:'} job {args.job_id}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
-import ollama
+import asyncio
+import json
 import re
 import csv
 import os
+import threading
 from datetime import datetime
-from typing import Optional, Dict
-from models.schema import FlightQuery
+from functools import lru_cache
+from typing import Optional, Dict, Any
+from pydantic import ValidationError
+from models.schema import FILTER_FIELDS, TRIP_FIELDS, FlightQuery
+
+# --- LLM CLIENT SETTINGS ---
+LLM_MODEL = 'llama3:8b'
+LLM_KEEP_ALIVE = os.environ.get("FLIGHT_LLM_KEEP_ALIVE", "30m")  # keep the model resident between searches
+LLM_TIMEOUT = float(os.environ.get("FLIGHT_LLM_TIMEOUT", "60"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("FLIGHT_LLM_CONCURRENCY", "2"))
+
+# Structured mode: JSON constrained to the FlightQuery schema, deterministic and short
+LLM_STRUCTURED = os.environ.get("FLIGHT_LLM_STRUCTURED", "1") != "0"
+LLM_MAX_TOKENS = 64  # {"from_city": ..., "to_city": ..., "departure_date": ...} fits in ~30
+LLM_STRUCTURED_OPTIONS = {"temperature": 0, "seed": 0, "num_predict": LLM_MAX_TOKENS}
+
+
+def _ollama():
+    """ollama is imported on the first LLM call, not when this module is imported"""
+    import ollama
+    return ollama
 
 # --- CSV LOADING LOGIC (FIXED FOR MAC) ---
 
@@ -63,16 +84,26 @@ def _get_fallback_data() -> Dict[str, str]:
         "hyderabad": "HYD", "pune": "PNQ", "goa": "GOI"
     }
 
-# Load data immediately
-AIRPORT_MAP = load_airport_map()
+# Loaded on first lookup rather than at import time
+@lru_cache(maxsize=1)
+def get_airport_map() -> Dict[str, str]:
+    return load_airport_map()
+
+
+def __getattr__(name: str):
+    # Keeps `from tools.llm_parser import AIRPORT_MAP` working without an import-time CSV read
+    if name == "AIRPORT_MAP":
+        return get_airport_map()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --- REST OF FILE REMAINS SAME ---
 def get_airport_code(city_name: str) -> str:
     clean_name = city_name.lower().strip().replace('"', '').replace("'", "")
     
-    if clean_name in AIRPORT_MAP:
-        return AIRPORT_MAP[clean_name]
+    airport_map = get_airport_map()
+    if clean_name in airport_map:
+        return airport_map[clean_name]
     
     if len(clean_name) == 3:
         return clean_name.upper()
@@ -82,13 +113,154 @@ def get_airport_code(city_name: str) -> str:
 
 def parse_query_with_llama(user_query: str) -> Optional[FlightQuery]:
     try:
-        prompt = _build_llama_prompt(user_query)
-        response = ollama.chat(model='llama3:8b', messages=[{'role': 'user', 'content': prompt}])
+        if LLM_STRUCTURED:
+            response = _ollama().chat(**_structured_chat_args(user_query))
+            parsed = _parse_structured_response(response['message']['content'], user_query)
+            if parsed:
+                return parsed
+            print("[LLM] ⚠️ Structured output rejected, retrying with free-text prompt")
+
+        response = _ollama().chat(**_freetext_chat_args(user_query))
         return _parse_llama_response_robust(response['message']['content'], user_query)
     except Exception as e:
         print(f"\n[LLM Error] {str(e)}")
         return None
 
+
+# --- ASYNC CLIENT (used by the graph so parsing never blocks the event loop) ---
+
+_async_client = None  # ollama.AsyncClient
+_async_semaphore: Optional[asyncio.Semaphore] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _get_async_client():
+    """One pooled HTTP client + concurrency limit per event loop"""
+    global _async_client, _async_semaphore, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        stale, _async_client = _async_client, _ollama().AsyncClient(timeout=LLM_TIMEOUT)
+        _async_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _async_loop = loop
+        if stale is not None:
+            await _close_client(stale)
+    return _async_client
+
+
+async def _close_client(client) -> None:
+    try:
+        await client.close()   # releases its httpx connection pool
+    except Exception as e:
+        print(f"[LLM] ⚠️ Closing the previous client failed: {e}")
+
+
+async def close_async_client() -> None:
+    """Close the pooled client; call before the event loop that used it ends"""
+    global _async_client, _async_loop
+    client, _async_client, _async_loop = _async_client, None, None
+    if client is not None:
+        await _close_client(client)
+
+
+def preload_llama() -> bool:
+    """Load the model into memory ahead of the first query (blocking, see start_preload)"""
+    try:
+        _ollama().Client(timeout=LLM_TIMEOUT).generate(model=LLM_MODEL, prompt='', keep_alive=LLM_KEEP_ALIVE)
+        print(f"[LLM] ✓ {LLM_MODEL} loaded (keep_alive={LLM_KEEP_ALIVE})")
+        return True
+    except Exception as e:
+        print(f"[LLM] ⚠️ Preload failed: {e}")
+        return False
+
+
+def start_preload() -> threading.Thread:
+    """Call at startup: the model loads while the agent stack is imported and browsers warm up"""
+    thread = threading.Thread(target=preload_llama, name="llm-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+async def _achat(chat_args: Dict[str, Any]) -> str:
+    client = await _get_async_client()
+    async with _async_semaphore:
+        response = await asyncio.wait_for(client.chat(**chat_args), timeout=LLM_TIMEOUT)
+    return response['message']['content']
+
+
+async def parse_query_with_llama_async(user_query: str) -> Optional[FlightQuery]:
+    try:
+        if LLM_STRUCTURED:
+            text = await _achat(_structured_chat_args(user_query))
+            parsed = _parse_structured_response(text, user_query)
+            if parsed:
+                return parsed
+            print("[LLM] ⚠️ Structured output rejected, retrying with free-text prompt")
+
+        text = await _achat(_freetext_chat_args(user_query))
+        return _parse_llama_response_robust(text, user_query)
+    except asyncio.TimeoutError:
+        print(f"\n[LLM Error] No response within {LLM_TIMEOUT:.0f}s")
+        return None
+    except Exception as e:
+        print(f"\n[LLM Error] {str(e)}")
+        return None
+
+
+# --- PROMPTS ---
+
+def _freetext_chat_args(user_query: str) -> Dict[str, Any]:
+    return {
+        "model": LLM_MODEL,
+        "messages": [{'role': 'user', 'content': _build_llama_prompt(user_query)}],
+        "keep_alive": LLM_KEEP_ALIVE,
+    }
+
+
+def _structured_chat_args(user_query: str) -> Dict[str, Any]:
+    return {
+        "model": LLM_MODEL,
+        "messages": [{'role': 'user', 'content': _build_structured_prompt(user_query)}],
+        "format": _structured_schema(),
+        "options": LLM_STRUCTURED_OPTIONS,
+        "keep_alive": LLM_KEEP_ALIVE,
+    }
+
+
+def _structured_schema() -> Dict[str, Any]:
+    """
+    FlightQuery's JSON schema minus raw_query (we fill that in ourselves) and the filters:
+    those come from the caller only, and leaving them out keeps the output within num_predict
+    """
+    schema = FlightQuery.model_json_schema()
+    dropped = ("raw_query",) + FILTER_FIELDS
+    for name in dropped:
+        schema["properties"].pop(name, None)
+    schema["required"] = [f for f in schema.get("required", []) if f not in dropped]
+    return schema
+
+
+def _build_structured_prompt(user_query: str) -> str:
+    today = datetime.now().strftime("%Y-%m-%d")
+    return f"Today is {today}. Extract the flight search as JSON (city names, date as YYYY-MM-DD).\nQuery: {user_query}"
+
+
+def _parse_structured_response(text: str, raw_query: str) -> Optional[FlightQuery]:
+    try:
+        data = {name: value for name, value in json.loads(text).items() if name in TRIP_FIELDS}
+        raw_origin = str(data["from_city"])
+        raw_dest = str(data["to_city"])
+        data["from_city"] = get_airport_code(raw_origin)
+        data["to_city"] = get_airport_code(raw_dest)
+        data["raw_query"] = raw_query
+
+        print(f"[DEBUG] Mapped '{raw_origin}' -> {data['from_city']}, '{raw_dest}' -> {data['to_city']}")
+
+        return FlightQuery.model_validate(data)
+    except (ValueError, KeyError, TypeError, AttributeError, ValidationError) as e:
+        print(f"[LLM] ⚠️ Invalid structured output: {e}")
+        return None
+
+
 def _build_llama_prompt(user_query: str) -> str:
     today = datetime.now().strftime("%Y-%m-%d")
     return f"""
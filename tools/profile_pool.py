@@ -0,0 +1,262 @@
+"""
+Persistent Profile Pool
+- Keeps N clones of each seeded session directory (./mmt_session, ./emt_session)
+- Leases one clone per scrape so persistent-context sources can run in parallel
+- Re-syncs cookies from the golden profile and recycles damaged/flagged clones
+"""
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+POOL_ROOT = os.path.abspath(os.environ.get("FLIGHT_PROFILE_POOL_DIR", "./profile_pool"))
+DEFAULT_POOL_SIZE = int(os.environ.get("FLIGHT_PROFILE_POOL_SIZE", "2"))
+COOKIE_SYNC_INTERVAL = 15 * 60  # seconds between cookie re-syncs from the golden profile
+SYNC_STAMP = ".last_cookie_sync"
+
+# Chromium refuses to open a profile while these exist
+LOCK_FILES = ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile")
+
+# Copied from the golden profile on every re-sync
+COOKIE_FILES = (
+    os.path.join("Default", "Cookies"),
+    os.path.join("Default", "Cookies-journal"),
+)
+
+# Not worth copying when we have to fall back to a full copy
+SKIP_ON_COPY = LOCK_FILES + ("Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache")
+
+
+async def _finish_in_thread(fn, *args):
+    """
+    Run clone maintenance in a thread and wait for it even if the caller is cancelled meanwhile
+    (the cancellation is re-raised afterwards): the flock must not be released while the thread
+    is still copying or deleting the clone, or another process could lease it half-written
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    cancelled = None
+    while not task.done():
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError as e:
+            cancelled = e
+        except Exception:
+            pass   # the thread's own error, raised below
+    if cancelled is not None:
+        if not task.cancelled():
+            task.exception()   # retrieved - the cancellation wins
+        raise cancelled
+    return task.result()
+
+
+class ProfileLease:
+    """A clone handed out to one scraper for the duration of a search"""
+
+    def __init__(self, source: str, index: int, path: str):
+        self.source = source
+        self.index = index
+        self.path = path
+        self.flagged: Optional[str] = None
+
+    def flag(self, reason: str) -> None:
+        """Mark the clone as burnt (bot trap, crash...) so it is recycled on release"""
+        print(f"[POOL] ⚠️ {self.source} clone #{self.index} flagged: {reason}")
+        self.flagged = reason
+
+
+class ProfilePool:
+    """
+    Pool of copy-on-write clones of one golden profile
+
+    Leases are guarded by an flock() on a per-clone lease file, so they are
+    exclusive across coroutines AND across processes on the same host.
+    """
+
+    def __init__(self, source: str, golden_dir: str, size: int = DEFAULT_POOL_SIZE):
+        self.source = source
+        self.golden_dir = os.path.abspath(golden_dir)
+        self.size = max(1, size)
+        self.pool_dir = os.path.join(POOL_ROOT, source)
+        self._held: Set[int] = set()
+        self.stats = {"leases": 0, "waits": 0, "recycled": 0, "cookie_syncs": 0}
+
+    # ============= PATHS =============
+
+    def _clone_path(self, index: int) -> str:
+        return os.path.join(self.pool_dir, f"clone_{index}")
+
+    def _lease_file(self, index: int) -> str:
+        return os.path.join(self.pool_dir, f"clone_{index}.lease")
+
+    def _sync_stamp(self, index: int) -> str:
+        return os.path.join(self._clone_path(index), SYNC_STAMP)
+
+    # ============= LEASING =============
+
+    def _try_acquire(self, index: int) -> Optional[int]:
+        if index in self._held:
+            return None
+        os.makedirs(self.pool_dir, exist_ok=True)
+        fd = os.open(self._lease_file(index), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        self._held.add(index)
+        return fd
+
+    def _release(self, index: int, fd: int) -> None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            self._held.discard(index)
+
+    @asynccontextmanager
+    async def lease(self, timeout: float = 120.0):
+        """
+        Lease a free clone, waiting up to `timeout` seconds for one
+
+        Usage:
+            async with pool.lease() as lease:
+                await p.chromium.launch_persistent_context(lease.path, ...)
+        """
+        deadline = time.monotonic() + timeout
+        index, fd = None, None
+        while fd is None:
+            for i in range(self.size):
+                fd = self._try_acquire(i)
+                if fd is not None:
+                    index = i
+                    break
+            if fd is None:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No free {self.source} profile after {timeout:.0f}s")
+                self.stats["waits"] += 1
+                await asyncio.sleep(0.5)
+
+        lease = ProfileLease(self.source, index, self._clone_path(index))
+        try:
+            await _finish_in_thread(self._prepare, index)
+            self.stats["leases"] += 1
+            print(f"[POOL] 🔑 Leased {self.source} clone #{index}")
+            yield lease
+        finally:
+            try:
+                if lease.flagged:
+                    await _finish_in_thread(self._recycle, index)
+            finally:
+                self._release(index, fd)
+
+    # ============= CLONE MAINTENANCE (run off the event loop) =============
+
+    def _prepare(self, index: int) -> None:
+        path = self._clone_path(index)
+        if not os.path.isdir(path):
+            self._clone(path)
+        elif self._is_damaged(path):
+            self._recycle(index)
+        else:
+            remove_lock_files(path)
+            self._sync_cookies(index)
+
+    def _clone(self, path: str) -> None:
+        if not os.path.isdir(self.golden_dir):
+            # No seeded profile yet - Chromium will create a fresh one
+            os.makedirs(path, exist_ok=True)
+            return
+        print(f"[POOL] 📋 Cloning {self.golden_dir} -> {path}")
+        if not _copy_on_write(self.golden_dir, path):
+            shutil.copytree(self.golden_dir, path, ignore=shutil.ignore_patterns(*SKIP_ON_COPY))
+        remove_lock_files(path)
+        _touch(os.path.join(path, SYNC_STAMP))
+
+    def _recycle(self, index: int) -> None:
+        path = self._clone_path(index)
+        print(f"[POOL] ♻️ Recycling {self.source} clone #{index}")
+        shutil.rmtree(path, ignore_errors=True)
+        self._clone(path)
+        self.stats["recycled"] += 1
+
+    def _is_damaged(self, path: str) -> bool:
+        prefs = os.path.join(path, "Default", "Preferences")
+        golden_prefs = os.path.join(self.golden_dir, "Default", "Preferences")
+        if os.path.isfile(golden_prefs) and not os.path.isfile(prefs):
+            return True
+        if os.path.isfile(prefs):
+            try:
+                with open(prefs, "r", encoding="utf-8") as f:
+                    json.load(f)
+            except (OSError, ValueError):
+                return True
+        return False
+
+    def _sync_cookies(self, index: int) -> None:
+        stamp = self._sync_stamp(index)
+        last_sync = os.path.getmtime(stamp) if os.path.exists(stamp) else 0.0
+        if time.time() - last_sync < COOKIE_SYNC_INTERVAL:
+            return
+
+        clone = self._clone_path(index)
+        for rel in COOKIE_FILES:
+            src = os.path.join(self.golden_dir, rel)
+            if os.path.isfile(src) and os.path.getmtime(src) > last_sync:
+                os.makedirs(os.path.dirname(os.path.join(clone, rel)), exist_ok=True)
+                shutil.copy2(src, os.path.join(clone, rel))
+        _touch(stamp)
+        self.stats["cookie_syncs"] += 1
+
+
+# ============= HELPERS =============
+
+def _copy_on_write(src: str, dst: str) -> bool:
+    """Clone with APFS clonefile / btrfs-xfs reflinks when the filesystem supports it"""
+    if sys.platform == "darwin":
+        cmd = ["cp", "-c", "-R", src, dst]
+    elif sys.platform.startswith("linux"):
+        cmd = ["cp", "-R", "--reflink=auto", src, dst]
+    else:
+        return False
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        shutil.rmtree(dst, ignore_errors=True)
+        return False
+
+
+def remove_lock_files(path: str) -> int:
+    """Delete Chromium's singleton locks left in a profile; returns how many were removed"""
+    removed = 0
+    for name in LOCK_FILES:
+        target = os.path.join(path, name)
+        if os.path.lexists(target):
+            try:
+                os.remove(target)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _touch(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a"):
+        os.utime(path, None)
+
+
+_POOLS: Dict[str, ProfilePool] = {}
+
+
+def get_profile_pool(source: str, golden_dir: str, size: int = DEFAULT_POOL_SIZE) -> ProfilePool:
+    """Return the process-wide pool for a source, creating it on first use"""
+    if source not in _POOLS:
+        _POOLS[source] = ProfilePool(source, golden_dir, size)
+    return _POOLS[source]
@@ -0,0 +1,259 @@
+"""
+Per-Domain Rate Limiter
+- Token bucket per site domain: `burst` navigations back to back, then `refill` per second
+  (subdomains share their site's bucket: flight.easemytrip.com draws from easemytrip.com)
+- Shared by every coroutine and every process on the host through a SQLite (WAL) file, so
+  worker processes, job queue workers and the refresher all draw from the same buckets
+- Waiters queue per domain: interactive searches go before background work (refresher, job
+  queue), first come first served within a priority
+- Every acquisition's wait is logged for stats()
+
+Scrapers call it right before each navigation:
+    await get_rate_limiter().acquire(url)
+
+Limits per domain: FLIGHT_RATE_LIMITS="makemytrip.com=2:0.1,cleartrip.com=4:0.5" (burst:refill),
+anything else gets FLIGHT_RATE_BURST / FLIGHT_RATE_REFILL.
+    python -m tools.rate_limit
+"""
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+RATE_LIMIT_PATH = os.environ.get("FLIGHT_RATE_LIMIT_DB", "./flight_rate_limits.db")
+DEFAULT_BURST = float(os.environ.get("FLIGHT_RATE_BURST", "3"))
+DEFAULT_REFILL = float(os.environ.get("FLIGHT_RATE_REFILL", "0.2"))   # tokens per second
+MAX_POLL = 1.0       # seconds between checks while queued (a waiter's turn can come early)
+WAITER_TTL = 10.0    # a queued waiter not seen for this long belongs to a dead process
+LOG_WAIT = 1.0       # waits longer than this are printed
+WAIT_LOG_SECONDS = float(os.environ.get("FLIGHT_RATE_LOG_SECONDS", str(24 * 3600)))   # waits kept for stats()
+PRUNE_EVERY = 60.0   # seconds between deletes of expired waits
+
+INTERACTIVE, BACKGROUND = "interactive", "background"
+_RANK = {INTERACTIVE: 1, BACKGROUND: 0}
+
+# Priority of the navigations made in this context (see priority())
+_PRIORITY: ContextVar[str] = ContextVar("flight_rate_priority", default=INTERACTIVE)
+# Set inside work shared by several callers; overrides _PRIORITY (see shared_priority())
+_SHARED: ContextVar[Optional["SharedPriority"]] = ContextVar("flight_rate_shared", default=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    domain TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    ticket TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_waiters_queue ON waiters (domain, rank DESC, enqueued_at, ticket);
+CREATE TABLE IF NOT EXISTS waits (
+    domain TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    waited REAL NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_waits_time ON waits (acquired_at);
+"""
+
+
+def _check_limit(domain: str, burst: float, refill: float) -> Tuple[float, float]:
+    # A bucket that can never hold a whole token, or never refills, would block its waiters forever
+    if burst < 1 or refill <= 0:
+        raise ValueError(f"Rate limit for {domain}: burst must be >= 1 and refill > 0, got {burst}:{refill}")
+    return burst, refill
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        domain, _, values = item.partition("=")
+        burst, _, refill = values.partition(":")
+        domain = domain.strip().lower()
+        limits[domain] = _check_limit(domain, float(burst), float(refill or DEFAULT_REFILL))
+    return limits
+
+
+_check_limit("default", DEFAULT_BURST, DEFAULT_REFILL)
+RATE_LIMITS = _parse_limits(os.environ.get("FLIGHT_RATE_LIMITS", ""))
+
+# Second-level labels under a country code that are registered into, e.g. example.co.in
+_SECOND_LEVEL = {"co", "com", "net", "org", "gov", "ac", "edu"}
+
+
+def domain_of(url: str, configured: Iterable[str] = ()) -> str:
+    """
+    Bucket key for a URL: a configured domain the host belongs to, else the registrable domain
+    'https://flight.easemytrip.com/FlightList/...' -> 'easemytrip.com'
+    """
+    host = (urlparse(url).hostname or url).lower().rstrip(".")
+    matches = [domain for domain in configured if host == domain or host.endswith("." + domain)]
+    if matches:
+        return max(matches, key=len)
+    labels = host.split(".")
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+@contextmanager
+def priority(level: str) -> Iterator[None]:
+    """Navigations inside this block queue at `level` (tasks started inside inherit it)"""
+    token = _PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class SharedPriority:
+    """Priority of one piece of work done for several callers: the highest any of them has"""
+
+    def __init__(self, level: str):
+        self.level = level
+
+    def raise_to(self, level: str) -> None:
+        if _RANK[level] > _RANK[self.level]:
+            self.level = level
+
+
+@contextmanager
+def shared_priority(shared: SharedPriority) -> Iterator[None]:
+    """Navigations inside this block queue at `shared.level`, read at each navigation"""
+    token = _SHARED.set(shared)
+    try:
+        yield
+    finally:
+        _SHARED.reset(token)
+
+
+def current_priority() -> str:
+    shared = _SHARED.get()
+    return shared.level if shared is not None else _PRIORITY.get()
+
+
+class RateLimiter:
+    """Token buckets plus a priority queue per domain, kept in one SQLite file per host"""
+
+    def __init__(self, path: str = RATE_LIMIT_PATH, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.path = path
+        self.limits = RATE_LIMITS if limits is None else {
+            domain: _check_limit(domain, *limit) for domain, limit in limits.items()}
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pruned_at = 0.0
+
+    def limit(self, domain: str) -> Tuple[float, float]:
+        """(burst, refill per second) for a domain"""
+        return self.limits.get(domain, (DEFAULT_BURST, DEFAULT_REFILL))
+
+    async def acquire(self, url: str, level: Optional[str] = None) -> float:
+        """Wait for a token for the URL's domain; returns the seconds waited"""
+        domain, explicit = domain_of(url, self.limits), level
+        ticket, enqueued, started = uuid.uuid4().hex, time.time(), time.monotonic()
+        try:
+            while True:
+                # Re-read each round: a shared scrape's priority can rise while it is queued
+                level = explicit or current_priority()
+                wait = self._try_take(domain, ticket, _RANK[level], enqueued)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, MAX_POLL))
+        finally:
+            # Cancelled while queued (e.g. cut off by a deadline): leave the queue
+            self._conn.execute("DELETE FROM waiters WHERE ticket=?", (ticket,))
+
+        waited, now = time.monotonic() - started, time.time()
+        self._conn.execute("INSERT INTO waits VALUES (?, ?, ?, ?)", (domain, level, waited, now))
+        if now - self._pruned_at >= PRUNE_EVERY:
+            # Every acquire logs a row - keep only what stats() can still report on
+            self._pruned_at = now
+            self._conn.execute("DELETE FROM waits WHERE acquired_at < ?", (now - WAIT_LOG_SECONDS,))
+        if waited > LOG_WAIT:
+            print(f"[RATE] ⏳ {domain}: waited {waited:.1f}s for a slot ({level})")
+        return waited
+
+    def _try_take(self, domain: str, ticket: str, rank: int, enqueued: float) -> float:
+        """Take a token if this ticket is first in line and one is available; else seconds to wait"""
+        burst, refill = self.limit(domain)
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM waiters WHERE domain=? AND expires_at < ?", (domain, now))
+            self._conn.execute(
+                "INSERT INTO waiters VALUES (?, ?, ?, ?, ?) ON CONFLICT (ticket) DO UPDATE SET rank=excluded.rank, expires_at=excluded.expires_at",
+                (ticket, domain, rank, enqueued, now + WAITER_TTL)
+            )
+            head = self._conn.execute(
+                "SELECT ticket FROM waiters WHERE domain=? ORDER BY rank DESC, enqueued_at, ticket LIMIT 1", (domain,)
+            ).fetchone()[0]
+            row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE domain=?", (domain,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * refill)
+
+            taken = head == ticket and tokens >= 1
+            if taken:
+                tokens -= 1
+                self._conn.execute("DELETE FROM waiters WHERE ticket=?", (ticket,))
+            self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (domain, tokens, now))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        if taken:
+            return 0.0
+        # Behind someone else: check back soon, their token may not be the last one
+        return max(0.0, 1 - tokens) / refill if head == ticket else MAX_POLL / 4
+
+    # ============= STATS =============
+
+    def stats(self, window_seconds: int = 3600) -> List[Dict]:
+        """Acquisitions and wait times per domain and priority over the window (at most WAIT_LOG_SECONDS)"""
+        rows = self._conn.execute(
+            "SELECT domain, priority, waited FROM waits WHERE acquired_at >= ? ORDER BY domain, priority, waited",
+            (time.time() - window_seconds,)
+        ).fetchall()
+        groups: Dict[Tuple[str, str], List[float]] = {}
+        for domain, level, waited in rows:
+            groups.setdefault((domain, level), []).append(waited)
+        return [{
+            "domain": domain,
+            "priority": level,
+            "acquired": len(waits),
+            "avg_wait": sum(waits) / len(waits),
+            "p95_wait": waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+            "max_wait": waits[-1],
+            "queued": self._conn.execute(
+                "SELECT COUNT(*) FROM waiters WHERE domain=? AND rank=? AND expires_at >= ?",
+                (domain, _RANK[level], time.time())).fetchone()[0],
+        } for (domain, level), waits in groups.items()]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_LIMITER: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter, opened on first use"""
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = RateLimiter()
+    return _LIMITER
+
+
+if __name__ == "__main__":
+    for row in get_rate_limiter().stats():
+        print(f"[RATE] 📈 {row['domain']} ({row['priority']}): {row['acquired']} navigations, "
+              f"avg wait {row['avg_wait']:.2f}s, p95 {row['p95_wait']:.2f}s, max {row['max_wait']:.2f}s")
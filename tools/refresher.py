@@ -0,0 +1,168 @@
+"""
+Popular Route Refresher
+- Learns the hottest (route, date) keys from the request log, recomputed every CYCLE_SECONDS
+- One long-running worker per source re-scrapes its stalest hot key, paced by a per-source rate budget
+- Each source only keeps as many keys warm as its budget can re-scrape every REFRESH_AFTER
+  seconds (the hottest ones), so the keys it does cover never outlive the store TTL
+- Navigates at background priority, so interactive searches go first at the shared rate limiter
+- Each scrape holds a background browser slot from the search scheduler
+- Writes into the result store so interactive searches on those keys hit fresh data
+- Prunes the store's request/lookup logs every cycle
+
+Run alongside the agent:
+    python -m tools.refresher
+"""
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from models.schema import FlightQuery
+from tools.fare_history import append_flights
+from tools.rate_limit import BACKGROUND, priority
+from tools.result_store import ResultStore, RouteKey, get_result_store
+from tools.scheduler import get_scheduler
+from tools.worker_pool import get_worker_pool
+
+# Max scrapes per hour per source - keeps background traffic well under bot-trap territory
+RATE_BUDGET_PER_HOUR = {
+    "makemytrip": 20,
+    "cleartrip": 30,
+    "easemytrip": 30,
+}
+
+CYCLE_SECONDS = 10 * 60   # how often the hot list is recomputed
+HOT_ROUTES = 30           # (route, date) keys kept warm
+REFRESH_AFTER = 10 * 60   # re-scrape once cached data is older than this (below the store TTL)
+IDLE_POLL = 60            # seconds a worker with nothing due waits before looking again
+
+
+class RouteRefresher:
+    """Keeps the hottest routes pre-scraped in the result store"""
+
+    def __init__(self, store: Optional[ResultStore] = None, scrapers: Optional[Dict] = None,
+                 hot_routes: int = HOT_ROUTES, refresh_after: int = REFRESH_AFTER):
+        if scrapers is None:
+            workers = get_worker_pool()
+            if workers:
+                # Sources refresh side by side in separate processes
+                scrapers = workers.scrapers()
+            else:
+                from tools.scrapers import SCRAPERS
+                scrapers = SCRAPERS
+        self.store = store or get_result_store()
+        self.scrapers = scrapers
+        self.hot_routes = hot_routes
+        self.refresh_after = refresh_after
+        self.stats = {"cycles": 0, "refreshed": 0, "failed": 0, "skipped_fresh": 0}
+        self.hot: List[RouteKey] = []
+        self._attempted: Dict[Tuple[str, RouteKey], float] = {}   # (source, key) -> last scrape started
+
+    def capacity(self, source: str) -> int:
+        """Keys this source's hourly budget can re-scrape once every refresh_after seconds"""
+        return max(1, int(RATE_BUDGET_PER_HOUR.get(source, 20) * self.refresh_after / 3600))
+
+    def due(self, source: str, keys: List[RouteKey]) -> List[RouteKey]:
+        """
+        The hottest keys within the source's capacity whose cached data is missing or about
+        to go stale, stalest first (a failed attempt counts as a refresh, so it waits its turn)
+        """
+        now, stale = time.time(), []
+        for key in keys[:self.capacity(source)]:
+            ages = [age for age in (self.store.age(source, key),
+                                    now - self._attempted.get((source, key), float("-inf")))
+                    if age is not None]
+            age = min(ages)
+            if age >= self.refresh_after:
+                stale.append((age, key))
+            else:
+                self.stats["skipped_fresh"] += 1
+        return [key for _, key in sorted(stale, key=lambda item: item[0], reverse=True)]
+
+    def update_hot(self) -> List[RouteKey]:
+        """Recompute the hot list the source workers pick from"""
+        # Keeps the request/lookup logs that hottest_routes() and report() scan bounded
+        self.store.prune()
+        self.hot = self.store.hottest_routes(limit=self.hot_routes)
+        hot = set(self.hot)
+        self._attempted = {entry: at for entry, at in self._attempted.items() if entry[1] in hot}
+        self.stats["cycles"] += 1
+        print(f"[REFRESH] 🔥 {len(self.hot)} hot routes this cycle")
+        return self.hot
+
+    async def refresh_key(self, source: str, key: RouteKey) -> None:
+        from_city, to_city, day = key
+        self._attempted[(source, key)] = time.time()
+        query = FlightQuery(from_city=from_city, to_city=to_city, departure_date=day,
+                            raw_query=f"[refresh] {from_city}-{to_city} {day}")
+        print(f"[REFRESH] 🔄 {source}: {from_city} → {to_city} on {day}")
+        try:
+            async with get_scheduler().admit("refresher", BACKGROUND):
+                result = await self.scrapers[source](query)
+            if result and result.success:
+                self.store.put(source, query, result, origin="refresh")
+                await asyncio.to_thread(append_flights, query, result.flights)
+                self.stats["refreshed"] += 1
+            else:
+                self.stats["failed"] += 1
+                print(f"[REFRESH] ❌ {source}: {result.error if result else 'No result returned'}")
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"[REFRESH] ❌ {source} Exception: {e}")
+
+    async def refresh_source(self, source: str, forever: bool = True) -> None:
+        """
+        Scrape the source's stalest due key, one per budget interval, picking from the current
+        hot list each time; without `forever`, stop once nothing is due
+        """
+        interval = 3600 / RATE_BUDGET_PER_HOUR.get(source, 20)
+        # Random initial offset so the sources don't all start at once
+        await asyncio.sleep(random.uniform(0, min(interval, 30)))
+
+        while True:
+            due = self.due(source, self.hot)
+            if not due:
+                if not forever:
+                    return
+                await asyncio.sleep(min(interval, IDLE_POLL))
+                continue
+            started = time.monotonic()
+            await self.refresh_key(source, due[0])
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    async def run_cycle(self) -> None:
+        """One pass: recompute the hot list and refresh every source's due keys once"""
+        self.update_hot()
+        # Sources run side by side, each paced by its own budget
+        with priority(BACKGROUND):
+            await asyncio.gather(*(self.refresh_source(source, forever=False) for source in self.scrapers))
+        self.report()
+
+    def report(self) -> Dict[str, float]:
+        lookups = self.store.lookup_stats()
+        print(f"[REFRESH] 📈 refreshed={self.stats['refreshed']} failed={self.stats['failed']} "
+              f"cache hit rate={lookups['hit_rate']:.0%} refresh hit rate={lookups['refresh_hit_rate']:.0%}")
+        return {**self.stats, **lookups}
+
+    async def run_forever(self) -> None:
+        self.update_hot()
+        # Workers are created inside the block, so their scrapes inherit background priority
+        with priority(BACKGROUND):
+            workers = [asyncio.create_task(self.refresh_source(source)) for source in self.scrapers]
+        try:
+            # The hot list moves on every cycle; workers pick up the new one on their next key
+            while True:
+                await asyncio.sleep(CYCLE_SECONDS)
+                try:
+                    self.update_hot()
+                    self.report()
+                except Exception as e:
+                    print(f"[REFRESH] ❌ Cycle failed: {e}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+if __name__ == "__main__":
+    asyncio.run(RouteRefresher().run_forever())
@@ -0,0 +1,188 @@
+"""
+Result Store
+- SQLite cache of the latest ScraperResult per (source, from, to, date)
+- Request log used to find the hottest routes for the background refresher
+- Lookup log used to report how often interactive searches were served from cache
+- prune() drops log rows past FLIGHT_LOG_RETENTION_DAYS and results for dates already gone
+  (the refresher runs it every cycle):
+    python -m tools.result_store prune --days 30
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models.schema import FlightQuery, ScraperResult
+
+RESULT_STORE_PATH = os.environ.get("FLIGHT_RESULT_STORE", "./flight_results.db")
+RESULT_TTL = int(os.environ.get("FLIGHT_RESULT_TTL", str(15 * 60)))  # seconds a cached result counts as fresh
+LOG_RETENTION_DAYS = float(os.environ.get("FLIGHT_LOG_RETENTION_DAYS", "30"))   # request/lookup log rows kept
+
+RouteKey = Tuple[str, str, date]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    source TEXT NOT NULL,
+    from_city TEXT NOT NULL,
+    to_city TEXT NOT NULL,
+    departure_date TEXT NOT NULL,
+    result_json TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    origin TEXT NOT NULL,
+    PRIMARY KEY (source, from_city, to_city, departure_date)
+);
+CREATE TABLE IF NOT EXISTS requests (
+    from_city TEXT NOT NULL,
+    to_city TEXT NOT NULL,
+    departure_date TEXT NOT NULL,
+    requested_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_time ON requests (requested_at);
+CREATE TABLE IF NOT EXISTS lookups (
+    source TEXT NOT NULL,
+    hit INTEGER NOT NULL,
+    origin TEXT,
+    looked_up_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lookups_time ON lookups (looked_up_at);
+"""
+
+
+def route_key(query: FlightQuery) -> RouteKey:
+    """Normalized (from, to, date) used for every cache and log lookup"""
+    return (query.from_city.strip().upper(), query.to_city.strip().upper(), query.departure_date)
+
+
+class ResultStore:
+    """Shared between the interactive graph and the refresher (WAL mode, safe across processes)"""
+
+    def __init__(self, path: str = RESULT_STORE_PATH, ttl: int = RESULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # ============= RESULTS =============
+
+    def get(self, source: str, query: FlightQuery, max_age: Optional[int] = None,
+            record: bool = True) -> Optional[ScraperResult]:
+        """Fresh cached result for this source and route, or None"""
+        from_city, to_city, day = route_key(query)
+        max_age = self.ttl if max_age is None else max_age
+        row = self._conn.execute(
+            "SELECT result_json, scraped_at, origin FROM results "
+            "WHERE source=? AND from_city=? AND to_city=? AND departure_date=?",
+            (source, from_city, to_city, day.isoformat())
+        ).fetchone()
+
+        fresh = row is not None and time.time() - row[1] <= max_age
+        if record:
+            self._conn.execute(
+                "INSERT INTO lookups (source, hit, origin, looked_up_at) VALUES (?, ?, ?, ?)",
+                (source, int(fresh), row[2] if fresh else None, time.time())
+            )
+        return ScraperResult.model_validate_json(row[0]) if fresh else None
+
+    def age(self, source: str, key: RouteKey) -> Optional[float]:
+        """Seconds since this source/route was last scraped, None if never"""
+        from_city, to_city, day = key
+        row = self._conn.execute(
+            "SELECT scraped_at FROM results WHERE source=? AND from_city=? AND to_city=? AND departure_date=?",
+            (source, from_city, to_city, day.isoformat())
+        ).fetchone()
+        return time.time() - row[0] if row else None
+
+    def put(self, source: str, query: FlightQuery, result: ScraperResult, origin: str = "interactive") -> None:
+        """Store a successful result (failures are never cached)"""
+        if not result or not result.success:
+            return
+        from_city, to_city, day = route_key(query)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, from_city, to_city, day.isoformat(), result.model_dump_json(), time.time(), origin)
+        )
+
+    # ============= REQUEST LOG =============
+
+    def log_request(self, query: FlightQuery) -> None:
+        from_city, to_city, day = route_key(query)
+        self._conn.execute(
+            "INSERT INTO requests VALUES (?, ?, ?, ?)",
+            (from_city, to_city, day.isoformat(), time.time())
+        )
+
+    def hottest_routes(self, limit: int = 30, window_days: int = 7, horizon_days: int = 14) -> List[RouteKey]:
+        """Most requested (from, to, date) keys over the last window, limited to upcoming dates"""
+        today = date.today()
+        rows = self._conn.execute(
+            "SELECT from_city, to_city, departure_date, COUNT(*) AS hits FROM requests "
+            "WHERE requested_at >= ? AND departure_date BETWEEN ? AND ? "
+            "GROUP BY from_city, to_city, departure_date ORDER BY hits DESC LIMIT ?",
+            (time.time() - window_days * 86400, today.isoformat(),
+             (today + timedelta(days=horizon_days)).isoformat(), limit)
+        ).fetchall()
+        return [(r[0], r[1], date.fromisoformat(r[2])) for r in rows]
+
+    # ============= STATS =============
+
+    def lookup_stats(self, window_seconds: int = 86400) -> Dict[str, float]:
+        """Cache hit rate and refresh hit rate (hits served by refresher-written entries)"""
+        total, hits, refresh_hits = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hit), 0), COALESCE(SUM(origin = 'refresh'), 0) "
+            "FROM lookups WHERE looked_up_at >= ?",
+            (time.time() - window_seconds,)
+        ).fetchone()
+        return {
+            "lookups": total,
+            "hits": hits,
+            "refresh_hits": refresh_hits,
+            "hit_rate": hits / total if total else 0.0,
+            "refresh_hit_rate": refresh_hits / total if total else 0.0,
+        }
+
+    # ============= MAINTENANCE =============
+
+    def prune(self, max_age: float = LOG_RETENTION_DAYS * 86400) -> Dict[str, int]:
+        """Drop request/lookup log rows older than `max_age` seconds and results for past dates"""
+        cutoff = time.time() - max_age
+        return {
+            "requests": self._conn.execute("DELETE FROM requests WHERE requested_at < ?", (cutoff,)).rowcount,
+            "lookups": self._conn.execute("DELETE FROM lookups WHERE looked_up_at < ?", (cutoff,)).rowcount,
+            "results": self._conn.execute("DELETE FROM results WHERE departure_date < ?",
+                                          (date.today().isoformat(),)).rowcount,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_STORE: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide store, opened on first use"""
+    global _STORE
+    if _STORE is None:
+        _STORE = ResultStore()
+    return _STORE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Result store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prune = sub.add_parser("prune", help="Drop old request/lookup log rows and past-date results")
+    prune.add_argument("--days", type=float, default=LOG_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    store = ResultStore()
+    if args.command == "prune":
+        print(f"[STORE] 🧹 Dropped {store.prune(args.days * 86400)}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
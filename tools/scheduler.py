@@ -0,0 +1,209 @@
+"""
+Search Admission Control
+- Every search (and every refresher scrape) must hold browser slots while it runs; the
+  process has FLIGHT_BROWSER_SLOTS of them, so a traffic spike queues instead of launching
+  three browsers per concurrent request
+- Priority classes: interactive before api before background refresh
+- Within a class, the tenant (API key, caller) holding the fewest slots goes next, then the
+  longest waiting - one busy tenant can't starve the others
+- Each class has a queue-time limit: a request is rejected at once when its class queue is full
+  or the expected wait already exceeds the limit, and rejected when it times out in the queue
+- stats() reports queue depth, slots in use and wait times per class
+
+    async with get_scheduler().admit("tenant-a", INTERACTIVE, slots=3):
+        ...
+"""
+import asyncio
+import itertools
+import os
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional
+
+from tools.rate_limit import BACKGROUND, INTERACTIVE
+
+BROWSER_SLOTS = int(os.environ.get("FLIGHT_BROWSER_SLOTS", "6"))
+MAX_QUEUE = int(os.environ.get("FLIGHT_MAX_QUEUE", "100"))   # waiting requests per class
+
+# Same class names as the rate limiter's navigation priorities, plus api
+API = "api"
+PRIORITIES = (INTERACTIVE, API, BACKGROUND)    # highest first
+
+# Seconds a request of each class may wait for its slots before it is rejected
+QUEUE_LIMITS = {
+    INTERACTIVE: 15.0,
+    API: 60.0,
+    BACKGROUND: 600.0,
+}
+
+HOLD_SMOOTHING = 0.2   # weight of the newest run in the average slot hold time
+WAIT_SAMPLES = 500     # recent waits kept per class for the percentiles
+
+
+class AdmissionRejected(RuntimeError):
+    """The scheduler turned a request away (queue full, expected wait too long, or timed out)"""
+
+    def __init__(self, priority: str, reason: str):
+        super().__init__(f"Search rejected ({priority}): {reason}")
+        self.priority = priority
+        self.reason = reason
+
+
+class _Waiter:
+    def __init__(self, seq: int, tenant: str, priority: str, slots: int):
+        self.seq = seq
+        self.tenant = tenant
+        self.priority = priority
+        self.slots = slots
+        self.granted = asyncio.get_running_loop().create_future()
+
+
+class SearchScheduler:
+    """Browser-slot budget with priority classes and per-tenant fair sharing (one per process)"""
+
+    def __init__(self, slots: int = BROWSER_SLOTS, queue_limits: Optional[Dict[str, float]] = None,
+                 max_queue: int = MAX_QUEUE):
+        self.slots = max(1, slots)
+        self.queue_limits = {**QUEUE_LIMITS, **(queue_limits or {})}
+        self.max_queue = max_queue
+        self.in_use = 0
+        self.tenant_slots = Counter()
+        self._queues: Dict[str, List[_Waiter]] = {priority: [] for priority in PRIORITIES}
+        self._seq = itertools.count()
+        self._hold: Optional[float] = None   # smoothed seconds a request keeps its slots
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self.counts = Counter()              # "<priority>:admitted", "<priority>:rejected:<code>"
+
+    # ============= ADMISSION =============
+
+    @asynccontextmanager
+    async def admit(self, tenant: str = "default", priority: str = INTERACTIVE, slots: int = 1,
+                    max_wait: Optional[float] = None):
+        """Hold `slots` browser slots for the block; yields the seconds spent queued"""
+        slots = max(1, min(slots, self.slots))
+        started = time.monotonic()
+        await self._acquire(tenant, priority, slots, max_wait)
+        waited = time.monotonic() - started
+        self._waits[priority].append(waited)
+        self.counts[f"{priority}:admitted"] += 1
+        if waited > 1:
+            print(f"[SCHEDULER] ⏳ {tenant} ({priority}) admitted after {waited:.1f}s in the queue")
+        held = time.monotonic()
+        try:
+            yield waited
+        finally:
+            elapsed = time.monotonic() - held
+            self._hold = elapsed if self._hold is None else (
+                HOLD_SMOOTHING * elapsed + (1 - HOLD_SMOOTHING) * self._hold)
+            self._release(tenant, slots)
+
+    async def _acquire(self, tenant: str, priority: str, slots: int, max_wait: Optional[float]) -> None:
+        limit = self.queue_limits[priority] if max_wait is None else min(max_wait, self.queue_limits[priority])
+        if not self._waiting() and self.in_use + slots <= self.slots:
+            self._grant(tenant, slots)
+            return
+
+        queue = self._queues[priority]
+        if len(queue) >= self.max_queue:
+            self._reject(priority, "queue_full", "queue full")
+        expected = self.expected_wait(priority, slots)
+        if expected is not None and expected > limit:
+            self._reject(priority, "expected_wait", f"expected wait {expected:.0f}s over the {limit:.0f}s limit")
+
+        waiter = _Waiter(next(self._seq), tenant, priority, slots)
+        queue.append(waiter)
+        try:
+            done, _ = await asyncio.wait({waiter.granted}, timeout=limit)
+        except BaseException:
+            # Caller cancelled while queued: give back anything granted in the meantime
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            self._reject(priority, "timed_out", f"no slot within {limit:.0f}s")
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter in self._queues[waiter.priority]:
+            self._queues[waiter.priority].remove(waiter)
+            waiter.granted.cancel()
+            self._dispatch()   # a large request leaving the head may unblock smaller ones
+        elif waiter.granted.done() and not waiter.granted.cancelled():
+            self._release(waiter.tenant, waiter.slots)
+
+    def _reject(self, priority: str, code: str, reason: str) -> None:
+        self.counts[f"{priority}:rejected:{code}"] += 1
+        print(f"[SCHEDULER] 🚫 Rejected {priority} request: {reason}")
+        raise AdmissionRejected(priority, reason)
+
+    def _grant(self, tenant: str, slots: int) -> None:
+        self.in_use += slots
+        self.tenant_slots[tenant] += slots
+
+    def _release(self, tenant: str, slots: int) -> None:
+        self.in_use -= slots
+        self.tenant_slots[tenant] -= slots
+        if self.tenant_slots[tenant] <= 0:
+            del self.tenant_slots[tenant]
+        self._dispatch()
+
+    def _next(self) -> Optional[_Waiter]:
+        """Highest class first; within it the tenant holding the fewest slots, then the oldest"""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            if queue:
+                return min(queue, key=lambda w: (self.tenant_slots[w.tenant], w.seq))
+        return None
+
+    def _dispatch(self) -> None:
+        # Strict order: the next waiter blocks those behind it, so large requests aren't starved
+        while True:
+            waiter = self._next()
+            if waiter is None or self.in_use + waiter.slots > self.slots:
+                return
+            self._queues[waiter.priority].remove(waiter)
+            self._grant(waiter.tenant, waiter.slots)
+            waiter.granted.set_result(None)
+
+    def _waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def expected_wait(self, priority: str, slots: int) -> Optional[float]:
+        """Rough queue time for a new request: slot demand ahead of it over the slot budget"""
+        if self._hold is None:
+            return None   # nothing has finished yet - no basis for an estimate
+        ahead = sum(w.slots for p in PRIORITIES[:PRIORITIES.index(priority) + 1] for w in self._queues[p])
+        return max(0, self.in_use + ahead + slots - self.slots) / self.slots * self._hold
+
+    # ============= STATS =============
+
+    def stats(self) -> Dict:
+        classes = {}
+        for priority in PRIORITIES:
+            waits = sorted(self._waits[priority])
+            classes[priority] = {
+                "queued": len(self._queues[priority]),
+                "admitted": self.counts[f"{priority}:admitted"],
+                "rejected": sum(n for key, n in self.counts.items() if key.startswith(f"{priority}:rejected")),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "max_wait": waits[-1] if waits else 0.0,
+            }
+        return {
+            "slots": self.slots,
+            "in_use": self.in_use,
+            "tenants": dict(self.tenant_slots),
+            "avg_hold": self._hold,
+            "classes": classes,
+        }
+
+
+_SCHEDULER: Optional[SearchScheduler] = None
+
+
+def get_scheduler() -> SearchScheduler:
+    """Process-wide scheduler, created on first use"""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = SearchScheduler()
+    return _SCHEDULER
@@ -1,9 +1,70 @@
-from .mmt import scrape_makemytrip
-from .cleartrip import scrape_cleartrip
-from .emt import scrape_easemytrip
+"""
+Scrapers are imported lazily: each name below is a thin async proxy that loads its
+module (and playwright) on the first call, so importing this package is free and
+a search served entirely from the result store never loads a browser driver.
+"""
+import importlib
+
+_LAZY = {
+    'scrape_makemytrip': '.mmt',
+    'open_mmt_session': '.mmt',
+    'scrape_cleartrip': '.cleartrip',
+    'open_cleartrip_session': '.cleartrip',
+    'scrape_easemytrip': '.emt',
+    'open_emt_session': '.emt',
+    'BrowserSession': '.session',
+    'SessionWarmup': '.session',
+}
+
+
+def _load(name: str):
+    return getattr(importlib.import_module(_LAZY[name], __name__), name)
+
+
+def _proxy(name: str):
+    async def call(*args, **kwargs):
+        return await _load(name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = name
+    return call
+
+
+scrape_makemytrip = _proxy('scrape_makemytrip')
+scrape_cleartrip = _proxy('scrape_cleartrip')
+scrape_easemytrip = _proxy('scrape_easemytrip')
+open_mmt_session = _proxy('open_mmt_session')
+open_cleartrip_session = _proxy('open_cleartrip_session')
+open_emt_session = _proxy('open_emt_session')
+
+
+def __getattr__(name: str):
+    # Classes can't be proxied by a coroutine - load them on first access
+    if name in ('BrowserSession', 'SessionWarmup'):
+        return _load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+SCRAPERS = {
+    'makemytrip': scrape_makemytrip,
+    'cleartrip': scrape_cleartrip,
+    'easemytrip': scrape_easemytrip,
+}
+
+# Used by the graph to launch browsers speculatively while the query is parsed
+SESSION_OPENERS = {
+    'makemytrip': open_mmt_session,
+    'cleartrip': open_cleartrip_session,
+    'easemytrip': open_emt_session,
+}
 
 __all__ = [
     'scrape_makemytrip',
     'scrape_cleartrip',
-    'scrape_easemytrip'
-]
\ No newline at end of file
+    'scrape_easemytrip',
+    'open_mmt_session',
+    'open_cleartrip_session',
+    'open_emt_session',
+    'BrowserSession',
+    'SessionWarmup',
+    'SCRAPERS',
+    'SESSION_OPENERS'
+]
@@ -0,0 +1,298 @@
+"""
+Static Asset Cache
+- Intercepts script, stylesheet, font and image URLs in every browser context and serves them
+  from a local store shared by all contexts, profiles and processes on the host
+- Bodies are content-addressed (sha256), so the same bundle under two URLs is stored once
+- Fresh entries (max-age / immutable / Expires) are served without touching the network;
+  stale ones are revalidated with If-None-Match / If-Modified-Since and a 304 reuses the body
+- no-store / private / Vary: * responses and non-GET requests always go to the network
+- Responses are keyed by URL plus the request headers their Vary names
+- Size-bounded: least recently used bodies are evicted past FLIGHT_ASSET_CACHE_MB
+
+Routing any URL makes Playwright disable Chromium's HTTP cache for the whole context and
+intercept every request, so documents, XHR and assets the pattern misses are re-fetched each
+time. That pays off for fresh contexts (Cleartrip), whose HTTP cache starts empty anyway, but not
+for the persistent-profile sources (MMT/EMT), which keep a warm disk cache in their profile: they
+are left alone unless FLIGHT_ASSET_CACHE_PERSISTENT=1.
+
+Installed on each session's context by launch_session(); FLIGHT_ASSET_CACHE=0 turns it off.
+"""
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+ASSET_CACHE = os.environ.get("FLIGHT_ASSET_CACHE", "1") == "1"
+ASSET_CACHE_PERSISTENT = os.environ.get("FLIGHT_ASSET_CACHE_PERSISTENT", "0") == "1"
+ASSET_CACHE_DIR = os.path.abspath(os.environ.get("FLIGHT_ASSET_CACHE_DIR", "./asset_cache"))
+ASSET_CACHE_MB = float(os.environ.get("FLIGHT_ASSET_CACHE_MB", "512"))
+MAX_ASSET_BYTES = 20 * 1024 * 1024   # larger bodies are passed through, never stored
+EVICT_TO = 0.9                       # eviction frees space down to this fraction of the limit
+
+CACHEABLE_TYPES = ("script", "stylesheet", "font", "image")
+# Only these URLs are routed through the cache (query strings allowed, e.g. app.js?v=3)
+STATIC_ASSET_URL = re.compile(r"\.(?:m?js|css|woff2?|ttf|otf|png|jpe?g|gif|svg|webp|avif|ico)(?:[?#]|$)",
+                              re.IGNORECASE)
+# Describe the transfer, not the body: the stored body is already decoded
+_DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection",
+                 "keep-alive", "set-cookie", "date", "age")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_lru ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    vary_json TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers_json TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fresh_until REAL NOT NULL,
+    PRIMARY KEY (url, variant)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_blob ON responses (sha256);
+"""
+
+
+def _cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def vary_names(headers: Dict[str, str]) -> Optional[List[str]]:
+    """
+    Request headers a response varies on; None for Vary: * (never reusable)
+
+    Accept-Encoding is ignored: bodies are stored decoded, whatever encoding they arrived in.
+    """
+    names = sorted({name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()})
+    if "*" in names:
+        return None
+    return [name for name in names if name != "accept-encoding"]
+
+
+def _variant(vary: List[str], request_headers: Dict[str, str]) -> str:
+    return json.dumps([request_headers.get(name) for name in vary])
+
+
+def freshness(headers: Dict[str, str], now: float) -> Optional[float]:
+    """
+    Time until which a response may be reused without revalidation; None if it must not be stored
+
+    headers: lower-cased response headers
+    """
+    cc = _cache_control(headers)
+    if "no-store" in cc or "private" in cc:
+        return None
+    if "no-cache" in cc:
+        return now
+    max_age, age = cc.get("max-age") or "", headers.get("age", "")
+    if max_age.isdigit():
+        return now + int(max_age) - (int(age) if age.isdigit() else 0)
+    if "immutable" in cc:
+        return now + 365 * 86400
+    if headers.get("expires"):
+        try:
+            return email.utils.parsedate_to_datetime(headers["expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now   # no freshness info: stored, but revalidated before every use
+
+
+class AssetCache:
+    """Content-addressed bodies on disk plus a SQLite index (WAL mode, safe across processes)"""
+
+    def __init__(self, root: str = ASSET_CACHE_DIR, max_mb: float = ASSET_CACHE_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = Counter()   # hits, revalidated, misses, passed, stored, evicted, bytes_*
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    # ============= INDEX =============
+
+    def lookup(self, url: str, request_headers: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """Stored response for the URL whose Vary'd request headers match these ones"""
+        request_headers = {name.lower(): value for name, value in (request_headers or {}).items()}
+        rows = self._conn.execute(
+            "SELECT variant, vary_json, sha256, status, headers_json, etag, last_modified, fresh_until "
+            "FROM responses WHERE url=?", (url,)
+        ).fetchall()
+        for row in rows:
+            if row[0] == _variant(json.loads(row[1]), request_headers):
+                return dict(zip(("url", "variant", "sha256", "status", "headers", "etag", "last_modified",
+                                 "fresh_until"), (url, row[0], row[2], row[3], json.loads(row[4]), *row[5:])))
+        return None
+
+    async def read(self, entry: Dict) -> Optional[bytes]:
+        """Stored body for an entry (None if another process evicted it meanwhile)"""
+        body = await asyncio.to_thread(self._read_blob, entry["sha256"])
+        if body is None:
+            self._conn.execute("DELETE FROM responses WHERE sha256=?", (entry["sha256"],))
+            return None
+        self._conn.execute("UPDATE blobs SET last_used=? WHERE sha256=?", (time.time(), entry["sha256"]))
+        return body
+
+    def _read_blob(self, sha256: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(sha256), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_blob(self, body: bytes) -> str:
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)   # atomic: readers in other processes never see half a body
+        return sha256
+
+    async def store(self, url: str, status: int, headers: Dict[str, str], body: bytes, fresh_until: float,
+                    request_headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Index the response under `url` and the request headers it varies on; the body is
+        written once per distinct content. Vary: * responses are not stored (returns None).
+        """
+        vary = vary_names(headers)
+        if vary is None:
+            return None
+        request_headers = {name.lower(): value for name, value in (request_headers or {}).items()}
+        sha256 = await asyncio.to_thread(self._write_blob, body)
+        kept = {name: value for name, value in headers.items() if name not in _DROP_HEADERS}
+        self._conn.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)", (sha256, len(body), time.time()))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, _variant(vary, request_headers), json.dumps(vary), sha256, status, json.dumps(kept),
+             headers.get("etag"), headers.get("last-modified"), fresh_until)
+        )
+        self.stats["stored"] += 1
+        self.evict()
+        return sha256
+
+    def refresh(self, entry: Dict, fresh_until: float) -> None:
+        """A 304 confirmed the stored body: extend its freshness"""
+        self._conn.execute("UPDATE responses SET fresh_until=? WHERE url=? AND variant=?",
+                           (fresh_until, entry["url"], entry["variant"]))
+
+    def size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used bodies (and the URLs pointing at them) until under the limit"""
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        for sha256, size in self._conn.execute("SELECT sha256, size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            self._conn.execute("DELETE FROM responses WHERE sha256=?", (sha256,))
+            self._conn.execute("DELETE FROM blobs WHERE sha256=?", (sha256,))
+            try:
+                os.remove(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        self.stats["evicted"] += evicted
+        return evicted
+
+    # ============= INTERCEPTION =============
+
+    async def handle(self, route, request) -> None:
+        """Playwright route handler: serve from the store, revalidate, or fetch and store"""
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            self.stats["passed"] += 1
+            await route.fallback()
+            return
+
+        url, now = request.url, time.time()
+        entry = self.lookup(url, request.headers)
+        body = await self.read(entry) if entry else None
+        if body is not None and now < entry["fresh_until"]:
+            self.stats["hits"] += 1
+            self.stats["bytes_served"] += len(body)
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+
+        headers = dict(request.headers)
+        if body is not None:
+            if entry["etag"]:
+                headers["if-none-match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["if-modified-since"] = entry["last_modified"]
+        try:
+            response = await route.fetch(headers=headers)
+        except Exception:
+            # Let the browser make the request itself (and report the failure its usual way)
+            self.stats["passed"] += 1
+            await route.fallback()
+            return
+
+        response_headers = {name.lower(): value for name, value in response.headers.items()}
+        if response.status == 304 and body is not None:
+            self.stats["revalidated"] += 1
+            self.stats["bytes_served"] += len(body)
+            self.refresh(entry, freshness(response_headers, now) or now)
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+
+        fetched = await response.body()
+        self.stats["misses"] += 1
+        self.stats["bytes_fetched"] += len(fetched)
+        fresh_until = freshness(response_headers, now)
+        validated = fresh_until is not None and (
+            fresh_until > now or "etag" in response_headers or "last-modified" in response_headers)
+        if response.status == 200 and validated and len(fetched) <= MAX_ASSET_BYTES:
+            await self.store(url, 200, response_headers, fetched, fresh_until, request.headers)
+        await route.fulfill(response=response, body=fetched)
+
+    async def install(self, context) -> None:
+        """Route a browser context's static-asset URLs through the cache (everything else is untouched)"""
+        await context.route(STATIC_ASSET_URL, self.handle)
+
+    def report(self) -> Dict[str, float]:
+        served = self.stats["hits"] + self.stats["revalidated"]
+        lookups = served + self.stats["misses"]
+        return {**self.stats, "hit_rate": served / lookups if lookups else 0.0, "size_mb": self.size() / 1024 / 1024}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_CACHE: Optional[AssetCache] = None
+
+
+def get_asset_cache() -> Optional[AssetCache]:
+    """Process-wide cache, opened on first use; None with FLIGHT_ASSET_CACHE=0"""
+    global _CACHE
+    if _CACHE is None and ASSET_CACHE:
+        _CACHE = AssetCache()
+    return _CACHE
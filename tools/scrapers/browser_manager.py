@@ -0,0 +1,193 @@
+"""
+Browser Lifecycle Manager
+- Keeps one long-lived browser per source; each search borrows a fresh page from it
+- Tracks navigations, in-flight pages and process-tree RSS per browser
+- Recycles a browser after MAX_NAVIGATIONS page loads, above MAX_RSS_MB, when its profile is flagged,
+  or when the process supervisor finds it past FLIGHT_BROWSER_MAX_AGE
+- Recycling drains: new searches go to a fresh browser while in-flight pages finish on the old one
+
+Enable with FLIGHT_REUSE_BROWSERS=1 (default: a dedicated browser per search, closed afterwards)
+"""
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from tools.scrapers import processes
+from tools.scrapers.session import BrowserSession, launch_session
+from tools.scrapers.supervisor import get_supervisor
+
+REUSE_BROWSERS = os.environ.get("FLIGHT_REUSE_BROWSERS", "0") == "1"
+MAX_NAVIGATIONS = int(os.environ.get("FLIGHT_BROWSER_MAX_NAVIGATIONS", "50"))
+MAX_RSS_MB = float(os.environ.get("FLIGHT_BROWSER_MAX_RSS_MB", "1500"))
+
+Launcher = Callable[[BrowserSession], Awaitable[None]]
+
+
+class ManagedBrowser:
+    """A long-lived browser (its dedicated BrowserSession) plus usage counters"""
+
+    def __init__(self, session: BrowserSession):
+        self.session = session
+        self.navigations = 0
+        self.in_flight = 0
+        self.rss_mb: Optional[float] = None
+        self.draining = False
+        self.retire_reason: Optional[str] = None
+        self.closed = False
+        self.launched_at = time.monotonic()
+
+    def describe(self) -> Dict:
+        return {
+            "source": self.session.source,
+            "browser_id": self.session.browser_id,
+            "navigations": self.navigations,
+            "in_flight": self.in_flight,
+            "rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            "age_s": round(time.monotonic() - self.launched_at),
+            "draining": self.draining,
+            "retire_reason": self.retire_reason,
+        }
+
+
+class BorrowedSession(BrowserSession):
+    """One search's page on a managed browser; close() returns it instead of closing the browser"""
+
+    def __init__(self, template: BrowserSession, managed: ManagedBrowser, page, manager: "BrowserManager"):
+        super().__init__(template.source, template.tag, template.origin)
+        self.browser_id = managed.session.browser_id
+        self.browser = managed.session.browser
+        self.context = managed.session.context
+        self.lease = managed.session.lease
+        self.page = page
+        self.managed = managed
+        self._manager = manager
+        self._released = False
+
+    async def close(self) -> None:
+        if not self._released:
+            self._released = True
+            await self._manager.release(self)
+
+
+class BrowserManager:
+    def __init__(self, max_navigations: int = MAX_NAVIGATIONS, max_rss_mb: float = MAX_RSS_MB):
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self._current: Dict[str, ManagedBrowser] = {}
+        self._draining: List[ManagedBrowser] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.launched = 0
+        self.recycled = Counter()   # reason -> count
+        self.killed = 0
+
+    async def _browser(self, template: BrowserSession, launch: Launcher) -> ManagedBrowser:
+        async with self._locks.setdefault(template.source, asyncio.Lock()):
+            managed = self._current.get(template.source)
+            if managed is None:
+                session = await launch_session(BrowserSession(template.source, template.tag, template.origin), launch)
+                managed = ManagedBrowser(session)
+                # Long-lived by design: the supervisor retires it through retire() rather than killing it
+                get_supervisor().managed(session.browser_id)
+                self._current[template.source] = managed
+                self.launched += 1
+                print(f"[BROWSERS] 🚀 {template.tag}: launched browser {session.browser_id}")
+            return managed
+
+    async def borrow(self, template: BrowserSession, launch: Launcher) -> BorrowedSession:
+        managed = await self._browser(template, launch)
+        managed.in_flight += 1
+        try:
+            page = await managed.session.context.new_page()
+        except Exception:
+            # Browser died under us - stop handing it out
+            managed.in_flight -= 1
+            self._retire(managed, "error")
+            await self._close_if_drained(managed)
+            raise
+        page.on("framenavigated", lambda frame: self._on_navigation(managed, page, frame))
+        return BorrowedSession(template, managed, page, self)
+
+    def _on_navigation(self, managed: ManagedBrowser, page, frame) -> None:
+        if frame != page.main_frame:
+            return
+        managed.navigations += 1
+        if managed.navigations >= self.max_navigations:
+            self._retire(managed, "navigations")
+
+    async def release(self, borrowed: BorrowedSession) -> None:
+        managed = borrowed.managed
+        try:
+            await asyncio.wait_for(borrowed.page.close(), timeout=5.0)
+        except Exception as e:
+            print(f"[{borrowed.tag}] ⚠️ Error closing page: {e}")
+        managed.in_flight -= 1
+
+        if managed.session.lease is not None and managed.session.lease.flagged:
+            self._retire(managed, "flagged")
+        elif not managed.draining:
+            procs = await asyncio.to_thread(processes.snapshot)
+            roots = processes.marked(procs, managed.session.browser_id)
+            if roots:
+                managed.rss_mb = processes.tree_rss_mb(procs, roots)
+                if managed.rss_mb >= self.max_rss_mb:
+                    self._retire(managed, "memory")
+        await self._close_if_drained(managed)
+
+    def _retire(self, managed: ManagedBrowser, reason: str) -> None:
+        """Stop handing this browser out; it closes once its in-flight pages are released"""
+        if managed.draining:
+            return
+        managed.draining = True
+        managed.retire_reason = reason
+        if self._current.get(managed.session.source) is managed:
+            del self._current[managed.session.source]
+        self._draining.append(managed)
+        self.recycled[reason] += 1
+        print(f"[BROWSERS] ♻️ {managed.session.tag}: recycling browser {managed.session.browser_id} "
+              f"({reason}; {managed.navigations} navigations, {managed.in_flight} pages still in flight)")
+
+    async def retire(self, browser_id: str, reason: str) -> bool:
+        """Retire a browser by id (e.g. past the supervisor's max age); False if it isn't one of ours"""
+        for managed in list(self._current.values()) + self._draining:
+            if managed.session.browser_id == browser_id:
+                self._retire(managed, reason)
+                await self._close_if_drained(managed)
+                return True
+        return False
+
+    async def _close_if_drained(self, managed: ManagedBrowser) -> None:
+        if not managed.draining or managed.in_flight > 0 or managed.closed:
+            return
+        managed.closed = True
+        await managed.session.close()
+        # close() can return with Chromium still alive (timeouts, crashed driver) - make sure it's gone
+        self.killed += await managed.session.kill_leftovers()
+        if managed in self._draining:
+            self._draining.remove(managed)
+
+    def stats(self) -> Dict:
+        return {
+            "launched": self.launched,
+            "recycled": dict(self.recycled),
+            "killed_processes": self.killed,
+            "browsers": [m.describe() for m in list(self._current.values()) + self._draining],
+        }
+
+    async def shutdown(self) -> None:
+        """Retire every browser; idle ones close now, busy ones when their last page is released"""
+        for managed in list(self._current.values()):
+            self._retire(managed, "shutdown")
+        for managed in list(self._draining):
+            await self._close_if_drained(managed)
+
+
+_MANAGER: Optional[BrowserManager] = None
+
+
+def get_browser_manager() -> BrowserManager:
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = BrowserManager()
+    return _MANAGER
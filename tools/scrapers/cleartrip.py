@@ -8,9 +8,15 @@ import asyncio
 import os
 import re
 import json
+from collections import Counter
 from datetime import datetime
+from typing import Optional
 from playwright.async_api import async_playwright
 from models.schema import FlightQuery, Flight, ScraperResult
+from tools.rate_limit import get_rate_limiter
+from tools.scrapers.filters import CARD_FILTER_JS, extract_filtered, pushdown
+from tools.scrapers.session import BrowserSession, open_session, use_session
+from tools.selector_registry import install_strategy_runner, record_strategy_stats
 
 CITY_TO_CODE = {
     'mumbai': 'BOM', 'bangalore': 'BLR', 'bengaluru': 'BLR',
@@ -21,7 +27,319 @@ CITY_TO_CODE = {
     'kochi': 'COK', 'cochin': 'COK'
 }
 
-async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
+CLEARTRIP_ORIGIN = "https://www.cleartrip.com/flights"
+
+# How often each card-detection strategy matched in this process
+CARD_STRATEGY_HITS = Counter()
+
+# Per-field extraction strategies in the extraction script, in default order
+CLEARTRIP_STRATEGIES = {
+    "cards": ["selector", "styled-container", "flight-details"],
+    "flightCode": ["textNode", "cardText"],
+}
+
+
+# One evaluate call per batch: detects the cards, then extracts cards [skip, skip + limit)
+# (further with filters, until `limit` match) - see filters.extract_filtered
+CLEARTRIP_EXTRACT_JS = '''([skip, limit, filters]) => {
+    const results = [];
+    const filter = filters ? (%FILTER%)(filters) : null;
+    let exhausted = false;
+    const seenFlights = new Set(); // Track unique flights
+    
+    // ============= CARD DETECTION (linear time) =============
+    const CODE = 1, TIME = 2, PRICE = 4, FLIGHT = CODE | TIME | PRICE;
+    const textFeatures = (text) =>
+        (/[A-Z0-9]{2}-\\d{3,4}/.test(text) ? CODE : 0) |
+        (/\\d{2}:\\d{2}/.test(text) ? TIME : 0) |
+        (text.includes('₹') ? PRICE : 0);
+    
+    // One post-order walk: each element's features are OR-ed from its own direct text
+    // and its children's memoized features, so no subtree is serialized twice.
+    // The direct text nodes are matched joined, not one by one: React renders
+    // {carrier}-{number} as three adjacent nodes ("6E", "-", "6283").
+    // Computed on first use and shared by the strategies that need it.
+    let features = null;
+    const detailsLabels = [];
+    const walkFeatures = () => {
+        if (features) return;
+        features = new Map();
+        const stack = [[document.body, false]];
+        while (stack.length) {
+            const [el, childrenDone] = stack.pop();
+            if (!childrenDone) {
+                stack.push([el, true]);
+                for (const child of el.children) stack.push([child, false]);
+                continue;
+            }
+            let f = 0;
+            let text = '';
+            for (const child of el.childNodes) {
+                if (child.nodeType === Node.TEXT_NODE) {
+                    text += child.nodeValue;
+                } else if (child.nodeType === Node.ELEMENT_NODE) {
+                    f |= features.get(child) || 0;
+                    text += ' ';   // text on either side of a child element isn't adjacent
+                }
+            }
+            if (text.trim()) {
+                f |= textFeatures(text);
+                if (text.includes('Flight Details')) detailsLabels.push(el);
+            }
+            features.set(el, f);
+        }
+    };
+    // A code or time split across sibling elements ("6E" <span>-</span> "6283") only shows
+    // up in the full text - checked just for the candidates that already hold a price
+    const isFlight = (el) => {
+        const f = features.get(el) || 0;
+        return (f & FLIGHT) === FLIGHT ||
+            ((f & PRICE) !== 0 && (textFeatures(el.textContent || '') & FLIGHT) === FLIGHT);
+    };
+    
+    // Outermost candidates only: one pre-order walk that stops descending at a match
+    const topLevel = (candidates) => {
+        const cards = [];
+        const walk = [document.body];
+        while (walk.length) {
+            const el = walk.pop();
+            if (candidates.has(el)) {
+                cards.push(el);
+                continue;
+            }
+            for (let k = el.children.length - 1; k >= 0; k--) walk.push(el.children[k]);
+        }
+        return cards;
+    };
+    
+    // Strategies are tried in the registry's order (see tools/selector_registry.py)
+    const detectCards = () => window.__tryStrategies('cards', {
+        // The exact class pattern from the screenshot (cheap, usually hits)
+        // div.sc-aXZVg.bCDQyH.pt-1.flex.flex-between.pl-6
+        'selector': () => {
+            const direct = document.querySelectorAll('div.sc-aXZVg.bCDQyH.pt-1.flex.flex-between.pl-6');
+            return direct.length > 0 ? { strategy: 'selector', cards: Array.from(direct) } : null;
+        },
+        
+        // "sc-aXZVg" containers with flex/between classes holding code, time and price
+        'styled-container': () => {
+            walkFeatures();
+            const styled = new Set();
+            for (const el of features.keys()) {
+                const classes = typeof el.className === 'string' ? el.className : '';
+                if (el.tagName === 'DIV' &&
+                    classes.includes('sc-aXZVg') &&
+                    classes.includes('flex') &&
+                    classes.includes('between') &&
+                    isFlight(el)) {
+                    styled.add(el);
+                }
+            }
+            return styled.size > 0 ? { strategy: 'styled-container', cards: topLevel(styled) } : null;
+        },
+        
+        // Nearest ancestor (up to 5 levels) of a "Flight Details" label holding a full flight
+        'flight-details': () => {
+            walkFeatures();
+            const labelled = new Set();
+            for (const label of detailsLabels) {
+                let parent = label.parentElement;
+                for (let depth = 0; parent && depth < 5; depth++, parent = parent.parentElement) {
+                    if (isFlight(parent)) {
+                        labelled.add(parent);
+                        break;
+                    }
+                }
+            }
+            return labelled.size > 0 ? { strategy: 'flight-details', cards: topLevel(labelled) } : null;
+        }
+    }) || { strategy: 'none', cards: [] };
+    
+    const { strategy, cards: flightCards } = detectCards();
+    console.log('Strategy', strategy, 'found:', flightCards.length, 'cards');
+    
+    // Unfiltered: exactly `limit` cards. Filtered: as far as it takes to find `limit` matches
+    const end = filter ? flightCards.length : Math.min(skip + limit, flightCards.length);
+    console.log('Processing', end - skip, 'flight cards');
+    
+    let i = skip;
+    for (; i < end && results.length < limit; i++) {
+        try {
+            const card = flightCards[i];
+            const cardText = card.textContent || '';
+            
+            // ========= EXTRACT FLIGHT CODE =========
+            const flightCode = window.__tryStrategies('flightCode', {
+                // An element whose direct text is exactly a flight code (one walk, no per-element
+                // textContent); adjacent text nodes are joined, as in walkFeatures
+                // Match pattern like "6E-6283", "QP-1375", etc.
+                textNode: c => {
+                    const walker = document.createTreeWalker(c, NodeFilter.SHOW_TEXT, null);
+                    let textNode, parent = null;
+                    while ((textNode = walker.nextNode())) {
+                        if (textNode.parentNode === parent) continue;
+                        parent = textNode.parentNode;
+                        let text = '';
+                        for (const child of parent.childNodes) {
+                            if (child.nodeType === Node.TEXT_NODE) text += child.nodeValue;
+                            else if (child.nodeType === Node.ELEMENT_NODE) text += ' ';
+                        }
+                        text = text.trim();
+                        if (/^[A-Z0-9]{2}-\\d{3,4}$/.test(text)) return text;
+                    }
+                    return null;
+                },
+                // Search in card text
+                cardText: () => {
+                    const match = cardText.match(/\\b([A-Z0-9]{2})-?(\\d{3,4})\\b/);
+                    return match ? `${match[1]}-${match[2]}` : null;
+                }
+            }, card) || 'N/A';
+            console.log(`Flight ${i} code:`, flightCode);
+            
+            // ========= EXTRACT AIRLINE =========
+            let airline = 'Unknown';
+            const airlineNames = ['IndiGo', 'Air India Express', 'Air India', 'Vistara', 'Akasa Air', 'SpiceJet', 'Go First', 'Alliance Air'];
+            
+            for (const name of airlineNames) {
+                if (cardText.includes(name)) {
+                    airline = name;
+                    break;
+                }
+            }
+            
+            // ========= EXTRACT TIMES =========
+            // Look for HH:MM format
+            const timeMatches = cardText.match(/\\b\\d{2}:\\d{2}\\b/g) || [];
+            // Remove duplicates and take first two
+            const uniqueTimes = [...new Set(timeMatches)];
+            const departureTime = uniqueTimes.length > 0 ? uniqueTimes[0] : 'N/A';
+            const arrivalTime = uniqueTimes.length > 1 ? uniqueTimes[1] : 'N/A';
+            
+            // ========= EXTRACT DURATION =========
+            let duration = 'N/A';
+            const durationMatch = cardText.match(/(\\d{1,2})h\\s*(\\d{2})m/i);
+            if (durationMatch) {
+                duration = `${durationMatch[1]}h ${durationMatch[2]}m`;
+            }
+            
+            // ========= EXTRACT STOPS =========
+            let stops = 0;
+            const stopsLower = cardText.toLowerCase();
+            if (stopsLower.includes('non-stop') || stopsLower.includes('nonstop')) {
+                stops = 0;
+            } else if (stopsLower.includes('1 stop')) {
+                stops = 1;
+            } else if (stopsLower.includes('2 stop')) {
+                stops = 2;
+            }
+            
+            // ========= EXTRACT PRICE =========
+            let price = 0;
+            const priceMatches = cardText.match(/₹\\s*([\\d,]+)/g);
+            if (priceMatches) {
+                for (const match of priceMatches) {
+                    const numMatch = match.match(/₹\\s*([\\d,]+)/);
+                    if (numMatch) {
+                        const p = parseInt(numMatch[1].replace(/,/g, ''));
+                        // Filter: must be reasonable flight price
+                        if (p >= 1000 && p <= 150000) {
+                            price = p;
+                            break;
+                        }
+                    }
+                }
+            }
+            
+            // ========= EXTRACT CITIES =========
+            let departureCity = 'N/A';
+            let arrivalCity = 'N/A';
+            
+            const cityPatterns = [
+                'Delhi', 'Mumbai', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad',
+                'Pune', 'Ahmedabad', 'Goa', 'Jaipur', 'Lucknow', 'Kochi'
+            ];
+            
+            const foundCities = [];
+            for (const city of cityPatterns) {
+                if (cardText.includes(city)) {
+                    foundCities.push(city);
+                }
+            }
+            
+            if (foundCities.length >= 2) {
+                departureCity = foundCities[0];
+                arrivalCity = foundCities[1];
+            }
+            
+            // Create unique identifier
+            const flightId = `${flightCode}-${price}-${departureTime}`;
+            
+            // Skip duplicates
+            if (seenFlights.has(flightId)) {
+                console.log(`Skipping duplicate: ${flightId}`);
+                continue;
+            }
+            
+            console.log(`Flight ${i}: ${airline} ${flightCode}, ${departureTime}->${arrivalTime}, ₹${price}`);
+            
+            if (price > 0 && departureTime !== 'N/A') {
+                const data = {
+                    index: i,
+                    airline: airline,
+                    flightCode: flightCode,
+                    departureTime: departureTime,
+                    arrivalTime: arrivalTime,
+                    departureCity: departureCity,
+                    arrivalCity: arrivalCity,
+                    duration: duration,
+                    stops: stops,
+                    price: price
+                };
+                // Filtered out in the page - never serialized back to Python
+                if (filter && !filter.accepts(data)) {
+                    if (filter.exhausted(data)) {
+                        exhausted = true;
+                        i++;
+                        break;
+                    }
+                    continue;
+                }
+                seenFlights.add(flightId);
+                results.push(data);
+            }
+            
+        } catch (err) {
+            console.error(`Error extracting flight ${i}:`, err);
+        }
+    }
+    
+    return { strategy, flights: results, examined: i, exhausted };
+}'''.replace("%FILTER%", CARD_FILTER_JS)
+
+
+async def _launch_cleartrip(session: BrowserSession) -> None:
+    p = await session.enter(async_playwright())
+    # Stealth mode
+    session.browser = await p.chromium.launch(
+        headless=False, 
+        args=["--disable-blink-features=AutomationControlled", "--start-maximized", *session.launch_args]
+    )
+    session.context = await session.browser.new_context(
+        viewport={'width': 1920, 'height': 1080},
+        user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    )
+    
+    await session.context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    session.page = await session.context.new_page()
+
+
+async def open_cleartrip_session() -> BrowserSession:
+    return await open_session(BrowserSession("cleartrip", "Cleartrip", CLEARTRIP_ORIGIN), _launch_cleartrip)
+
+
+async def scrape_cleartrip(query: FlightQuery, session: Optional[BrowserSession] = None) -> ScraperResult:
     # Prepare URL
     from_code = CITY_TO_CODE.get(query.from_city.lower(), query.from_city[:3].upper())
     to_code = CITY_TO_CODE.get(query.to_city.lower(), query.to_city[:3].upper())
@@ -31,24 +349,12 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
     url = f"https://www.cleartrip.com/flights/results?adults=1&childs=0&infants=0&class=Economy&from={from_code}&to={to_code}&depart_date={date_str}&intl=n&sd=1"
     print(f"[Cleartrip] 🔍 Navigating: {url}")
 
-    async with async_playwright() as p:
-        browser = None
-        context = None
+    # Reuse the pre-warmed session if the graph handed one in
+    async with use_session(session, open_cleartrip_session) as session:
+        page = session.page
         try:
-            # Stealth mode
-            browser = await p.chromium.launch(
-                headless=False, 
-                args=["--disable-blink-features=AutomationControlled", "--start-maximized"]
-            )
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-            )
-            
-            await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            page = await context.new_page()
-            
+            await install_strategy_runner(page, "cleartrip", CLEARTRIP_STRATEGIES)
+            await get_rate_limiter().acquire(url)
             await page.goto(url, timeout=60000)
             print("[Cleartrip] ⏳ Page loaded, waiting for results...")
             
@@ -67,239 +373,21 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
             # ============= EXTRACT WITH FLIGHT CODE =============
             print("[Cleartrip] 📊 Extracting flights with flight codes...")
             
-            flights_data = await page.evaluate('''() => {
-                const results = [];
-                const seenFlights = new Set(); // Track unique flights
-                
-                // Based on screenshot: Look for the parent div that contains:
-                // - div.sc-aXZVg.bCDQyH.pt-1.flex.flex-between.pl-6 (this seems to be the flight card container)
-                // The class pattern shows: sc-aXZVg followed by another class, with pt-1, flex, flex-between, pl-6
-                
-                // Strategy 1: Look for divs with the specific class pattern from screenshot
-                let flightCards = document.querySelectorAll('div.sc-aXZVg.bCDQyH.pt-1.flex.flex-between.pl-6');
-                
-                console.log('Strategy 1 found:', flightCards.length, 'cards');
-                
-                // Strategy 2: If not found, look for parent containers with class starting with "sc-aXZVg" that contain flight codes
-                if (flightCards.length === 0) {
-                    const allDivs = document.querySelectorAll('div[class*="sc-aXZVg"]');
-                    const candidates = [];
-                    
-                    for (const div of allDivs) {
-                        const text = div.textContent || '';
-                        const classes = div.className || '';
-                        
-                        // Must contain: flight code pattern, time pattern, price, and have flex/between classes
-                        if (classes.includes('flex') && 
-                            classes.includes('between') && 
-                            /[A-Z0-9]{2}-\\d{3,4}/.test(text) &&
-                            /\\d{2}:\\d{2}/.test(text) &&
-                            text.includes('₹')) {
-                            candidates.push(div);
-                        }
-                    }
-                    
-                    // Find only top-level cards (not nested)
-                    const topLevel = [];
-                    for (const card of candidates) {
-                        let isNested = false;
-                        for (const other of candidates) {
-                            if (other !== card && other.contains(card)) {
-                                isNested = true;
-                                break;
-                            }
-                        }
-                        if (!isNested) {
-                            topLevel.push(card);
-                        }
-                    }
-                    
-                    flightCards = topLevel;
-                    console.log('Strategy 2 found:', flightCards.length, 'cards');
-                }
-                
-                // Strategy 3: Look for containers with "Flight Details" text nearby
-                if (flightCards.length === 0) {
-                    const flightDetailsElements = document.querySelectorAll('*');
-                    const candidates = [];
-                    
-                    for (const el of flightDetailsElements) {
-                        if (el.textContent && el.textContent.includes('Flight Details')) {
-                            // Get the parent container that has the full flight info
-                            let parent = el.parentElement;
-                            let depth = 0;
-                            while (parent && depth < 5) {
-                                const text = parent.textContent || '';
-                                if (/[A-Z0-9]{2}-\\d{3,4}/.test(text) && 
-                                    /\\d{2}:\\d{2}/.test(text) && 
-                                    text.includes('₹')) {
-                                    candidates.push(parent);
-                                    break;
-                                }
-                                parent = parent.parentElement;
-                                depth++;
-                            }
-                        }
-                    }
-                    
-                    // Deduplicate
-                    const uniqueCandidates = [];
-                    for (const card of candidates) {
-                        let isDuplicate = false;
-                        for (const existing of uniqueCandidates) {
-                            if (existing.contains(card) || card.contains(existing)) {
-                                isDuplicate = true;
-                                break;
-                            }
-                        }
-                        if (!isDuplicate) {
-                            uniqueCandidates.push(card);
-                        }
-                    }
-                    
-                    flightCards = uniqueCandidates;
-                    console.log('Strategy 3 found:', flightCards.length, 'cards');
-                }
-                
-                console.log('Processing', Math.min(10, flightCards.length), 'flight cards');
-                
-                for (let i = 0; i < Math.min(10, flightCards.length); i++) {
-                    try {
-                        const card = flightCards[i];
-                        const cardText = card.textContent || '';
-                        
-                        // ========= EXTRACT FLIGHT CODE =========
-                        let flightCode = 'N/A';
-                        
-                        // Look for flight code in various elements
-                        const codeElements = card.querySelectorAll('p, span, div');
-                        for (const el of codeElements) {
-                            const text = el.textContent.trim();
-                            // Match pattern like "6E-6283", "QP-1375", etc.
-                            if (/^[A-Z0-9]{2}-\\d{3,4}$/.test(text)) {
-                                flightCode = text;
-                                console.log(`Flight ${i} code:`, flightCode);
-                                break;
-                            }
-                        }
-                        
-                        // Fallback: Search in card text
-                        if (flightCode === 'N/A') {
-                            const match = cardText.match(/\\b([A-Z0-9]{2})-?(\\d{3,4})\\b/);
-                            if (match) {
-                                flightCode = `${match[1]}-${match[2]}`;
-                            }
-                        }
-                        
-                        // ========= EXTRACT AIRLINE =========
-                        let airline = 'Unknown';
-                        const airlineNames = ['IndiGo', 'Air India Express', 'Air India', 'Vistara', 'Akasa Air', 'SpiceJet', 'Go First', 'Alliance Air'];
-                        
-                        for (const name of airlineNames) {
-                            if (cardText.includes(name)) {
-                                airline = name;
-                                break;
-                            }
-                        }
-                        
-                        // ========= EXTRACT TIMES =========
-                        // Look for HH:MM format
-                        const timeMatches = cardText.match(/\\b\\d{2}:\\d{2}\\b/g) || [];
-                        // Remove duplicates and take first two
-                        const uniqueTimes = [...new Set(timeMatches)];
-                        const departureTime = uniqueTimes.length > 0 ? uniqueTimes[0] : 'N/A';
-                        const arrivalTime = uniqueTimes.length > 1 ? uniqueTimes[1] : 'N/A';
-                        
-                        // ========= EXTRACT DURATION =========
-                        let duration = 'N/A';
-                        const durationMatch = cardText.match(/(\\d{1,2})h\\s*(\\d{2})m/i);
-                        if (durationMatch) {
-                            duration = `${durationMatch[1]}h ${durationMatch[2]}m`;
-                        }
-                        
-                        // ========= EXTRACT STOPS =========
-                        let stops = 0;
-                        const stopsLower = cardText.toLowerCase();
-                        if (stopsLower.includes('non-stop') || stopsLower.includes('nonstop')) {
-                            stops = 0;
-                        } else if (stopsLower.includes('1 stop')) {
-                            stops = 1;
-                        } else if (stopsLower.includes('2 stop')) {
-                            stops = 2;
-                        }
-                        
-                        // ========= EXTRACT PRICE =========
-                        let price = 0;
-                        const priceMatches = cardText.match(/₹\\s*([\\d,]+)/g);
-                        if (priceMatches) {
-                            for (const match of priceMatches) {
-                                const numMatch = match.match(/₹\\s*([\\d,]+)/);
-                                if (numMatch) {
-                                    const p = parseInt(numMatch[1].replace(/,/g, ''));
-                                    // Filter: must be reasonable flight price
-                                    if (p >= 1000 && p <= 150000) {
-                                        price = p;
-                                        break;
-                                    }
-                                }
-                            }
-                        }
-                        
-                        // ========= EXTRACT CITIES =========
-                        let departureCity = 'N/A';
-                        let arrivalCity = 'N/A';
-                        
-                        const cityPatterns = [
-                            'Delhi', 'Mumbai', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad',
-                            'Pune', 'Ahmedabad', 'Goa', 'Jaipur', 'Lucknow', 'Kochi'
-                        ];
-                        
-                        const foundCities = [];
-                        for (const city of cityPatterns) {
-                            if (cardText.includes(city)) {
-                                foundCities.push(city);
-                            }
-                        }
-                        
-                        if (foundCities.length >= 2) {
-                            departureCity = foundCities[0];
-                            arrivalCity = foundCities[1];
-                        }
-                        
-                        // Create unique identifier
-                        const flightId = `${flightCode}-${price}-${departureTime}`;
-                        
-                        // Skip duplicates
-                        if (seenFlights.has(flightId)) {
-                            console.log(`Skipping duplicate: ${flightId}`);
-                            continue;
-                        }
-                        
-                        console.log(`Flight ${i}: ${airline} ${flightCode}, ${departureTime}->${arrivalTime}, ₹${price}`);
-                        
-                        if (price > 0 && departureTime !== 'N/A') {
-                            seenFlights.add(flightId);
-                            results.push({
-                                index: i,
-                                airline: airline,
-                                flightCode: flightCode,
-                                departureTime: departureTime,
-                                arrivalTime: arrivalTime,
-                                departureCity: departureCity,
-                                arrivalCity: arrivalCity,
-                                duration: duration,
-                                stops: stops,
-                                price: price
-                            });
-                        }
-                        
-                    } catch (err) {
-                        console.error(`Error extracting flight ${i}:`, err);
-                    }
-                }
-                
-                return results;
-            }''')
+            strategies = []
+            
+            async def extract(skip: int, limit: int, filters: Optional[dict]) -> dict:
+                extraction = await page.evaluate(CLEARTRIP_EXTRACT_JS, [skip, limit, filters])
+                strategies.append(extraction['strategy'])
+                return extraction
+            
+            # Cleartrip's results default to cheapest first, so a price ceiling ends the listing early
+            flights_data = await extract_filtered(page, extract, 10, pushdown(query, price_sorted=True), "Cleartrip",
+                                                  lambda data: Flight.from_cards([data], "cleartrip", url)[0])
+            
+            # Record which detection strategy matched - the walk only runs when the cheap selector misses
+            CARD_STRATEGY_HITS[strategies[0]] += 1
+            print(f"[Cleartrip] 🧭 Card detection strategy: {strategies[0]} (history: {dict(CARD_STRATEGY_HITS)})")
+            await record_strategy_stats(page, "cleartrip")
             
             if not flights_data or len(flights_data) == 0:
                 print("[Cleartrip] ❌ Could not extract any flights")
@@ -331,8 +419,8 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
                 "flights": []
             }
             
-            # Create flight objects and JSON entries
-            flights = []
+            # Create flight objects (one validation pass for the batch) and JSON entries
+            flights = Flight.from_cards(flights_data, "cleartrip", url)
             print(f"\n[Cleartrip] {'='*60}")
             print(f"[Cleartrip] ✅ EXTRACTED {len(flights_data)} UNIQUE FLIGHTS:")
             print(f"[Cleartrip] {'='*60}")
@@ -346,18 +434,6 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
                 print(f"[Cleartrip]   Duration: {data['duration']}")
                 print(f"[Cleartrip]   Stops: {data['stops']}")
                 
-                flight = Flight(
-                    airline=data['airline'],
-                    price=float(data['price']),
-                    departure_time=data['departureTime'],
-                    arrival_time=data['arrivalTime'],
-                    duration=data['duration'],
-                    stops=data['stops'],
-                    source="cleartrip",
-                    booking_url=url
-                )
-                flights.append(flight)
-                
                 # Add to JSON
                 json_data["flights"].append({
                     "flight_number": idx,
@@ -393,11 +469,7 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
             
             await page.screenshot(path="cleartrip_success.png", full_page=True)
             
-            return ScraperResult(
-                success=True,
-                source="cleartrip",
-                flights=flights
-            )
+            return ScraperResult.from_flights("cleartrip", flights)
 
         except Exception as e:
             print(f"[Cleartrip] ❌ Error: {e}")
@@ -412,24 +484,3 @@ async def scrape_cleartrip(query: FlightQuery) -> ScraperResult:
             except:
                 pass
             return ScraperResult(success=False, source="cleartrip", error=str(e), flights=[])
-        
-        finally:
-            # Close browser properly with timeout
-            if context:
-                try:
-                    print("[Cleartrip] 🔒 Closing browser context...")
-                    await asyncio.wait_for(context.close(), timeout=5.0)
-                    print("[Cleartrip] ✓ Context closed")
-                except asyncio.TimeoutError:
-                    print("[Cleartrip] ⚠️ Context close timed out")
-                except Exception as e:
-                    print(f"[Cleartrip] ⚠️ Error closing context: {e}")
-            
-            if browser:
-                try:
-                    await asyncio.wait_for(browser.close(), timeout=5.0)
-                    print("[Cleartrip] ✓ Browser closed")
-                except asyncio.TimeoutError:
-                    print("[Cleartrip] ⚠️ Browser close timed out")
-                except Exception as e:
-                    print(f"[Cleartrip] ⚠️ Error closing browser: {e}")
\ No newline at end of file
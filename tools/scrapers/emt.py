@@ -9,8 +9,15 @@ import os
 import re
 import json
 from datetime import datetime
+from typing import Optional
 from playwright.async_api import async_playwright
 from models.schema import FlightQuery, Flight, ScraperResult
+from tools.profile_pool import get_profile_pool
+from tools.rate_limit import get_rate_limiter
+from tools.scrapers.session import BrowserSession, open_session, use_session
+from tools.scrapers.filters import CARD_FILTER_JS, extract_filtered, filtered_card_js, pushdown
+from tools.scrapers.streaming import STREAM_CARDS, CardStream
+from tools.selector_registry import install_strategy_runner, record_strategy_stats
 
 
 CITY_TO_CODE = {
@@ -34,7 +41,172 @@ CODE_TO_FULL_NAME = {
 }
 
 
-async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
+EMT_ORIGIN = "https://www.easemytrip.com/"
+
+# Per-field extraction strategies in EMT_CARD_JS, in default order
+EMT_STRATEGIES = {
+    "flightCode": ["txtR5", "rowText"],
+}
+
+# Per-card extractor (anchored on the price span), shared by the batch evaluate
+# and the streaming observer. Returns null until the surrounding row has rendered.
+EMT_CARD_JS = '''(priceSpan, i) => {
+    // Get price
+    const priceAttr = priceSpan.getAttribute('price');
+    const price = priceAttr ? parseInt(priceAttr) : null;
+
+    if (!price || price < 1000 || price > 150000) {
+        console.log(`Invalid price for flight ${i}:`, price);
+        return null;
+    }
+
+    // Find the parent flight row
+    let flightRow = priceSpan;
+    for (let j = 0; j < 15; j++) {
+        flightRow = flightRow.parentElement;
+        if (!flightRow) break;
+
+        const rowText = flightRow.textContent || '';
+
+        // Check if this is a complete flight row
+        const hasAirline = flightRow.querySelector('span.txt-r4.ng-binding');
+        const times = rowText.match(/\\d{2}:\\d{2}/g);
+
+        if (hasAirline && times && times.length >= 2) {
+            // Extract airline
+            const airlineSpan = flightRow.querySelector('span.txt-r4.ng-binding');
+            let airline = airlineSpan ? airlineSpan.textContent.trim() : 'Unknown';
+            airline = airline.replace(/\\n/g, ' ').replace(/\\s+/g, ' ').trim();
+
+            // ========= EXTRACT FLIGHT CODE =========
+            // Strategies tried in the registry's order (see tools/selector_registry.py)
+            const flightCode = window.__tryStrategies('flightCode', {
+                // From screenshot: <span class="txt-r5">IX-1463</span>
+                txtR5: row => {
+                    const flightCodeSpan = row.querySelector('span.txt-r5');
+                    return flightCodeSpan ? flightCodeSpan.textContent.trim() || null : null;
+                },
+                // Look for pattern like "6E-", "IX-", "AI-", etc.
+                rowText: () => {
+                    const codeMatch = rowText.match(/\\b([A-Z0-9]{2})-?\\s*\\d{3,4}\\b/);
+                    return codeMatch ? codeMatch[0] : null;
+                }
+            }, flightRow) || 'N/A';
+            console.log(`Flight ${i} code:`, flightCode);
+
+            // Extract times
+            const departureTime = times[0] || 'N/A';
+            const arrivalTime = times[1] || 'N/A';
+
+            // Extract duration
+            const durationMatch = rowText.match(/(\\d{2}h\\s*\\d{2}m)/);
+            const duration = durationMatch ? durationMatch[1] : 'N/A';
+
+            // Extract stops
+            let stops = 0;
+            if (rowText.includes('Non-stop') || rowText.includes('Nonstop')) {
+                stops = 0;
+            } else if (rowText.includes('1 Stop') || rowText.includes('1-Stop')) {
+                stops = 1;
+            } else if (rowText.includes('2 Stop') || rowText.includes('2-Stop')) {
+                stops = 2;
+            }
+
+            // Extract cities
+            const cityElements = flightRow.querySelectorAll('.txt-r3-n.ng-binding');
+            const departureCity = cityElements[0] ? cityElements[0].textContent.trim() : 'N/A';
+            const arrivalCity = cityElements[1] ? cityElements[1].textContent.trim() : 'N/A';
+
+            console.log(`Flight ${i}: ${airline} ${flightCode}, ${departureTime}->${arrivalTime}, ₹${price}`);
+            return {
+                index: i,
+                airline,
+                flightCode,
+                price,
+                departureTime,
+                arrivalTime,
+                duration,
+                stops,
+                departureCity,
+                arrivalCity
+            };
+        }
+    }
+
+    // Row not fully rendered yet
+    return null;
+}'''
+
+
+# Batch extraction over the price spans (spnPrice0, spnPrice1, ...) from index `skip` on
+#   ([skip, limit, filters]) -> {flights, examined, exhausted} (see filters.py)
+EMT_EXTRACT_JS = '''([skip, limit, filters]) => {
+    const extract = %EXTRACT%;
+    const filter = filters ? (%FILTER%)(filters) : null;
+    const results = [];
+
+    // Unfiltered: the first `limit` price elements. Filtered: every rendered one until `limit` match
+    let i = skip;
+    for (; filter ? results.length < limit : i < skip + limit; i++) {
+        try {
+            const priceSpan = document.querySelector(`span[id="spnPrice${i}"][price]`);
+
+            if (!priceSpan) {
+                console.log(`spnPrice${i} not found`);
+                if (filter) break;   // not rendered yet - scroll for more
+                continue;
+            }
+
+            const data = extract(priceSpan, i);
+            if (!data) continue;
+            if (filter && !filter.accepts(data)) {
+                if (filter.exhausted(data)) return { flights: results, examined: i + 1, exhausted: true };
+                continue;
+            }
+            results.push(data);
+        } catch (err) {
+            console.error(`Error extracting flight ${i}:`, err);
+        }
+    }
+
+    return { flights: results, examined: i, exhausted: false };
+}'''.replace("%EXTRACT%", EMT_CARD_JS).replace("%FILTER%", CARD_FILTER_JS)
+
+
+def _emt_flight(data: dict, url: str) -> Flight:
+    return Flight.from_cards([data], "easemytrip", url)[0]
+
+
+def _emt_card_key(data: dict) -> str:
+    return f"{data['flightCode']}-{data['price']}-{data['departureTime']}"
+
+
+async def _launch_emt(session: BrowserSession) -> None:
+    # Lease a clone of ./emt_session so concurrent searches don't fight over one profile
+    pool = get_profile_pool("easemytrip", "./emt_session")
+    session.lease = await session.enter(pool.lease())
+    p = await session.enter(async_playwright())
+    user_data_dir = session.lease.path
+    try:
+        session.context = await p.chromium.launch_persistent_context(
+            user_data_dir, headless=False, channel="chrome", 
+            args=["--start-maximized", "--disable-blink-features=AutomationControlled", *session.launch_args],
+            viewport=None
+        )
+    except:
+        session.context = await p.chromium.launch_persistent_context(
+            user_data_dir, headless=False,
+            args=["--start-maximized", "--disable-blink-features=AutomationControlled", *session.launch_args],
+            viewport=None
+        )
+    session.page = session.context.pages[0]
+
+
+async def open_emt_session() -> BrowserSession:
+    return await open_session(BrowserSession("easemytrip", "EMT", EMT_ORIGIN), _launch_emt)
+
+
+async def scrape_easemytrip(query: FlightQuery, session: Optional[BrowserSession] = None) -> ScraperResult:
     from_city_lower = query.from_city.lower()
     to_city_lower = query.to_city.lower()
     
@@ -49,146 +221,43 @@ async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
     
     print(f"[EMT] 🔍 {from_code} → {to_code} | {date_str}")
     
-    user_data_dir = os.path.abspath("./emt_session")
-
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch_persistent_context(
-                user_data_dir, headless=False, channel="chrome", 
-                args=["--start-maximized", "--disable-blink-features=AutomationControlled"],
-                viewport=None
-            )
-        except:
-            browser = await p.chromium.launch_persistent_context(
-                user_data_dir, headless=False,
-                args=["--start-maximized", "--disable-blink-features=AutomationControlled"],
-                viewport=None
-            )
-            
-        page = browser.pages[0]
+    # Reuse the pre-warmed session if the graph handed one in
+    async with use_session(session, open_emt_session) as session:
+        page = session.page
         
         try:
+            # EMT lists the cheapest fare first, so a price ceiling also ends the listing early
+            filters = pushdown(query, price_sorted=True)
+            # Streaming mode: the observer has to be in place before navigation
+            stream = None
+            if STREAM_CARDS:
+                stream = CardStream("EMT", to_flight=lambda data: _emt_flight(data, url), key=_emt_card_key, max_cards=5)
+                await stream.attach(page, 'span[id^="spnPrice"][price]', filtered_card_js(EMT_CARD_JS, filters))
+            await install_strategy_runner(page, "easemytrip", EMT_STRATEGIES)
+            
+            await get_rate_limiter().acquire(url)
             await page.goto(url, wait_until='domcontentloaded', timeout=60000)
             print("[EMT] ⏳ Page loaded, waiting for results...")
             
-            # Wait for flights to load
-            await asyncio.sleep(5)
-            
-            # Take screenshot
-            await page.screenshot(path="emt_loaded.png", full_page=False)
-            
-            # ============= EXTRACTION WITH FLIGHT CODE =============
-            print("[EMT] 📊 Extracting flights with flight codes...")
-            
-            flights_data = await page.evaluate('''() => {
-                const results = [];
+            if stream:
+                flights_data = await stream.wait(timeout=30)
+                print(f"[EMT] ✓ Streamed {len(flights_data)} cards")
+            else:
+                # Wait for flights to load
+                await asyncio.sleep(5)
                 
-                // Find first 5 price elements
-                for (let i = 0; i < 5; i++) {
-                    try {
-                        const priceSpan = document.querySelector(`span[id="spnPrice${i}"][price]`);
-                        
-                        if (!priceSpan) {
-                            console.log(`spnPrice${i} not found`);
-                            continue;
-                        }
-                        
-                        // Get price
-                        const priceAttr = priceSpan.getAttribute('price');
-                        const price = priceAttr ? parseInt(priceAttr) : null;
-                        
-                        if (!price || price < 1000 || price > 150000) {
-                            console.log(`Invalid price for flight ${i}:`, price);
-                            continue;
-                        }
-                        
-                        // Find the parent flight row
-                        let flightRow = priceSpan;
-                        for (let j = 0; j < 15; j++) {
-                            flightRow = flightRow.parentElement;
-                            if (!flightRow) break;
-                            
-                            const rowText = flightRow.textContent || '';
-                            
-                            // Check if this is a complete flight row
-                            const hasAirline = flightRow.querySelector('span.txt-r4.ng-binding');
-                            const times = rowText.match(/\\d{2}:\\d{2}/g);
-                            
-                            if (hasAirline && times && times.length >= 2) {
-                                // Extract airline
-                                const airlineSpan = flightRow.querySelector('span.txt-r4.ng-binding');
-                                let airline = airlineSpan ? airlineSpan.textContent.trim() : 'Unknown';
-                                airline = airline.replace(/\\n/g, ' ').replace(/\\s+/g, ' ').trim();
-                                
-                                // ========= EXTRACT FLIGHT CODE =========
-                                // From screenshot: <span class="txt-r5">IX-1463</span>
-                                let flightCode = 'N/A';
-                                const flightCodeSpan = flightRow.querySelector('span.txt-r5');
-                                if (flightCodeSpan) {
-                                    flightCode = flightCodeSpan.textContent.trim();
-                                    console.log(`Flight ${i} code:`, flightCode);
-                                }
-                                
-                                // If flight code not found in txt-r5, try to extract from text
-                                if (flightCode === 'N/A') {
-                                    // Look for pattern like "6E-", "IX-", "AI-", etc.
-                                    const codeMatch = rowText.match(/\\b([A-Z0-9]{2})-?\\s*\\d{3,4}\\b/);
-                                    if (codeMatch) {
-                                        flightCode = codeMatch[0];
-                                    }
-                                }
-                                
-                                // Extract times
-                                const departureTime = times[0] || 'N/A';
-                                const arrivalTime = times[1] || 'N/A';
-                                
-                                // Extract duration
-                                const durationMatch = rowText.match(/(\\d{2}h\\s*\\d{2}m)/);
-                                const duration = durationMatch ? durationMatch[1] : 'N/A';
-                                
-                                // Extract stops
-                                let stops = 0;
-                                if (rowText.includes('Non-stop') || rowText.includes('Nonstop')) {
-                                    stops = 0;
-                                } else if (rowText.includes('1 Stop') || rowText.includes('1-Stop')) {
-                                    stops = 1;
-                                } else if (rowText.includes('2 Stop') || rowText.includes('2-Stop')) {
-                                    stops = 2;
-                                }
-                                
-                                // Extract cities
-                                const cityElements = flightRow.querySelectorAll('.txt-r3-n.ng-binding');
-                                const departureCity = cityElements[0] ? cityElements[0].textContent.trim() : 'N/A';
-                                const arrivalCity = cityElements[1] ? cityElements[1].textContent.trim() : 'N/A';
-                                
-                                results.push({
-                                    index: i,
-                                    airline,
-                                    flightCode,
-                                    price,
-                                    departureTime,
-                                    arrivalTime,
-                                    duration,
-                                    stops,
-                                    departureCity,
-                                    arrivalCity
-                                });
-                                
-                                console.log(`Flight ${i}: ${airline} ${flightCode}, ${departureTime}->${arrivalTime}, ₹${price}`);
-                                break;
-                            }
-                        }
-                    } catch (err) {
-                        console.error(`Error extracting flight ${i}:`, err);
-                    }
-                }
+                # Take screenshot
+                await page.screenshot(path="emt_loaded.png", full_page=False)
+                
+                # ============= EXTRACTION WITH FLIGHT CODE =============
+                print("[EMT] 📊 Extracting flights with flight codes...")
                 
-                return results;
-            }''')
+                flights_data = await extract_filtered(page, lambda skip, limit, filters: page.evaluate(
+                    EMT_EXTRACT_JS, [skip, limit, filters]), 5, filters, "EMT", lambda data: _emt_flight(data, url))
             
+            await record_strategy_stats(page, "easemytrip")
             if not flights_data or len(flights_data) == 0:
                 print("[EMT] ❌ Could not extract any flights")
-                await browser.close()
                 return ScraperResult(
                     success=False, 
                     source="easemytrip", 
@@ -210,8 +279,9 @@ async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
                 "flights": []
             }
             
-            # Create flight objects and JSON entries
-            flights = []
+            # Create flight objects (one validation pass for the batch) and JSON entries;
+            # streamed cards were already validated one by one as they arrived
+            flights = stream.flights if stream else Flight.from_cards(flights_data, "easemytrip", url)
             print(f"\n[EMT] {'='*60}")
             print(f"[EMT] ✅ EXTRACTED {len(flights_data)} FLIGHTS:")
             print(f"[EMT] {'='*60}")
@@ -225,18 +295,6 @@ async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
                 print(f"[EMT]   Duration: {data['duration']}")
                 print(f"[EMT]   Stops: {data['stops']}")
                 
-                flight = Flight(
-                    airline=data['airline'],
-                    price=float(data['price']),
-                    departure_time=data['departureTime'],
-                    arrival_time=data['arrivalTime'],
-                    duration=data['duration'],
-                    stops=data['stops'],
-                    source="easemytrip",
-                    booking_url=url
-                )
-                flights.append(flight)
-                
                 # Add to JSON
                 json_data["flights"].append({
                     "flight_number": idx,
@@ -271,14 +329,8 @@ async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
             print(f"[EMT] {'='*60}\n")
             
             await page.screenshot(path="emt_success.png", full_page=True)
-            await browser.close()
             
-            return ScraperResult(
-                success=True,
-                source="easemytrip",
-                flights=flights,
-                error=None
-            )
+            return ScraperResult.from_flights("easemytrip", flights)
 
         except Exception as e:
             print(f"[EMT] ❌ Error: {e}")
@@ -288,5 +340,4 @@ async def scrape_easemytrip(query: FlightQuery) -> ScraperResult:
                 await page.screenshot(path="emt_error.png", full_page=True)
             except:
                 pass
-            await browser.close()
             return ScraperResult(success=False, source="easemytrip", error=str(e), flights=[])
\ No newline at end of file
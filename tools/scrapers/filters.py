@@ -0,0 +1,120 @@
+"""
+Filter Pushdown
+- FlightQuery filters (airlines, stops, departure window, price ceiling) are applied inside the
+  page, right after a card is extracted, so rejected cards are never serialized back over CDP
+- On a price-sorted listing the first card over the price ceiling ends the search: no later
+  card can qualify
+- A filtered batch extraction keeps scrolling for more cards until enough match, the listing
+  is exhausted, or FLIGHT_FILTER_MAX_SCROLLS is reached
+
+None of the three sites takes stable filter parameters in its search URL, so every filter
+is applied in the extraction scripts.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models.schema import Flight, FlightQuery
+from tools.deadline import publish_partial
+
+FILTER_MAX_SCROLLS = int(os.environ.get("FLIGHT_FILTER_MAX_SCROLLS", "5"))
+FILTER_SCROLL_WAIT = 1.5   # seconds for lazily rendered cards to appear after a scroll
+
+# filters -> {accepts(card), exhausted(card)} over the card dicts the extraction scripts build.
+# Must agree with FlightQuery.matches().
+CARD_FILTER_JS = '''(filters) => {
+    const airlines = filters.airlines ? filters.airlines.map(a => a.toLowerCase()) : null;
+    const hasWindow = filters.depart_after != null || filters.depart_before != null;
+    return {
+        accepts: card => {
+            if (airlines && !airlines.includes((card.airline || '').toLowerCase())) return false;
+            if (filters.max_stops != null && !(card.stops <= filters.max_stops)) return false;
+            if (hasWindow) {
+                const departs = card.departureTime || '';
+                if (!/^\\d{2}:\\d{2}$/.test(departs)) return false;
+                if (filters.depart_after != null && departs < filters.depart_after) return false;
+                if (filters.depart_before != null && departs > filters.depart_before) return false;
+            }
+            return filters.max_price == null || card.price <= filters.max_price;
+        },
+        exhausted: card => !!filters.price_sorted && filters.max_price != null && card.price > filters.max_price
+    };
+}'''
+
+# Streaming variant: wraps a per-card extractor. Rejected cards come back as `false` (the
+# observer marks them seen without sending them); the card that exhausts a price-sorted
+# listing is replaced by {exhausted: true} so the stream can stop.
+_STREAM_FILTER_JS = '''(() => {
+    const extract = %EXTRACT%;
+    const filter = (%FILTER%)(%FILTERS%);
+    return (card, i) => {
+        const data = extract(card, i);
+        if (!data || filter.accepts(data)) return data;
+        return filter.exhausted(data) ? { exhausted: true } : false;
+    };
+})()'''
+
+
+def pushdown(query: FlightQuery, price_sorted: bool = False) -> Optional[Dict[str, Any]]:
+    """Filters to hand to the page, or None for an unfiltered search"""
+    filters = query.filters()
+    if not filters:
+        return None
+    filters["price_sorted"] = price_sorted
+    return filters
+
+
+def filtered_card_js(extract_js: str, filters: Optional[Dict[str, Any]]) -> str:
+    """Per-card extractor with the filters applied in the page (unchanged when unfiltered)"""
+    if not filters:
+        return extract_js
+    return (_STREAM_FILTER_JS
+            .replace("%EXTRACT%", extract_js)
+            .replace("%FILTER%", CARD_FILTER_JS)
+            .replace("%FILTERS%", json.dumps(filters)))
+
+
+def _card_key(card: Dict) -> str:
+    return f"{card.get('flightCode')}-{card.get('price')}-{card.get('departureTime')}"
+
+
+async def extract_filtered(
+    page,
+    extract: Callable[[int, int, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+    limit: int,
+    filters: Optional[Dict[str, Any]],
+    tag: str,
+    to_flight: Optional[Callable[[Dict], Flight]] = None,
+) -> List[Dict]:
+    """
+    Run a batch extractor, scrolling for more cards when filters reject too many
+
+    extract(skip, limit, filters) evaluates the site's extraction script over the rendered
+    cards from index `skip` on and returns {"flights": [...], "examined": n, "exhausted": bool},
+    where `examined` is the index the next call should start from. With `to_flight`, matches
+    found while scrolling are published as partial results (see tools/deadline.py).
+    """
+    if not filters:
+        return (await extract(0, limit, None))["flights"]
+
+    flights, seen, skip = [], set(), 0
+    for scroll in range(FILTER_MAX_SCROLLS + 1):
+        batch = await extract(skip, limit - len(flights), filters)
+        for card in batch["flights"]:
+            if _card_key(card) not in seen:
+                seen.add(_card_key(card))
+                flights.append(card)
+                if to_flight:
+                    publish_partial((to_flight(card),))
+        skip = batch["examined"]
+        if len(flights) >= limit:
+            break
+        if batch["exhausted"]:
+            print(f"[{tag}] ⚡ No remaining card can match the filters, stopping after {skip} cards")
+            break
+        if scroll < FILTER_MAX_SCROLLS:
+            await page.evaluate("() => window.scrollBy(0, window.innerHeight * 2)")
+            await asyncio.sleep(FILTER_SCROLL_WAIT)
+    print(f"[{tag}] 🔎 {len(flights)} cards matched the filters out of {skip} examined")
+    return flights[:limit]
@@ -9,11 +9,234 @@ import os
 import re
 import json
 from datetime import datetime
+from typing import Optional
 from playwright.async_api import async_playwright
 from models.schema import FlightQuery, Flight, ScraperResult
+from tools.profile_pool import get_profile_pool
+from tools.rate_limit import get_rate_limiter
+from tools.scrapers.session import BrowserSession, open_session, use_session
+from tools.scrapers.filters import CARD_FILTER_JS, extract_filtered, filtered_card_js, pushdown
+from tools.scrapers.streaming import STREAM_CARDS, CardStream
+from tools.selector_registry import STRATEGY_RUNNER_JS, install_strategy_runner, record_strategy_stats
 
+MMT_ORIGIN = "https://www.makemytrip.com/flights/"
 
-async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
+# Per-field extraction strategies in MMT_EXTRACT_JS, in default order
+MMT_STRATEGIES = {
+    "airline": ["airlineName", "dataTest", "cardText"],
+    "price": ["priceSpan", "cardText"],
+}
+
+# Extraction script, registered once per context (add_init_script) instead of being
+# shipped with every evaluate. One text-node walk per card feeds every field, so the
+# whole batch is a single round-trip and cost grows linearly with the card count.
+#   window.__mmtExtractCard(card, i) -> card dict, or null while the card has no price
+#   window.__mmtExtract(skip, limit, filters) -> {flights, examined, exhausted} (see filters.py)
+MMT_EXTRACT_JS = '''(() => {
+    const TIME_RE = /^\\d{2}:\\d{2}$/;
+    // Checked in order - 'Air India Express' must win over 'Air India'
+    const KNOWN_AIRLINES = [
+        ['IndiGo', 'IndiGo'], ['Air India Express', 'Air India Express'], ['Air India', 'Air India'],
+        ['Vistara', 'Vistara'], ['SpiceJet', 'SpiceJet'], ['Akasa', 'Akasa Air']
+    ];
+    const textOf = el => (el ? el.textContent.trim() : null) || null;
+    const makeFilter = %FILTER%;
+
+    const extractCard = (card, i) => {
+        // Single pass over the card's text nodes
+        const texts = [];
+        const walker = document.createTreeWalker(card, NodeFilter.SHOW_TEXT, null);
+        let node;
+        while ((node = walker.nextNode())) {
+            const text = node.nodeValue.trim();
+            if (text) texts.push(text);
+        }
+        const cardText = texts.join('\\n');
+
+        // Extract airline (strategies tried in the registry's order, see tools/selector_registry.py)
+        const airline = window.__tryStrategies('airline', {
+            airlineName: c => textOf(c.querySelector('p.boldFont.blackText.airlineName')),
+            dataTest: c => textOf(c.querySelector('[data-test*="airline"]')),
+            cardText: () => {
+                const known = KNOWN_AIRLINES.find(([needle]) => cardText.includes(needle));
+                return known ? known[1] : null;
+            }
+        }, card) || 'Unknown';
+
+        // ========= EXTRACT FLIGHT CODE =========
+        // From screenshot: <p class="fliCode">IX 1463</p>
+        let flightCode = 'N/A';
+        const flightCodeEl = card.querySelector('p.fliCode');
+        if (flightCodeEl) {
+            flightCode = flightCodeEl.textContent.trim();
+        }
+
+        // ========= EXTRACT TIMES =========
+        // Time elements render as their own text node ("06:15"), in document order
+        let timeValues = texts.filter(text => TIME_RE.test(text));
+        if (timeValues.length < 2) {
+            // Fallback: times embedded in longer strings
+            timeValues = timeValues.concat(cardText.match(/\\b\\d{2}:\\d{2}\\b/g) || []);
+        }
+
+        let departureTime = 'N/A';
+        let arrivalTime = 'N/A';
+        const uniqueTimes = [...new Set(timeValues)];
+        if (uniqueTimes.length >= 2) {
+            departureTime = uniqueTimes[0];
+            arrivalTime = uniqueTimes[1];
+        } else if (uniqueTimes.length === 1) {
+            departureTime = uniqueTimes[0];
+        }
+
+        // Extract duration
+        let duration = 'N/A';
+        const durationMatch = cardText.match(/(\\d{1,2})\\s*h\\s*(\\d{2})\\s*m/i);
+        if (durationMatch) {
+            duration = `${durationMatch[1]}h ${durationMatch[2]}m`;
+        }
+
+        // Extract stops
+        let stops = 0;
+        const stopsLower = cardText.toLowerCase();
+        if (stopsLower.includes('non stop') || stopsLower.includes('nonstop')) {
+            stops = 0;
+        } else if (stopsLower.includes('1 stop')) {
+            stops = 1;
+        } else if (stopsLower.includes('2 stop')) {
+            stops = 2;
+        }
+
+        // Extract price
+        const price = window.__tryStrategies('price', {
+            priceSpan: c => {
+                const priceMatch = (textOf(c.querySelector('span.fontSize18.blackFont')) || '').match(/₹\\s*([\\d,]+)/);
+                return priceMatch ? parseInt(priceMatch[1].replace(/,/g, '')) : null;
+            },
+            // First plausible fare anywhere in the card
+            cardText: () => {
+                for (const match of cardText.matchAll(/₹\\s*([\\d,]+)/g)) {
+                    const p = parseInt(match[1].replace(/,/g, ''));
+                    if (p >= 1000 && p <= 150000) return p;
+                }
+                return null;
+            }
+        }, card) || 0;
+
+        // Extract cities
+        let departureCity = 'N/A';
+        let arrivalCity = 'N/A';
+
+        // Look for city names - they often appear near times
+        const cities = [];
+        for (const el of card.querySelectorAll('.darkText, .appendBottom3')) {
+            const text = el.textContent.trim();
+            // City names are usually capitalized and not time format
+            if (text && text.length > 2 && !/\\d{2}:\\d{2}/.test(text)) {
+                cities.push(text);
+            }
+        }
+        if (cities.length >= 2) {
+            departureCity = cities[0];
+            arrivalCity = cities[1];
+        }
+
+        if (price <= 0) return null;
+
+        return {
+            index: i,
+            airline: airline,
+            flightCode: flightCode,
+            departureTime: departureTime,
+            arrivalTime: arrivalTime,
+            departureCity: departureCity,
+            arrivalCity: arrivalCity,
+            duration: duration,
+            stops: stops,
+            price: price
+        };
+    };
+
+    window.__mmtExtractCard = extractCard;
+    window.__mmtExtract = (skip, limit, filters) => {
+        const results = [];
+        const filter = filters ? makeFilter(filters) : null;
+        const flightCards = document.querySelectorAll('.listingCard');
+        // Unfiltered: exactly `limit` cards. Filtered: as far as it takes to find `limit` matches
+        const end = filter ? flightCards.length : Math.min(skip + limit, flightCards.length);
+        let i = skip;
+        for (; i < end && results.length < limit; i++) {
+            try {
+                const data = extractCard(flightCards[i], i);
+                if (!data) continue;
+                if (filter && !filter.accepts(data)) {
+                    if (filter.exhausted(data)) return { flights: results, examined: i + 1, exhausted: true };
+                    continue;
+                }
+                results.push(data);
+            } catch (err) {
+                console.error(`Error extracting card ${i}:`, err);
+            }
+        }
+        return { flights: results, examined: i, exhausted: false };
+    };
+})();'''.replace("%FILTER%", CARD_FILTER_JS)
+
+
+def _mmt_flight(data: dict, url: str) -> Flight:
+    return Flight.from_cards([data], "makemytrip", url)[0]
+
+
+def _mmt_card_key(data: dict) -> str:
+    return f"{data['flightCode']}-{data['price']}-{data['departureTime']}"
+
+
+async def _launch_mmt(session: BrowserSession) -> None:
+    # Lease a clone of ./mmt_session so concurrent searches don't fight over one profile
+    pool = get_profile_pool("makemytrip", "./mmt_session")
+    session.lease = await session.enter(pool.lease())
+    p = await session.enter(async_playwright())
+    user_data_dir = session.lease.path
+    try:
+        session.context = await p.chromium.launch_persistent_context(
+            user_data_dir,
+            headless=False,
+            channel="chrome",
+            args=["--start-maximized","--disable-http2", "--disable-blink-features=AutomationControlled", *session.launch_args],
+            viewport=None
+        )
+    except Exception:
+        session.context = await p.chromium.launch_persistent_context(
+            user_data_dir,
+            headless=False,
+            args=["--start-maximized", "--disable-blink-features=AutomationControlled", *session.launch_args],
+            viewport=None
+        )
+    await session.context.add_init_script(MMT_EXTRACT_JS)
+    session.page = session.context.pages[0]
+
+
+async def _extract_mmt_cards(page, limit: int = 5, filters: Optional[dict] = None, url: str = MMT_ORIGIN) -> list:
+    """All fields for all cards in one evaluate call (more calls only while scrolling for filter matches)"""
+    async def extract(skip: int, remaining: int, filters: Optional[dict]) -> dict:
+        args = [skip, remaining, filters]
+        batch = await page.evaluate(
+            "([skip, limit, filters]) => window.__mmtExtract ? window.__mmtExtract(skip, limit, filters) : null", args)
+        if batch is None:
+            # Page was loaded before the init scripts were registered
+            await page.evaluate(STRATEGY_RUNNER_JS)
+            await page.evaluate(MMT_EXTRACT_JS)
+            batch = await page.evaluate("([skip, limit, filters]) => window.__mmtExtract(skip, limit, filters)", args)
+        return batch
+
+    return await extract_filtered(page, extract, limit, filters, "MMT", lambda data: _mmt_flight(data, url))
+
+
+async def open_mmt_session() -> BrowserSession:
+    return await open_session(BrowserSession("makemytrip", "MMT", MMT_ORIGIN), _launch_mmt)
+
+
+async def scrape_makemytrip(query: FlightQuery, session: Optional[BrowserSession] = None) -> ScraperResult:
     # URL Construction
     d = query.departure_date
     date_str = f"{d.day:02d}/{d.month:02d}/{d.year}"
@@ -21,29 +244,20 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
     
     print(f"[MMT] 🔍 Navigating to: {url}")
     
-    user_data_dir = os.path.abspath("./mmt_session")
-    
-    async with async_playwright() as p:
-        context = None
+    # Reuse the pre-warmed session if the graph handed one in
+    async with use_session(session, open_mmt_session) as session:
+        page = session.page
         try:
-            try:
-                context = await p.chromium.launch_persistent_context(
-                    user_data_dir,
-                    headless=False,
-                    channel="chrome",
-                    args=["--start-maximized","--disable-http2", "--disable-blink-features=AutomationControlled"],
-                    viewport=None
-                )
-            except Exception:
-                context = await p.chromium.launch_persistent_context(
-                    user_data_dir,
-                    headless=False,
-                    args=["--start-maximized", "--disable-blink-features=AutomationControlled"],
-                    viewport=None
-                )
-            
-            page = context.pages[0]
+            # MMT's default sort isn't by price, so only the per-card filters apply
+            filters = pushdown(query, price_sorted=False)
+            # Streaming mode: the observer has to be in place before navigation
+            stream = None
+            if STREAM_CARDS:
+                stream = CardStream("MMT", to_flight=lambda data: _mmt_flight(data, url), key=_mmt_card_key, max_cards=5)
+                await stream.attach(page, '.listingCard', filtered_card_js("(card, i) => window.__mmtExtractCard(card, i)", filters))
+            await install_strategy_runner(page, "makemytrip", MMT_STRATEGIES)
             
+            await get_rate_limiter().acquire(url)
             await page.goto(url, timeout=100000)
             print("[MMT] ⏳ Page loaded, waiting for flight results...")
             
@@ -51,236 +265,35 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
             content = await page.content()
             if "200-OK" in content and len(content) < 200:
                 print("❌ [MMT] Bot Trap Detected (200-OK).")
+                session.lease.flag("Bot Trap 200-OK")
                 return ScraperResult(success=False, source="makemytrip", error="Bot Trap 200-OK", flights=[])
 
-            # Wait for flight listings
-            try:
-                await page.wait_for_selector('.listingCard', timeout=45000)
-                print("[MMT] ✓ Flight listings loaded")
-                await asyncio.sleep(3)
-            except:
-                print("[MMT] ❌ Timeout waiting for flight listings")
-                return ScraperResult(success=False, source="makemytrip", error="Timeout", flights=[])
+            if stream:
+                # Cards were validated as they rendered - no settle wait needed
+                flights_data = await stream.wait(timeout=45)
+                if not flights_data:
+                    print("[MMT] ❌ Timeout waiting for flight listings")
+                    return ScraperResult(success=False, source="makemytrip", error="Timeout", flights=[])
+                print(f"[MMT] ✓ Streamed {len(flights_data)} cards")
+            else:
+                # Wait for flight listings
+                try:
+                    await page.wait_for_selector('.listingCard', timeout=45000)
+                    print("[MMT] ✓ Flight listings loaded")
+                    await asyncio.sleep(3)
+                except:
+                    print("[MMT] ❌ Timeout waiting for flight listings")
+                    return ScraperResult(success=False, source="makemytrip", error="Timeout", flights=[])
 
-            # Take screenshot
-            await page.screenshot(path="mmt_loaded.png", full_page=False)
+                # Take screenshot
+                await page.screenshot(path="mmt_loaded.png", full_page=False)
 
-            # ============= EXTRACT WITH FLIGHT CODE =============
-            print("[MMT] 📊 Extracting flights with flight codes...")
-            
-            flights_data = await page.evaluate('''() => {
-                const results = [];
-                
-                let flightCards = document.querySelectorAll('.listingCard');
-                console.log('Found', flightCards.length, 'flight cards');
+                # ============= EXTRACT WITH FLIGHT CODE =============
+                print("[MMT] 📊 Extracting flights with flight codes...")
                 
-                for (let i = 0; i < Math.min(5, flightCards.length); i++) {
-                    try {
-                        const card = flightCards[i];
-                        const cardText = card.textContent || '';
-                        
-                        // Extract airline
-                        let airline = 'Unknown';
-                        let airlineEl = card.querySelector('p.boldFont.blackText.airlineName');
-                        if (!airlineEl) {
-                            airlineEl = card.querySelector('[data-test*="airline"]');
-                        }
-                        if (airlineEl) {
-                            airline = airlineEl.textContent.trim();
-                        } else {
-                            if (cardText.includes('IndiGo')) airline = 'IndiGo';
-                            else if (cardText.includes('Air India Express')) airline = 'Air India Express';
-                            else if (cardText.includes('Air India')) airline = 'Air India';
-                            else if (cardText.includes('Vistara')) airline = 'Vistara';
-                            else if (cardText.includes('SpiceJet')) airline = 'SpiceJet';
-                            else if (cardText.includes('Akasa')) airline = 'Akasa Air';
-                        }
-                        
-                        // ========= EXTRACT FLIGHT CODE =========
-                        // From screenshot: <p class="fliCode">IX 1463</p>
-                        let flightCode = 'N/A';
-                        const flightCodeEl = card.querySelector('p.fliCode');
-                        if (flightCodeEl) {
-                            flightCode = flightCodeEl.textContent.trim();
-                            console.log(`Flight ${i} code:`, flightCode);
-                        }
-                        
-                        // ========= EXTRACT TIMES =========
-                        let departureTime = 'N/A';
-                        let arrivalTime = 'N/A';
-                        
-                        // Look for time elements
-                        const timeElements = card.querySelectorAll(
-                            'p.blackText, p.latoBlack, span.blackText, div.blackText, ' +
-                            'p.fontSize14, p.fontSize16, p.fontSize18, ' +
-                            '[class*="time"], [class*="Time"]'
-                        );
-                        
-                        const timeValues = [];
-                        timeElements.forEach(el => {
-                            const text = el.textContent.trim();
-                            if (/^\\d{2}:\\d{2}$/.test(text)) {
-                                timeValues.push(text);
-                            }
-                        });
-                        
-                        // Fallback: extract from text
-                        if (timeValues.length < 2) {
-                            const lines = cardText.split('\\n').map(l => l.trim());
-                            for (const line of lines) {
-                                const matches = line.match(/\\b\\d{2}:\\d{2}\\b/g);
-                                if (matches) {
-                                    timeValues.push(...matches);
-                                }
-                            }
-                        }
-                        
-                        // TreeWalker for deep search
-                        if (timeValues.length < 2) {
-                            const walker = document.createTreeWalker(
-                                card,
-                                NodeFilter.SHOW_TEXT,
-                                null
-                            );
-                            
-                            let node;
-                            while (node = walker.nextNode()) {
-                                const text = node.textContent.trim();
-                                const match = text.match(/^\\d{2}:\\d{2}$/);
-                                if (match && !timeValues.includes(match[0])) {
-                                    timeValues.push(match[0]);
-                                }
-                            }
-                        }
-                        
-                        const uniqueTimes = [...new Set(timeValues)];
-                        if (uniqueTimes.length >= 2) {
-                            departureTime = uniqueTimes[0];
-                            arrivalTime = uniqueTimes[1];
-                        } else if (uniqueTimes.length === 1) {
-                            departureTime = uniqueTimes[0];
-                        }
-                        
-                        // Extract duration
-                        let duration = 'N/A';
-                        let durationMatch = cardText.match(/(\\d{1,2})\\s*h\\s*(\\d{2})\\s*m/i);
-                        if (durationMatch) {
-                            duration = `${durationMatch[1]}h ${durationMatch[2]}m`;
-                        }
-                        
-                        // Extract stops
-                        let stops = 0;
-                        const stopsLower = cardText.toLowerCase();
-                        if (stopsLower.includes('non stop') || stopsLower.includes('nonstop')) {
-                            stops = 0;
-                        } else if (stopsLower.includes('1 stop')) {
-                            stops = 1;
-                        } else if (stopsLower.includes('2 stop')) {
-                            stops = 2;
-                        }
-                        
-                        // Extract price
-                        let price = 0;
-                        let priceEl = card.querySelector('span.fontSize18.blackFont');
-                        if (!priceEl) {
-                            const priceElements = card.querySelectorAll('span, div, p');
-                            for (const el of priceElements) {
-                                const text = el.textContent;
-                                if (text.includes('₹')) {
-                                    const match = text.match(/₹\\s*([\\d,]+)/);
-                                    if (match) {
-                                        const p = parseInt(match[1].replace(/,/g, ''));
-                                        if (p >= 1000 && p <= 150000) {
-                                            price = p;
-                                            break;
-                                        }
-                                    }
-                                }
-                            }
-                        } else {
-                            const priceText = priceEl.textContent;
-                            const priceMatch = priceText.match(/₹\\s*([\\d,]+)/);
-                            if (priceMatch) {
-                                price = parseInt(priceMatch[1].replace(/,/g, ''));
-                            }
-                        }
-                        
-                        // Extract cities
-                        let departureCity = 'N/A';
-                        let arrivalCity = 'N/A';
-                        
-                        // Look for city names - they often appear near times
-                        const cityElements = card.querySelectorAll('.darkText, .appendBottom3');
-                        if (cityElements.length >= 2) {
-                            const cities = [];
-                            cityElements.forEach(el => {
-                                const text = el.textContent.trim();
-                                // City names are usually capitalized and not time format
-                                if (text && text.length > 2 && !/\\d{2}:\\d{2}/.test(text)) {
-                                    cities.push(text);
-                                }
-                            });
-                            if (cities.length >= 2) {
-                                departureCity = cities[0];
-                                arrivalCity = cities[1];
-                            }
-                        }
-                        
-                        console.log(`Flight ${i}: ${airline} ${flightCode}, ${departureTime}->${arrivalTime}, ₹${price}`);
-                        
-                        if (price > 0) {
-                            results.push({
-                                index: i,
-                                airline: airline,
-                                flightCode: flightCode,
-                                departureTime: departureTime,
-                                arrivalTime: arrivalTime,
-                                departureCity: departureCity,
-                                arrivalCity: arrivalCity,
-                                duration: duration,
-                                stops: stops,
-                                price: price
-                            });
-                        }
-                        
-                    } catch (err) {
-                        console.error(`Error extracting card ${i}:`, err);
-                    }
-                }
-                
-                return results;
-            }''')
-            
-            # Fallback: Use Playwright for missing times
-            if flights_data:
-                missing_times = sum(1 for f in flights_data if f['departureTime'] == 'N/A' or f['arrivalTime'] == 'N/A')
-                if missing_times > 0:
-                    print(f"[MMT] 🔄 {missing_times} flights missing times, trying Playwright...")
-                    
-                    cards = page.locator(".listingCard")
-                    count = await cards.count()
-                    
-                    for i in range(min(len(flights_data), count)):
-                        if flights_data[i]['departureTime'] == 'N/A' or flights_data[i]['arrivalTime'] == 'N/A':
-                            try:
-                                card = cards.nth(i)
-                                time_elements = await card.locator('p.blackText, p.latoBlack, span.blackText').all()
-                                
-                                times = []
-                                for el in time_elements:
-                                    text = await el.inner_text()
-                                    text = text.strip()
-                                    if re.match(r'^\d{2}:\d{2}$', text):
-                                        times.append(text)
-                                
-                                if len(times) >= 2:
-                                    flights_data[i]['departureTime'] = times[0]
-                                    flights_data[i]['arrivalTime'] = times[1]
-                                    print(f"[MMT] ✓ Found times for flight {i}: {times[0]} → {times[1]}")
-                                    
-                            except Exception as e:
-                                print(f"[MMT] ⚠ Could not extract times for flight {i}: {e}")
+                flights_data = await _extract_mmt_cards(page, limit=5, filters=filters, url=url)
             
+            await record_strategy_stats(page, "makemytrip")
             if not flights_data or len(flights_data) == 0:
                 print("[MMT] ❌ Could not extract any flights")
                 return ScraperResult(success=False, source="makemytrip", error="Could not extract flights", flights=[])
@@ -299,8 +312,9 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
                 "flights": []
             }
             
-            # Create flight objects and JSON entries
-            flights = []
+            # Create flight objects (one validation pass for the batch) and JSON entries;
+            # streamed cards were already validated one by one as they arrived
+            flights = stream.flights if stream else Flight.from_cards(flights_data, "makemytrip", url)
             print(f"\n[MMT] {'='*60}")
             print(f"[MMT] ✅ EXTRACTED {len(flights_data)} FLIGHTS:")
             print(f"[MMT] {'='*60}")
@@ -314,18 +328,6 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
                 print(f"[MMT]   Duration: {data['duration']}")
                 print(f"[MMT]   Stops: {data['stops']}")
                 
-                flight = Flight(
-                    airline=data['airline'],
-                    price=float(data['price']),
-                    departure_time=data['departureTime'],
-                    arrival_time=data['arrivalTime'],
-                    duration=data['duration'],
-                    stops=data['stops'],
-                    source="makemytrip",
-                    booking_url=url
-                )
-                flights.append(flight)
-                
                 # Add to JSON
                 json_data["flights"].append({
                     "flight_number": idx,
@@ -361,11 +363,7 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
             
             await page.screenshot(path="mmt_success.png", full_page=True)
             
-            return ScraperResult(
-                success=True,
-                source="makemytrip",
-                flights=flights
-            )
+            return ScraperResult.from_flights("makemytrip", flights)
 
         except Exception as e:
             print(f"[MMT] ❌ Error: {e}")
@@ -376,15 +374,3 @@ async def scrape_makemytrip(query: FlightQuery) -> ScraperResult:
             except:
                 pass
             return ScraperResult(success=False, source="makemytrip", error=str(e), flights=[])
-        
-        finally:
-            # Close context properly
-            if context:
-                try:
-                    print("[MMT] 🔒 Closing browser context...")
-                    await asyncio.wait_for(context.close(), timeout=5.0)
-                    print("[MMT] ✓ Browser context closed")
-                except asyncio.TimeoutError:
-                    print("[MMT] ⚠️ Browser close timed out, continuing anyway")
-                except Exception as e:
-                    print(f"[MMT] ⚠️ Error closing context: {e}")
\ No newline at end of file
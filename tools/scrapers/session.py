@@ -0,0 +1,181 @@
+"""
+Browser Sessions
+- BrowserSession: one source's browser/context/page plus everything that must be torn down with it
+- use_session: lets a scraper run on a pre-warmed session or open its own
+- SessionWarmup: opens every source's browser and preloads its origin while the LLM is still parsing
+"""
+import asyncio
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from tools.rate_limit import get_rate_limiter
+from tools.scrapers import processes
+from tools.scrapers.asset_cache import ASSET_CACHE_PERSISTENT, get_asset_cache
+from tools.scrapers.supervisor import get_supervisor
+
+SessionOpener = Callable[[], Awaitable["BrowserSession"]]
+
+
+class BrowserSession:
+    """Browser, context and page for a single scrape (single-use: closed after the search)"""
+
+    def __init__(self, source: str, tag: str, origin: str):
+        self.source = source
+        self.tag = tag          # log prefix, e.g. "MMT"
+        self.origin = origin    # homepage used for speculative warm-up
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.lease = None       # ProfileLease for persistent-profile sources
+        self.warmed = False
+        self.browser_id = uuid.uuid4().hex[:12]
+        self._stack = AsyncExitStack()
+
+    @property
+    def launch_args(self) -> List[str]:
+        """Extra Chromium switches for every launch: tags the process tree so it can be measured and killed"""
+        return [processes.marker_arg(self.browser_id)]
+
+    async def enter(self, cm) -> Any:
+        """Enter an async context manager whose exit is tied to this session"""
+        return await self._stack.enter_async_context(cm)
+
+    async def warm(self) -> None:
+        """Load the site's origin so cookies, service worker and JS bundles are in place"""
+        try:
+            await get_rate_limiter().acquire(self.origin)
+            await self.page.goto(self.origin, wait_until="domcontentloaded", timeout=30000)
+            self.warmed = True
+            print(f"[{self.tag}] 🔥 Warmed up {self.origin}")
+        except Exception as e:
+            print(f"[{self.tag}] ⚠️ Warm-up navigation failed: {e}")
+
+    async def close(self) -> None:
+        timed_out = False
+        if self.context:
+            try:
+                print(f"[{self.tag}] 🔒 Closing browser context...")
+                await asyncio.wait_for(self.context.close(), timeout=5.0)
+                print(f"[{self.tag}] ✓ Browser context closed")
+            except asyncio.TimeoutError:
+                timed_out = True
+                print(f"[{self.tag}] ⚠️ Browser context close timed out, continuing anyway")
+            except Exception as e:
+                print(f"[{self.tag}] ⚠️ Error closing context: {e}")
+
+        if self.browser:
+            try:
+                await asyncio.wait_for(self.browser.close(), timeout=5.0)
+                print(f"[{self.tag}] ✓ Browser closed")
+            except asyncio.TimeoutError:
+                timed_out = True
+                print(f"[{self.tag}] ⚠️ Browser close timed out, continuing anyway")
+            except Exception as e:
+                print(f"[{self.tag}] ⚠️ Error closing browser: {e}")
+
+        self.browser = self.context = self.page = None
+        if timed_out:
+            # A close that gave up leaves Chromium running - kill it before the profile lease is reused
+            await self.kill_leftovers()
+        # Stops Playwright and hands the profile lease back
+        await self._stack.aclose()
+        # From here on, anything left of this browser is a leak for the supervisor to reap
+        get_supervisor().closed(self.browser_id)
+
+    async def kill_leftovers(self) -> int:
+        """SIGKILL any process still tagged with this session's browser id"""
+        procs = await asyncio.to_thread(processes.snapshot)
+        killed = processes.kill_tree(procs, processes.marked(procs, self.browser_id))
+        if killed:
+            print(f"[{self.tag}] 🔪 Killed {killed} leftover browser processes")
+        return killed
+
+
+@asynccontextmanager
+async def use_session(session: Optional[BrowserSession], opener: SessionOpener):
+    """Use a pre-warmed session if one was handed in, otherwise open one; always close it"""
+    if session is None:
+        session = await opener()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def open_session(session: BrowserSession, launch: Callable[[BrowserSession], Awaitable[None]]) -> BrowserSession:
+    """
+    Open the browser a scrape runs in: a dedicated one per session by default, or with
+    FLIGHT_REUSE_BROWSERS=1 a page borrowed from a long-lived, recycled browser (see browser_manager.py)
+    """
+    from tools.scrapers.browser_manager import REUSE_BROWSERS, get_browser_manager
+    if REUSE_BROWSERS:
+        return await get_browser_manager().borrow(session, launch)
+    return await launch_session(session, launch)
+
+
+async def launch_session(session: BrowserSession, launch: Callable[[BrowserSession], Awaitable[None]]) -> BrowserSession:
+    """
+    Run a source-specific launch step, tearing down anything half-opened if it fails
+    Static assets in the new context are served from the shared asset cache (asset_cache.py),
+    except for persistent-profile sources, whose own HTTP disk cache routing would switch off
+    The browser is registered with the process supervisor (supervisor.py)
+    """
+    try:
+        await launch(session)
+        await get_supervisor().register(session)
+        cache = get_asset_cache()
+        if cache and (session.lease is None or ASSET_CACHE_PERSISTENT):
+            await cache.install(session.context)
+        return session
+    except BaseException:
+        await session.close()
+        raise
+
+
+class SessionWarmup:
+    """
+    Speculatively opens browser sessions for every source as soon as a search starts
+
+    Sessions are handed to the scrapers with take(); anything not taken (parse
+    failure, skipped source) is closed by cancel().
+    """
+
+    def __init__(self, openers: Dict[str, SessionOpener]):
+        self.openers = openers
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        for source, opener in self.openers.items():
+            if source not in self._tasks:
+                self._tasks[source] = asyncio.create_task(self._open(opener))
+
+    async def _open(self, opener: SessionOpener) -> BrowserSession:
+        session = await opener()
+        try:
+            await session.warm()
+        except BaseException:
+            await session.close()
+            raise
+        return session
+
+    async def take(self, source: str) -> Optional[BrowserSession]:
+        """Wait for the source's warm session; None means the scraper should open its own"""
+        task = self._tasks.pop(source, None)
+        if task is None:
+            return None
+        try:
+            return await task
+        except Exception as e:
+            print(f"[WARMUP] ⚠️ {source} warm-up failed, scraper will launch its own browser: {e}")
+            return None
+
+    async def cancel(self, sources: Optional[Iterable[str]] = None) -> None:
+        """Cancel pending warm-ups and close any session nobody took (only `sources`, if given)"""
+        selected = list(self._tasks) if sources is None else [s for s in sources if s in self._tasks]
+        tasks = [self._tasks.pop(source) for source in selected]
+        for task in tasks:
+            task.cancel()
+        for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(outcome, BrowserSession):
+                await outcome.close()
@@ -0,0 +1,195 @@
+"""
+Streaming Card Extraction
+- Injects a MutationObserver when the page is created
+- Each newly rendered flight card is extracted in the page and pushed to Python via an exposed function
+- Python deduplicates/validates cards as they arrive and can stop early (enough cards or price floor reached)
+
+Enable with FLIGHT_STREAM_CARDS=1 (the batch evaluate path stays the default)
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from models.schema import Flight
+from tools.deadline import partial_publisher
+
+STREAM_CARDS = os.environ.get("FLIGHT_STREAM_CARDS", "0") == "1"
+STREAM_PRICE_FLOOR = float(os.environ.get("FLIGHT_STREAM_PRICE_FLOOR", "0")) or None
+
+BINDING_NAME = "__flightCard"
+
+# %SELECTOR% / %EXTRACT% / %BINDING% are filled in by attach()
+_OBSERVER_JS = '''(() => {
+    if (window.__flightCardStream) return;
+
+    const SELECTOR = %SELECTOR%;
+    const extract = %EXTRACT%;
+    const seen = new WeakSet();
+    let index = 0;
+    let scheduled = false;
+    let observer = null;
+    let stopped = false;
+
+    // Called by CardStream.wait() when it finishes, or when Python answers a card with false
+    const stop = () => {
+        stopped = true;
+        if (observer) observer.disconnect();
+    };
+    window.__flightCardStream = { stop };
+
+    // Debounced: a burst of mutations triggers one scan of not-yet-seen cards.
+    // A card whose extract() returns null (still rendering) is retried on the next burst;
+    // false means rejected by the pushed-down filters (see filters.py) and is never sent.
+    const flush = () => {
+        scheduled = false;
+        if (stopped) return;
+        for (const card of document.querySelectorAll(SELECTOR)) {
+            if (seen.has(card)) continue;
+            let data = null;
+            try {
+                data = extract(card, index);
+            } catch (err) {
+                continue;
+            }
+            if (data === false) {
+                seen.add(card);
+            } else if (data) {
+                seen.add(card);
+                index++;
+                Promise.resolve(window.%BINDING%(data))
+                    .then(more => { if (more === false) stop(); })
+                    .catch(() => {});
+            }
+        }
+    };
+    const schedule = () => {
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(flush, 50);
+        }
+    };
+
+    const start = () => {
+        if (stopped) return;
+        observer = new MutationObserver(schedule);
+        observer.observe(document.documentElement, {
+            childList: true, subtree: true, characterData: true
+        });
+        schedule();
+    };
+    if (document.documentElement) {
+        start();
+    } else {
+        document.addEventListener('DOMContentLoaded', start);
+    }
+})();'''
+
+
+class CardStream:
+    """Collects cards pushed from the page as they render"""
+
+    def __init__(
+        self,
+        tag: str,
+        to_flight: Callable[[Dict], Flight],
+        key: Callable[[Dict], str],
+        max_cards: Optional[int] = None,
+        price_floor: Optional[float] = STREAM_PRICE_FLOOR,
+    ):
+        self.tag = tag
+        self.to_flight = to_flight
+        self.key = key
+        self.max_cards = max_cards
+        self.price_floor = price_floor
+        self.cards: List[Dict] = []      # raw card dicts that passed validation, in arrival order
+        self.flights: List[Flight] = []
+        self.first_card = asyncio.Event()
+        self.done = asyncio.Event()
+        self._keys = set()
+        self._started = time.monotonic()
+        self._last_card = self._started
+        self.first_card_after: Optional[float] = None
+        self._page = None
+        # Cards arrive on Playwright's binding tasks, outside the scrape's context
+        self._publish = partial_publisher()
+
+    async def attach(self, page, card_selector: str, extract_js: str) -> None:
+        """Call before page.goto() so the observer is live from the first paint"""
+        self._page = page
+        await page.expose_function(BINDING_NAME, self._on_card)
+        await page.add_init_script(
+            _OBSERVER_JS
+            .replace("%SELECTOR%", json.dumps(card_selector))
+            .replace("%EXTRACT%", extract_js)
+            .replace("%BINDING%", BINDING_NAME)
+        )
+        self._started = time.monotonic()
+
+    def _on_card(self, data: Dict) -> bool:
+        """Binding called by the page for each card; False tells the observer to stop"""
+        if self.done.is_set():
+            return False
+        if data.get("exhausted"):
+            print(f"[{self.tag}] ⚡ No remaining card can match the filters, stopping early")
+            self.done.set()
+            return False
+        key = self.key(data)
+        if key in self._keys:
+            return True
+        try:
+            flight = self.to_flight(data)
+        except Exception as e:
+            print(f"[{self.tag}] ⚠️ Dropped invalid card: {e}")
+            return True
+
+        self._keys.add(key)
+        self.cards.append(data)
+        self.flights.append(flight)
+        self._publish((flight,))   # best-so-far for a search running under a deadline
+        self._last_card = time.monotonic()
+        if not self.first_card.is_set():
+            self.first_card_after = self._last_card - self._started
+            print(f"[{self.tag}] ⚡ First card after {self.first_card_after:.1f}s")
+            self.first_card.set()
+
+        if self.max_cards and len(self.flights) >= self.max_cards:
+            self.done.set()
+        elif self.price_floor and flight.price <= self.price_floor:
+            print(f"[{self.tag}] ⚡ Price floor ₹{self.price_floor:,.0f} reached, stopping early")
+            self.done.set()
+        return not self.done.is_set()
+
+    async def wait(self, timeout: float, idle: float = 3.0) -> List[Dict]:
+        """
+        Wait until the stream is done, no new card has arrived for `idle` seconds
+        after the first one, or `timeout` expires. Returns the collected card dicts.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            while not self.done.is_set():
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if self.first_card.is_set() and now - self._last_card >= idle:
+                    break
+                try:
+                    await asyncio.wait_for(self.done.wait(), timeout=min(0.25, deadline - now))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.done.set()
+            await self._disconnect()
+        return self.cards
+
+    async def _disconnect(self) -> None:
+        """Stop the in-page observer so a finished stream gets no more callbacks"""
+        if self._page is None:
+            return
+        try:
+            await asyncio.wait_for(
+                self._page.evaluate("() => window.__flightCardStream && window.__flightCardStream.stop()"),
+                timeout=1.0)
+        except Exception:
+            pass   # page closed or navigated away - nothing left to observe
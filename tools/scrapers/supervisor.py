@@ -0,0 +1,280 @@
+"""
+Browser Process Supervisor
+- Every launched browser is registered (SQLite, WAL: shared by all processes on the host) with
+  its owner pid, profile directory and process tree; closing the session marks it closed
+- A sweep finds every marked Chromium process tree on the host and kills the ones that
+  outlived their session's close, whose owner process is gone, or that were never registered
+  and have no live Python process above them (another registry's browsers are left alone)
+- Browsers older than FLIGHT_BROWSER_MAX_AGE: a single-use one is stuck and killed; a long-lived
+  one from the BrowserManager (FLIGHT_REUSE_BROWSERS) is retired through its manager in the
+  owning process, so in-flight pages finish and the manager knows it is gone
+- After a reap, Chromium's lock files are removed from the profile (unless another live
+  browser uses it), so the next launch on that profile doesn't fail
+- Leaks are recorded with their reason; report() gives counts, killed processes and reclaimed RSS
+
+Job queue workers sweep in the background; for anything else run it as a daemon:
+    python -m tools.scrapers.supervisor            # sweep every FLIGHT_SUPERVISOR_INTERVAL seconds
+    python -m tools.scrapers.supervisor --once     # one sweep plus the leak report
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from tools.profile_pool import remove_lock_files
+from tools.scrapers import processes
+
+# Anchored to the project, not the cwd: every process on the host must share one registry
+REGISTRY_PATH = os.environ.get(
+    "FLIGHT_BROWSER_REGISTRY",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "flight_browsers.db"))
+MAX_AGE = float(os.environ.get("FLIGHT_BROWSER_MAX_AGE", str(6 * 3600)))   # seconds
+SWEEP_INTERVAL = float(os.environ.get("FLIGHT_SUPERVISOR_INTERVAL", "60"))
+CLOSE_GRACE = 15.0        # seconds a closed browser may take to exit on its own
+UNREGISTERED_GRACE = 60.0  # a marked browser this old, with no registry row and no Python owner, is orphaned
+OWNER_CLOCK_SLACK = 5.0   # `ps` ages are whole seconds
+
+# Reasons a browser is reaped
+OUTLIVED_CLOSE, OWNER_GONE, UNREGISTERED, TOO_OLD = "outlived_close", "owner_gone", "unregistered", "max_age"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS browsers (
+    browser_id TEXT PRIMARY KEY,
+    source TEXT,
+    owner_pid INTEGER,
+    profile TEXT,
+    pids_json TEXT NOT NULL DEFAULT '[]',
+    managed INTEGER NOT NULL DEFAULT 0,
+    launched_at REAL NOT NULL,
+    closed_at REAL,
+    reaped_at REAL,
+    reason TEXT,
+    killed INTEGER NOT NULL DEFAULT 0,
+    rss_mb REAL NOT NULL DEFAULT 0,
+    locks_removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_browsers_reaped ON browsers (reaped_at);
+"""
+
+
+class BrowserSupervisor:
+    """Registry of launched browsers plus the sweep that reaps leaked ones"""
+
+    def __init__(self, path: str = REGISTRY_PATH, max_age: float = MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Long-lived browsers of this process past max age, for run_forever() to retire on the loop
+        self.retire_due: List[str] = []
+
+    # ============= REGISTRY =============
+
+    async def register(self, session) -> None:
+        """Record a just-launched session's browser, owner and process tree"""
+        procs = await asyncio.to_thread(processes.snapshot)
+        tree = processes.descendants(procs, processes.marked(procs, session.browser_id))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO browsers (browser_id, source, owner_pid, profile, pids_json, launched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (session.browser_id, session.source, os.getpid(),
+             session.lease.path if session.lease else None, json.dumps(tree), time.time())
+        )
+
+    def managed(self, browser_id: str) -> None:
+        """The browser is long-lived, owned by this process's BrowserManager: retired there, never killed for age"""
+        self._conn.execute("UPDATE browsers SET managed=1 WHERE browser_id=?", (browser_id,))
+
+    def closed(self, browser_id: str) -> None:
+        """The session was closed: any of its processes still alive after CLOSE_GRACE is a leak"""
+        self._conn.execute("UPDATE browsers SET closed_at=? WHERE browser_id=? AND closed_at IS NULL",
+                           (time.time(), browser_id))
+
+    def _open_rows(self) -> Dict[str, Dict]:
+        rows = self._conn.execute(
+            "SELECT browser_id, owner_pid, profile, launched_at, closed_at, managed, pids_json FROM browsers "
+            "WHERE reaped_at IS NULL"
+        ).fetchall()
+        return {row[0]: {**dict(zip(("browser_id", "owner_pid", "profile", "launched_at", "closed_at", "managed"),
+                                    row[:6])),
+                         "pids": json.loads(row[6])} for row in rows}
+
+    # ============= SWEEP =============
+
+    def _leak_reason(self, row: Optional[Dict], roots: List[int], procs: Dict[int, processes.ProcInfo],
+                     now: float) -> Optional[str]:
+        age = max(procs[root].age for root in roots)
+        if row is None:
+            # Possibly registered elsewhere (another FLIGHT_BROWSER_REGISTRY): only orphans are ours to reap
+            if age > UNREGISTERED_GRACE and not any(_python_owned(procs, root) for root in roots):
+                return UNREGISTERED
+            return None
+        if row["closed_at"] and now - row["closed_at"] > CLOSE_GRACE:
+            return OUTLIVED_CLOSE
+        if not _owner_alive(row, procs, now):
+            return OWNER_GONE
+        if age > self.max_age:
+            if not row["managed"]:
+                return TOO_OLD   # a single-use browser open this long is stuck
+            if row["owner_pid"] == os.getpid():
+                self.retire_due.append(row["browser_id"])
+            # else: its owner's own sweep retires it
+        return None
+
+    def sweep(self) -> Dict[str, int]:
+        """Kill leaked browser trees, clean their profiles and forget finished browsers (blocking)"""
+        procs = processes.snapshot()
+        now = time.time()
+        rows = self._open_rows()
+        self.retire_due = []
+        live: Dict[str, List[int]] = defaultdict(list)
+        for root in processes.marked(procs):
+            live[processes.browser_id_of(procs[root].command)].append(root)
+        for browser_id, row in rows.items():
+            if browser_id not in live:
+                # Root gone but children reparented to init: fall back to the recorded tree
+                live[browser_id].extend(_stragglers(row, procs, now))
+                if not live[browser_id]:
+                    del live[browser_id]
+
+        leaks = {}
+        for browser_id, roots in live.items():
+            reason = self._leak_reason(rows.get(browser_id), roots, procs, now)
+            if reason:
+                leaks[browser_id] = reason
+            else:
+                # Keep the recorded tree current (renderers come and go)
+                self._conn.execute("UPDATE browsers SET pids_json=? WHERE browser_id=?",
+                                   (json.dumps(processes.descendants(procs, roots)), browser_id))
+        # Profiles a surviving browser still has open keep their locks
+        in_use = {rows[bid]["profile"] for bid in live if bid in rows and bid not in leaks}
+
+        reaped = defaultdict(int)
+        for browser_id, reason in leaks.items():
+            roots, row = live[browser_id], rows.get(browser_id)
+            rss_mb = processes.tree_rss_mb(procs, roots)
+            killed = processes.kill_tree(procs, roots)
+            profile = row["profile"] if row else None
+            locks = remove_lock_files(profile) if profile and profile not in in_use else 0
+            self._conn.execute(
+                "INSERT INTO browsers (browser_id, launched_at) VALUES (?, ?) ON CONFLICT (browser_id) DO NOTHING",
+                (browser_id, now - max(procs[root].age for root in roots))
+            )
+            self._conn.execute(
+                "UPDATE browsers SET reaped_at=?, reason=?, killed=?, rss_mb=?, locks_removed=? WHERE browser_id=?",
+                (now, reason, killed, rss_mb, locks, browser_id)
+            )
+            reaped[reason] += 1
+            print(f"[SUPERVISOR] 🔪 Reaped browser {browser_id} ({reason}): "
+                  f"{killed} processes, {rss_mb:.0f} MB, {locks} lock files")
+
+        # Exited browsers: closed normally, or the owner died and Chromium went with it
+        for browser_id, row in rows.items():
+            if browser_id in live or not (row["closed_at"] or not _owner_alive(row, procs, now)):
+                continue
+            if not row["closed_at"] and row["profile"] and row["profile"] not in in_use:
+                remove_lock_files(row["profile"])
+            self._conn.execute("DELETE FROM browsers WHERE browser_id=?", (browser_id,))
+        return dict(reaped)
+
+    async def retire_old(self) -> int:
+        """Hand this process's long-lived browsers past max age to the BrowserManager to retire"""
+        if not self.retire_due:
+            return 0
+        from tools.scrapers.browser_manager import get_browser_manager
+        manager, retired = get_browser_manager(), 0
+        for browser_id in self.retire_due:
+            if await manager.retire(browser_id, TOO_OLD):
+                retired += 1
+        self.retire_due = []
+        return retired
+
+    async def run_forever(self, interval: float = SWEEP_INTERVAL) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+                await self.retire_old()
+            except Exception as e:
+                print(f"[SUPERVISOR] ❌ Sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    # ============= STATS =============
+
+    def report(self, window_seconds: int = 86400) -> Dict:
+        """Leaks reaped over the window, by reason, plus browsers currently tracked"""
+        rows = self._conn.execute(
+            "SELECT reason, COUNT(*), SUM(killed), SUM(rss_mb), SUM(locks_removed) FROM browsers "
+            "WHERE reaped_at >= ? GROUP BY reason", (time.time() - window_seconds,)
+        ).fetchall()
+        tracked = self._conn.execute("SELECT COUNT(*) FROM browsers WHERE reaped_at IS NULL").fetchone()[0]
+        return {
+            "tracked": tracked,
+            "leaks": {reason: count for reason, count, _, _, _ in rows},
+            "killed_processes": sum(row[2] for row in rows),
+            "reclaimed_mb": round(sum(row[3] for row in rows), 1),
+            "lock_files_removed": sum(row[4] for row in rows),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _owner_alive(row: Dict, procs: Dict[int, processes.ProcInfo], now: float) -> bool:
+    # The owner started before it launched the browser - a younger process is a reused pid
+    owner = procs.get(row["owner_pid"])
+    return owner is not None and owner.age + OWNER_CLOCK_SLACK >= now - row["launched_at"]
+
+
+def _python_owned(procs: Dict[int, processes.ProcInfo], pid: int) -> bool:
+    """Whether a live Python process (some agent process, whatever its registry) is above `pid`"""
+    seen = set()
+    pid = procs[pid].ppid if pid in procs else 0
+    while pid in procs and pid not in seen:
+        seen.add(pid)
+        argv0 = procs[pid].command.split(maxsplit=1)[0] if procs[pid].command else ""
+        if os.path.basename(argv0).lower().startswith("python"):
+            return True
+        pid = procs[pid].ppid
+    return False
+
+
+def _stragglers(row: Dict, procs: Dict[int, processes.ProcInfo], now: float) -> List[int]:
+    """Recorded pids still running that can't be a reused pid: started after the launch, still Chromium"""
+    return [pid for pid in row["pids"] if pid in procs
+            and procs[pid].age <= now - row["launched_at"] + OWNER_CLOCK_SLACK
+            and "chrom" in procs[pid].command.lower()]
+
+
+_SUPERVISOR: Optional[BrowserSupervisor] = None
+
+
+def get_supervisor() -> BrowserSupervisor:
+    """Process-wide registry connection, opened on first use"""
+    global _SUPERVISOR
+    if _SUPERVISOR is None:
+        _SUPERVISOR = BrowserSupervisor()
+    return _SUPERVISOR
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reap leaked Chromium processes")
+    parser.add_argument("--once", action="store_true", help="Sweep once, print the leak report and exit")
+    parser.add_argument("--interval", type=float, default=SWEEP_INTERVAL)
+    args = parser.parse_args()
+
+    supervisor = get_supervisor()
+    if args.once:
+        supervisor.sweep()
+        print(f"[SUPERVISOR] 📈 {supervisor.report()}")
+    else:
+        asyncio.run(supervisor.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Selector Registry
+- Remembers, per source and field, how often each extraction strategy hits and how long it takes
+- Hands the page the historically best order, so the usual winner is tried first
+- Flags a field when every strategy keeps missing (the site probably changed its markup)
+
+Persisted to selector_registry.json next to the other run artifacts.
+"""
+import json
+import os
+import threading
+from typing import Dict, List
+
+REGISTRY_PATH = os.environ.get("FLIGHT_SELECTOR_REGISTRY", "./selector_registry.json")
+DECAY = 0.95           # old evidence fades so a markup change re-ranks quickly
+FLAG_AFTER_RUNS = 3    # consecutive runs where every strategy missed before a field is flagged
+
+# Installed in the page. Extraction code calls
+#   window.__tryStrategies(field, {name: fn, ...}, arg)
+# which runs the strategies in window.__strategyOrder[field] order (falling back to the
+# order they were declared in), returns the first non-null value and records hits,
+# misses and time spent per strategy in window.__strategyStats.
+STRATEGY_RUNNER_JS = '''(() => {
+    if (window.__tryStrategies) return;
+    window.__strategyStats = window.__strategyStats || {};
+    window.__tryStrategies = (field, strategies, arg) => {
+        const preferred = (window.__strategyOrder && window.__strategyOrder[field]) || [];
+        const order = preferred.filter(name => name in strategies)
+            .concat(Object.keys(strategies).filter(name => !preferred.includes(name)));
+        const stats = (window.__strategyStats[field] = window.__strategyStats[field] || { __allMissed: 0 });
+        for (const name of order) {
+            const s = (stats[name] = stats[name] || { hits: 0, misses: 0, ms: 0 });
+            const started = performance.now();
+            let value = null;
+            try {
+                value = strategies[name](arg);
+            } catch (err) {
+                value = null;
+            }
+            s.ms += performance.now() - started;
+            if (value !== null && value !== undefined) {
+                s.hits++;
+                return value;
+            }
+            s.misses++;
+        }
+        stats.__allMissed++;
+        return null;
+    };
+})();'''
+
+
+class SelectorRegistry:
+    """Persisted strategy statistics: {source: {field: {strategy: {hits, misses, ms}, "__flag": {...}}}}"""
+
+    def __init__(self, path: str = REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Dict]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                print(f"[SELECTORS] ⚠️ Could not read {path}, starting fresh")
+
+    @staticmethod
+    def _score(stats: Dict) -> tuple:
+        attempts = stats["hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + 1) / (attempts + 2)
+        avg_ms = stats["ms"] / attempts if attempts else 0.0
+        # Best hit rate first; between near-equal hit rates, the cheaper one
+        return (-round(hit_rate, 2), avg_ms)
+
+    def order(self, source: str, defaults: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Strategy order per field, best first; strategies with no history keep their default position"""
+        fields = self.data.get(source, {})
+        ordered = {}
+        for field, names in defaults.items():
+            known = fields.get(field, {})
+            ordered[field] = sorted(
+                names,
+                key=lambda name: self._score(known[name]) if name in known else (-0.5, float("inf"))
+            )
+        return ordered
+
+    def record(self, source: str, page_stats: Dict[str, Dict]) -> List[str]:
+        """Merge one page's window.__strategyStats; returns the fields currently flagged"""
+        with self._lock:
+            fields = self.data.setdefault(source, {})
+            for field, strategies in page_stats.items():
+                known = fields.setdefault(field, {})
+                for stats in known.values():
+                    if "hits" in stats:
+                        stats["hits"] *= DECAY
+                        stats["misses"] *= DECAY
+                        stats["ms"] *= DECAY
+
+                run_hits = 0
+                for name, s in strategies.items():
+                    if name.startswith("__"):
+                        continue
+                    entry = known.setdefault(name, {"hits": 0.0, "misses": 0.0, "ms": 0.0})
+                    entry["hits"] += s["hits"]
+                    entry["misses"] += s["misses"]
+                    entry["ms"] += s["ms"]
+                    run_hits += s["hits"]
+
+                flag = known.setdefault("__flag", {"missed_runs": 0, "flagged": False})
+                if run_hits == 0 and strategies.get("__allMissed", 0) > 0:
+                    flag["missed_runs"] += 1
+                else:
+                    flag["missed_runs"] = 0
+                flag["flagged"] = flag["missed_runs"] >= FLAG_AFTER_RUNS
+
+            flagged = [f for f, known in fields.items() if known.get("__flag", {}).get("flagged")]
+            self._save()
+
+        for field in flagged:
+            print(f"[SELECTORS] 🚩 {source}.{field}: every strategy missed in the last "
+                  f"{fields[field]['__flag']['missed_runs']} runs - markup may have changed")
+        return flagged
+
+    def _save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+_REGISTRY = None
+
+
+def get_selector_registry() -> SelectorRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = SelectorRegistry()
+    return _REGISTRY
+
+
+async def install_strategy_runner(page, source: str, defaults: Dict[str, List[str]]) -> None:
+    """Call before page.goto(): installs the runner plus this source's preferred order"""
+    order = get_selector_registry().order(source, defaults)
+    await page.add_init_script(STRATEGY_RUNNER_JS + f"\nwindow.__strategyOrder = {json.dumps(order)};")
+
+
+async def record_strategy_stats(page, source: str) -> List[str]:
+    """Pull the page's strategy stats into the registry; returns flagged fields"""
+    try:
+        stats = await page.evaluate("() => window.__strategyStats || {}")
+    except Exception as e:
+        print(f"[SELECTORS] ⚠️ Could not read strategy stats: {e}")
+        return []
+    return get_selector_registry().record(source, stats)
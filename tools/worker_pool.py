@@ -0,0 +1,250 @@
+"""
+Multi-Process Scrape Workers
+- A coordinator shards (source, query) scrape jobs over N worker processes
+- Each worker has its own event loop and its own browsers/profile leases
+- Jobs and results cross the process boundary as pydantic JSON bytes (no pickled models)
+- A crashed worker only fails the jobs it was running; its shard is restarted
+- Cancelling a scrape (e.g. at its deadline, see deadline.py) cancels it in the worker too, so the
+  shard is free for the next job while the cut-off browser closes in the background
+- Flights the worker's scraper publishes are sent back as they arrive, so a scrape cut off at its
+  deadline still returns its best-so-far flights
+
+Enable for the agent and the refresher with FLIGHT_WORKER_PROCESSES=<n> (0 = run in-process)
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import importlib
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.schema import Flight, FlightQuery, ScraperResult
+from tools.deadline import forward_partial, partial_publisher
+from tools.rate_limit import current_priority, priority
+
+WORKER_PROCESSES = int(os.environ.get("FLIGHT_WORKER_PROCESSES", "0"))
+DEFAULT_SCRAPERS = "tools.scrapers:SCRAPERS"
+
+# ============= WORKER SIDE =============
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_scrapers: Dict[str, Callable] = {}
+_worker_partials = None   # queue of (job id, flights JSON) back to the coordinator
+_worker_jobs: Dict[int, concurrent.futures.Future] = {}
+_worker_cancelled = set()  # job ids cancelled before they started
+_worker_last_job = -1
+_worker_lock = threading.Lock()
+
+
+def _worker_init(scrapers_ref: str, control, partials) -> None:
+    """
+    Runs once per worker process: the scraper table and one long-lived event loop
+
+    The loop runs in its own thread, so a cancelled scrape's browser teardown carries on
+    while the next job is already running.
+    """
+    global _worker_loop, _worker_scrapers, _worker_partials
+    module_name, attr = scrapers_ref.split(":")
+    _worker_scrapers = getattr(importlib.import_module(module_name), attr)
+    _worker_partials = partials
+    _worker_loop = asyncio.new_event_loop()
+    threading.Thread(target=_worker_loop.run_forever, name="scrape-loop", daemon=True).start()
+    threading.Thread(target=_worker_listen, args=(control,), name="scrape-control", daemon=True).start()
+
+
+def _worker_listen(control) -> None:
+    """Cancel jobs the coordinator gave up on"""
+    while True:
+        job_id = control.get()
+        with _worker_lock:
+            future = _worker_jobs.get(job_id)
+            if future is None and job_id > _worker_last_job:
+                _worker_cancelled.add(job_id)
+        if future is not None:
+            future.cancel()
+
+
+def _send_partial(job_id: int, source: str, flights: List[Flight]) -> None:
+    payload = ScraperResult(source=source, success=True, flights=flights).model_dump_json().encode()
+    _worker_partials.put((job_id, payload))
+
+
+def _worker_scrape(job_id: int, source: str, query_json: bytes, level: str) -> bytes:
+    global _worker_last_job
+    query = FlightQuery.model_validate_json(query_json)
+
+    async def scrape() -> ScraperResult:
+        # The caller's rate-limit priority carries over into the worker's navigations
+        with priority(level), forward_partial(lambda flights: _send_partial(job_id, source, flights)):
+            return await _worker_scrapers[source](query)
+
+    future = asyncio.run_coroutine_threadsafe(scrape(), _worker_loop)
+    with _worker_lock:
+        _worker_last_job = job_id
+        _worker_jobs[job_id] = future
+        if job_id in _worker_cancelled:
+            _worker_cancelled.discard(job_id)
+            future.cancel()
+    try:
+        result = future.result()
+    except concurrent.futures.CancelledError:
+        result = ScraperResult(source=source, success=False, error="Cancelled", flights=[])
+    except Exception as e:
+        result = ScraperResult(source=source, success=False, error=str(e), flights=[])
+    finally:
+        with _worker_lock:
+            del _worker_jobs[job_id]
+    if result is None:
+        result = ScraperResult(source=source, success=False, error="No result returned", flights=[])
+    return result.model_dump_json().encode()
+
+
+# ============= COORDINATOR SIDE =============
+
+class _Shard:
+    """One single-process executor plus its control (cancel) and partial-result queues"""
+
+    def __init__(self, ctx, scrapers_ref: str, on_partial: Callable[[int, bytes], None]):
+        self.control = ctx.Queue()
+        self.partials = ctx.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=ctx,
+            initializer=_worker_init,
+            initargs=(scrapers_ref, self.control, self.partials),
+        )
+        self._reader = threading.Thread(target=self._read_partials, args=(on_partial,),
+                                         name="scrape-partials", daemon=True)
+        self._reader.start()
+
+    def _read_partials(self, on_partial: Callable[[int, bytes], None]) -> None:
+        while True:
+            message = self.partials.get()
+            if message is None:
+                return
+            on_partial(*message)
+
+    def shutdown(self, wait: bool) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.partials.put(None)   # stops the reader thread
+
+
+class ScrapeWorkerPool:
+    """
+    Shards scrape jobs over single-process executors
+
+    A job's shard is a hash of (source, route, date), so repeat searches land on the
+    worker whose browser profile and caches already know that page. Each shard is its
+    own executor, so a worker crash breaks one shard, not the whole pool.
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES or os.cpu_count() or 1,
+                 scrapers_ref: str = DEFAULT_SCRAPERS):
+        self.processes = max(1, processes)
+        self.scrapers_ref = scrapers_ref
+        # spawn, not fork: a forked child would inherit the coordinator's loop and browser pipes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._shards: List[Optional[_Shard]] = [None] * self.processes
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+        # job id -> (caller's loop, its partial-result publisher)
+        self._publishers: Dict[int, Tuple[asyncio.AbstractEventLoop, Callable]] = {}
+        self.stats = {"jobs": 0, "failed": 0, "crashes": 0, "cancelled": 0}
+
+    def _shard_for(self, source: str, query: FlightQuery) -> int:
+        key = f"{source}|{query.from_city.upper()}|{query.to_city.upper()}|{query.departure_date}"
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=4).digest(), "big") % self.processes
+
+    def _shard(self, index: int) -> _Shard:
+        with self._lock:
+            if self._shards[index] is None:
+                self._shards[index] = _Shard(self._ctx, self.scrapers_ref, self._on_partial)
+            return self._shards[index]
+
+    def _restart(self, index: int, broken: _Shard) -> None:
+        with self._lock:
+            # Another job on the same shard may have restarted it already
+            if self._shards[index] is broken:
+                self._shards[index] = None
+                self.stats["crashes"] += 1
+        broken.shutdown(wait=False)
+
+    def _on_partial(self, job_id: int, payload: bytes) -> None:
+        """Reader thread: hand a worker's published flights to the job's caller"""
+        target = self._publishers.get(job_id)
+        if target is None:
+            return   # the job already finished or was cancelled
+        loop, publish = target
+        flights = ScraperResult.model_validate_json(payload).flights
+        try:
+            loop.call_soon_threadsafe(publish, flights)
+        except RuntimeError:
+            pass   # the caller's loop is closed
+
+    async def scrape(self, source: str, query: FlightQuery) -> ScraperResult:
+        index = self._shard_for(source, query)
+        shard = self._shard(index)
+        job_id = next(self._job_ids)
+        self.stats["jobs"] += 1
+        loop = asyncio.get_running_loop()
+        # Partials from the worker go wherever this scrape's own would (deadline sink, coalesced buffer)
+        self._publishers[job_id] = (loop, partial_publisher())
+        try:
+            payload = await loop.run_in_executor(shard.executor, _worker_scrape, job_id, source,
+                                                 query.model_dump_json().encode(), current_priority())
+        except BrokenProcessPool:
+            print(f"[WORKERS] 💥 Worker {index} died while scraping {source} - restarting it")
+            self._restart(index, shard)
+            self.stats["failed"] += 1
+            return ScraperResult(source=source, success=False, error="Worker process crashed", flights=[])
+        except asyncio.CancelledError:
+            # Cancelling the future doesn't stop a job that is already running - tell the worker
+            shard.control.put(job_id)
+            self.stats["cancelled"] += 1
+            raise
+        finally:
+            self._publishers.pop(job_id, None)
+
+        result = ScraperResult.model_validate_json(payload)
+        if not result.success:
+            self.stats["failed"] += 1
+        return result
+
+    async def scrape_many(self, jobs: List[Tuple[str, FlightQuery]]) -> List[ScraperResult]:
+        """Run (source, query) jobs across the workers; results come back in job order"""
+        return await asyncio.gather(*(self.scrape(source, query) for source, query in jobs))
+
+    def scrapers(self, sources: Optional[List[str]] = None) -> Dict[str, Callable]:
+        """Drop-in replacement for tools.scrapers.SCRAPERS that runs each scrape in a worker"""
+        if sources is None:
+            from tools.scrapers import SCRAPERS
+            sources = list(SCRAPERS)
+
+        def make(source: str):
+            async def scrape(query: FlightQuery, session=None) -> ScraperResult:
+                return await self.scrape(source, query)
+            return scrape
+        return {source: make(source) for source in sources}
+
+    def close(self) -> None:
+        with self._lock:
+            shards, self._shards = self._shards, [None] * self.processes
+        for shard in shards:
+            if shard is not None:
+                shard.shutdown(wait=True)
+
+
+_POOL: Optional[ScrapeWorkerPool] = None
+
+
+def get_worker_pool() -> Optional[ScrapeWorkerPool]:
+    """Process-wide pool when FLIGHT_WORKER_PROCESSES is set, otherwise None (scrape in-process)"""
+    global _POOL
+    if _POOL is None and WORKER_PROCESSES > 0:
+        _POOL = ScrapeWorkerPool(WORKER_PROCESSES)
+    return _POOL